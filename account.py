@@ -1,8 +1,15 @@
+import bisect
 import dataclasses as dc
 import re
 from pathlib import Path
+from typing import Iterable, Iterator
 from dataclass_json import dataclass_json_loads, dataclass_json_dumps
-from config import config_get_accounts_iterator, config_get_accounts_path, config_get_base_accounts_path
+from atomic_write import atomic_write_files
+from parse_cache import load_files_cached
+from sequence_view import SequenceView
+from config import config_get_accounts_iterator, config_get_accounts_path, config_get_archive_path, config_get_base_accounts_path
+# Imported as module, archives build Account objects
+import year_archive as year_archive_module
 
 
 @dc.dataclass
@@ -34,36 +41,103 @@ class Account:
         return self.account_number <= other.account_number
 
 
+MAX_SEARCH_MATCHES = 10
+
+
+class AccountIndex:
+    """
+    Search index over accounts, by account number prefix (bisect over the
+    sorted numbers) and by description substring (trigram index).
+    """
+    def __init__(self, accounts: Iterable[Account]):
+        self._accounts = sorted(accounts, key=lambda acc: str(acc.account_number))
+        self._numbers = [str(acc.account_number) for acc in self._accounts]
+        self._descriptions = [acc.description.lower() for acc in self._accounts]
+        self._trigrams: dict[str, list[int]] = {}
+        for idx, desc in enumerate(self._descriptions):
+            for trigram in {desc[i:i + 3] for i in range(len(desc) - 2)}:
+                self._trigrams.setdefault(trigram, []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def find_account(self, account_num: int | str) -> Account | None:
+        key = str(account_num)
+        idx = bisect.bisect_left(self._numbers, key)
+        if idx < len(self._numbers) and self._numbers[idx] == key:
+            return self._accounts[idx]
+        return None
+
+    def search_prefix(self, prefix: str, limit: int = MAX_SEARCH_MATCHES) -> list[Account]:
+        idx = bisect.bisect_left(self._numbers, prefix)
+        matches = []
+        while idx < len(self._numbers) and self._numbers[idx].startswith(prefix) and len(matches) < limit:
+            matches.append(self._accounts[idx])
+            idx += 1
+        return matches
+
+    def search_description(self, text: str, limit: int = MAX_SEARCH_MATCHES) -> list[Account]:
+        text = text.lower()
+        if len(text) < 3:
+            candidates = range(len(self._descriptions))
+        else:
+            postings = sorted((self._trigrams.get(text[i:i + 3], []) for i in range(len(text) - 2)), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            candidates = sorted(candidates)
+        matches = []
+        for idx in candidates:
+            if text in self._descriptions[idx]:
+                matches.append(self._accounts[idx])
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def search(self, query: str, limit: int = MAX_SEARCH_MATCHES) -> list[Account]:
+        """Accounts matching a number prefix or a description substring, number matches first."""
+        query = query.strip()
+        if not query:
+            return self._accounts[:limit]
+        if query.split()[0].isdigit():
+            return self.search_prefix(query.split()[0], limit)
+        return self.search_description(query, limit)
+
+
 class AccountList:
-    def __init__(self, accounts_filepath: str | Path, year: int, new_year: bool = False):
+    def __init__(self, accounts_filepath: str | Path | None, year: int, new_year: bool = False, accounts: list[Account] | None = None):
         self._accounts_filepath = accounts_filepath
         self._year = year
-        self._accounts = self._load_accounts(new_year)
-        self._index = 0
+        # Accounts not backed by a file, e.g. read from the git history
+        self._accounts = sorted(accounts) if accounts is not None else self._load_accounts(new_year)
+        self._search_index: AccountIndex | None = None
 
-    def __iter__(self):
-        self._index = 0
-        return self
+    def __iter__(self) -> Iterator[Account]:
+        # A new iterator each time, iterations can be nested
+        return iter(self._accounts)
 
-    def __next__(self) -> Account:
-        try:
-            result = self._accounts[self._index]
-        except IndexError:
-            raise StopIteration
-        self._index += 1
-        return result
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def __getitem__(self, idx: int) -> Account:
+        return self._accounts[idx]
 
     def __lt__(self, other):
         return self._year < other._year
 
-    def __lt__(self, other):
+    def __lte__(self, other):
         return self._year <= other._year
 
-    def _load_accounts_from_file(self, filepath: Path) -> list[Account]:
+    @staticmethod
+    def _parse_accounts_file(filepath: Path) -> list[Account]:
+        with open(filepath, 'r', encoding='utf-8') as acc_file:
+            return dataclass_json_loads(acc_file.read())
+
+    def _load_accounts_from_file(self, filepath: Path, cache_name: str | None = None) -> list[Account]:
         print(f"Loading accounts from: {filepath.absolute()}")
         assert filepath.exists(), f"{filepath}: no such path"
-        with open(filepath, 'r', encoding='utf-8') as acc_file:
-            accounts = dataclass_json_loads(acc_file.read())
+        if cache_name is None:
+            accounts = self._parse_accounts_file(filepath)
+        else:
+            accounts = load_files_cached(cache_name, [filepath], self._parse_accounts_file)[0]
 
         print(f"Loaded {len(accounts)} accounts")
         accounts.sort()
@@ -87,7 +161,8 @@ class AccountList:
             years = account_lists_years()
             if len(years):
                 print("Previous year available, copy")
-                self._accounts = account_list(years[-1]).get_accounts()
+                # Copy each account, the years must not share account objects
+                self._accounts = [dc.replace(acc) for acc in account_list(years[-1])]
             elif base_acc_file_path.exists():
                 print("No previous year, copy accounts from base")
                 self._accounts = self._load_accounts_from_file(base_acc_file_path)
@@ -96,11 +171,20 @@ class AccountList:
                 self._accounts = []
             return self._accounts
 
-        return self._load_accounts_from_file(acc_file_path)
+        archive = year_archive_module.year_archive(self._year)
+        if archive is not None:
+            print(f"Loading accounts from: {archive.path.absolute()}")
+            return sorted(archive.load_accounts())
+        return self._load_accounts_from_file(acc_file_path, cache_name=f"accounts_{self._year}")
 
     def get_accounts(self) -> list[Account]:
         return self._accounts.copy()
 
+    @property
+    def accounts(self) -> SequenceView[Account]:
+        """Read-only view of the accounts, without copying."""
+        return SequenceView(self._accounts)
+
     @property
     def len(self) -> int:
         return len(self._accounts)
@@ -112,24 +196,36 @@ class AccountList:
     def find_account(self, account_num: int | str) -> Account | None:
         if type(account_num) == str:
             account_num = int(account_num)
-        for acc in self:
-            if acc.account_number == account_num:
-                return acc
-        return None
+        if self._search_index is None:
+            self._search_index = AccountIndex(self._accounts)
+        return self._search_index.find_account(account_num)
+
+    def search(self, query: str, limit: int = MAX_SEARCH_MATCHES) -> list[Account]:
+        if self._search_index is None:
+            self._search_index = AccountIndex(self._accounts)
+        return self._search_index.search(query, limit)
 
     def add_account(self, account: Account):
         self._accounts.append(account)
         self._accounts.sort()
+        self._search_index = None
 
     def remove_account(self, account: Account):
         self._accounts.remove(account)
+        self._search_index = None
 
     def save_accounts(self):
+        if year_archive_module.year_archive(self._year) is not None:
+            # A change to an archived year restores its directory first
+            year_archive_module.unarchive_year(self._year)
         acc_file_path = Path(self._accounts_filepath)
         print(f"Storing accounts in file: {acc_file_path.absolute()}")
-        with open(acc_file_path, 'w+', encoding="utf-8") as acc_file:
-            print("save accounts")
-            acc_file.write(dataclass_json_dumps(self._accounts, indent=4))
+        atomic_write_files({acc_file_path: dataclass_json_dumps(self._accounts, indent=4)})
+
+    def reload_accounts(self):
+        """Load the accounts again after the file was changed on disk by someone else."""
+        self._accounts = self._load_accounts_from_file(Path(self._accounts_filepath), cache_name=f"accounts_{self._year}")
+        self._search_index = None
 
 
 _account_lists: list[AccountList] | None = None
@@ -150,10 +246,16 @@ def account_list_init():
         except ValueError as err:
             print(f"Invalid year, ignoring '{al_path.absolute()}'")
             continue
+        if config_get_archive_path(year).exists():
+            continue
 
         print(f"Loading accounts for year {year}")
         _account_lists.append(AccountList(al_path, year))
 
+    for year in year_archive_module.archived_years():
+        print(f"Loading archived accounts for year {year}")
+        _account_lists.append(AccountList(config_get_accounts_path(year), year))
+
     _account_lists.sort()
 
 
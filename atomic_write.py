@@ -0,0 +1,155 @@
+import ctypes
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from file_watch import note_file_removed, note_file_written
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+
+# Temp files start with this, so they are never taken for userdata files
+TEMP_PREFIX = ".tmp-"
+
+# Temp files are created private, give the files the mode open() would
+_umask = os.umask(0)
+os.umask(_umask)
+_FILE_MODE = 0o666 & ~_umask
+
+
+def _load_syncfs():
+    # Not in the os module, from the C library on Linux
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        syncfs = ctypes.CDLL(None, use_errno=True).syncfs
+    except (OSError, AttributeError):
+        return None
+    syncfs.argtypes = [ctypes.c_int]
+    syncfs.restype = ctypes.c_int
+    return syncfs
+
+
+_syncfs = _load_syncfs()
+
+
+def _fsync(fd: int):
+    if hasattr(fcntl, "F_FULLFSYNC"):
+        # fsync on macOS does not flush the drive cache
+        fcntl.fcntl(fd, fcntl.F_FULLFSYNC)
+    elif hasattr(os, "fdatasync"):
+        # The data and the size, not the access times
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+
+def _sync_file(path: str):
+    fd = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        _fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _sync_filesystem(dir: str):
+    fd = os.open(dir, os.O_RDONLY)
+    try:
+        if _syncfs(fd) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), dir)
+    finally:
+        os.close(fd)
+
+
+def _sync_files(temp_paths: list[str]):
+    # os.sync() would wait for every filesystem and may return before the
+    # data is on disk
+    if len(temp_paths) == 1:
+        _sync_file(temp_paths[0])
+        return
+    if _syncfs is not None:
+        # One syncfs per filesystem, normally the one of the userdata dir,
+        # instead of one flush per file. It also flushes whatever else is
+        # dirty on that filesystem.
+        dirs_per_device: dict[int, str] = {}
+        for dir in {os.path.dirname(temp_path) for temp_path in temp_paths}:
+            dirs_per_device.setdefault(os.stat(dir).st_dev, dir)
+        for dir in dirs_per_device.values():
+            _sync_filesystem(dir)
+        return
+    # Only the written files, the flushes overlap in threads
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(_sync_file, temp_paths))
+
+
+def _sync_dir(dir: Path):
+    if os.name == "nt":
+        # Renames are journaled, a directory can not be opened for fsync
+        return
+    fd = os.open(dir, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_files(files: dict[Path, str | bytes], remove: list[Path] | None = None, skip_unchanged: bool = True) -> int:
+    """
+    Write the files atomically and durably as one group: write temp files
+    next to them, flush them, rename them over the files,
+    remove the files in remove, and finally fsync each directory once.
+    A crash leaves every file either old or new, never half written. Files
+    whose content is already on disk are not written. Returns the number of
+    written files.
+    """
+    start = time.perf_counter()
+    contents: dict[Path, bytes] = {}
+    for path, text in files.items():
+        data = text.encode("utf-8") if isinstance(text, str) else text
+        if skip_unchanged and path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+            continue
+        contents[path] = data
+    compare_time = time.perf_counter()
+
+    temp_paths: dict[Path, str] = {}
+    try:
+        for path, data in contents.items():
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=TEMP_PREFIX)
+            temp_paths[path] = temp_path
+            with open(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.chmod(temp_path, _FILE_MODE)
+        write_time = time.perf_counter()
+        if temp_paths:
+            _sync_files(list(temp_paths.values()))
+        sync_time = time.perf_counter()
+        for path in list(temp_paths):
+            os.replace(temp_paths[path], path)
+            del temp_paths[path]
+            note_file_written(path)
+    finally:
+        # Only the temp files not renamed yet, left on failure
+        for temp_path in temp_paths.values():
+            os.unlink(temp_path)
+
+    dirs = {path.parent for path in contents}
+    for path in remove or []:
+        path.unlink()
+        note_file_removed(path)
+        dirs.add(path.parent)
+    for dir in dirs:
+        _sync_dir(dir)
+
+    end = time.perf_counter()
+    if contents or remove:
+        print(f"Wrote {len(contents)} of {len(files)} files and removed {len(remove or [])} in {(end - start) * 1000:.1f} ms "
+              f"(compare {(compare_time - start) * 1000:.1f} ms, write {(write_time - compare_time) * 1000:.1f} ms, "
+              f"sync {(sync_time - write_time) * 1000:.1f} ms, rename and dir sync {(end - sync_time) * 1000:.1f} ms)")
+    return len(contents)
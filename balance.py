@@ -1,26 +1,207 @@
+import bisect
+import itertools
+from typing import Iterator
+
 from account import Account
-from verification import Verification
+from binary_journal import BinaryJournal
+from verification import Verification, VerificationList
 from transaction import Transaction
-from year import year
+import year as year_module
+
+
+def get_transactions_for_account(account: Account, verification_list: VerificationList | None = None) -> list[tuple[Transaction, Verification]]:
+    if verification_list is None:
+        verification_list = year_module.year().verification_list
+    return [(trans, ver) for ver in verification_list for trans in ver.transactions if account.account_number == trans.account_number]
+
+
+def account_sign(account: Account) -> int:
+    # Debt and income accounts are shown with flipped sign
+    return -1 if account.is_debt or account.is_income else 1
 
 
-def get_transactions_for_account(account: Account) -> list[tuple[Transaction, Verification]]:
-    return [(trans, ver) for ver in year().verification_list for trans in ver.transactions if account.account_number == trans.account_number]
+def get_balance_from_movement(account: Account, movement: float) -> float:
+    # The incoming balance is already stored with the sign of the account,
+    # only the movement (debit - credit) of the year needs flipping
+    return round(account.incoming_balance + account_sign(account) * movement, ndigits=2)
 
 
 def get_balance_from_transactions(account: Account, transactions: list[Transaction]) -> float:
-    balance = account.incoming_balance
+    movement = 0.0
     for trans in transactions:
-        balance += trans.debit - trans.credit
-    if account.is_debt or account.is_income:
-        # Debt or income account, flip sign
-        balance = -balance
-    return balance
+        movement += trans.debit - trans.credit
+    return get_balance_from_movement(account, movement)
+
+
+def get_balance_for_account(account: Account, verification_list: VerificationList | None = None) -> float:
+    if verification_list is None:
+        verification_list = year_module.year().verification_list
+    if verification_list.binary_journal is not None:
+        return get_balance_from_movement(account, verification_list.binary_journal.account_movement(account.account_number))
+    return get_balance_from_movement(account, get_account_postings(account, verification_list).movement)
+
+
+def account_has_transactions(account: Account, verification_list: VerificationList | None = None) -> bool:
+    if verification_list is None:
+        verification_list = year_module.year().verification_list
+    if verification_list.binary_journal is not None:
+        return verification_list.binary_journal.account_posting_count(account.account_number) > 0
+    return len(get_account_postings(account, verification_list)) > 0
+
+
+class AccountPostings:
+    """
+    All postings on one account in one year, in journal order, with the
+    accumulated movement (debit - credit) after each posting precomputed.
+    Reading a page of rows with running balances costs O(page size).
+    """
+    def __init__(self, account_number: int):
+        self.account_number = account_number
+        self._ver_idxs: list[int] = []
+        self._transactions: list[Transaction] = []
+        self._movements: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def _append(self, ver_idx: int, trans: Transaction):
+        movement = self._movements[-1] if self._movements else 0.0
+        self._ver_idxs.append(ver_idx)
+        self._transactions.append(trans)
+        self._movements.append(movement + trans.debit - trans.credit)
+
+    @property
+    def movement(self) -> float:
+        return self._movements[-1] if self._movements else 0.0
+
+    def verification_index(self, idx: int) -> int:
+        return self._ver_idxs[idx]
+
+    def items(self) -> Iterator[tuple[int, Transaction]]:
+        """(verification index, transaction) of the postings, in journal order."""
+        return zip(self._ver_idxs, self._transactions)
+
+    def page(self, account: Account, verification_list: VerificationList, start: int, count: int) -> list[tuple[int, Verification, Transaction, float]]:
+        """
+        Rows (verification index, verification, transaction, running balance)
+        for postings start .. start + count.
+        """
+        sign = account_sign(account)
+        rows = []
+        for idx in range(max(start, 0), min(start + count, len(self))):
+            ver_idx = self._ver_idxs[idx]
+            balance = round(account.incoming_balance + sign * self._movements[idx], ndigits=2)
+            rows.append((ver_idx, verification_list.get_verification_at(ver_idx), self._transactions[idx], balance))
+        return rows
+
+
+class PostingIndex:
+    """Postings of one year grouped per account, built in a single pass over the journal."""
+    def __init__(self, verification_list: VerificationList):
+        self.year = verification_list.year
+        self.revision = verification_list.revision
+        self._postings: dict[int, AccountPostings] = {}
+        for ver_idx, ver in enumerate(verification_list):
+            for trans in ver.transactions:
+                postings = self._postings.get(trans.account_number)
+                if postings is None:
+                    postings = self._postings[trans.account_number] = AccountPostings(trans.account_number)
+                postings._append(ver_idx, trans)
+
+    def postings(self, account_number: int) -> AccountPostings:
+        return self._postings.get(account_number, AccountPostings(account_number))
+
+    def account_numbers(self, first_account: int, last_account: int) -> list[int]:
+        """Numbers of the accounts with postings within the range, sorted."""
+        return sorted(acc_num for acc_num in self._postings if first_account <= acc_num <= last_account)
+
+    def movements(self) -> dict[int, float]:
+        """Year-end movement (debit - credit) per account number."""
+        return {acc_num: postings.movement for acc_num, postings in self._postings.items()}
+
+
+class JournalAccountPostings:
+    """
+    The postings on one account of a closed year, read from the mapped binary
+    journal. Same interface as AccountPostings, transactions are built only
+    for the postings asked for.
+    """
+    def __init__(self, journal: BinaryJournal, account_number: int):
+        self.account_number = account_number
+        self._journal = journal
+        self._posts = journal.account_postings(account_number)
+        # Accumulated movement in öre after each posting, on first page
+        self._movements: list[int] | None = None
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+    @property
+    def movement(self) -> float:
+        return self._journal.account_movement(self.account_number)
+
+    def verification_index(self, idx: int) -> int:
+        return self._journal.posting_verification_index(self._posts[idx])
+
+    def items(self) -> Iterator[tuple[int, Transaction]]:
+        """(verification index, transaction) of the postings, in journal order."""
+        return ((self._journal.posting_verification_index(post), self._journal.transaction_at(post)) for post in self._posts)
+
+    def page(self, account: Account, verification_list: VerificationList, start: int, count: int) -> list[tuple[int, Verification, Transaction, float]]:
+        """
+        Rows (verification index, verification, transaction, running balance)
+        for postings start .. start + count.
+        """
+        if self._movements is None:
+            self._movements = list(itertools.accumulate(self._journal.posting_amount(post) for post in self._posts))
+        sign = account_sign(account)
+        rows = []
+        for idx in range(max(start, 0), min(start + count, len(self))):
+            post = self._posts[idx]
+            ver_idx = self._journal.posting_verification_index(post)
+            balance = round(account.incoming_balance + sign * self._movements[idx] / 100, ndigits=2)
+            rows.append((ver_idx, verification_list.get_verification_at(ver_idx), self._journal.transaction_at(post), balance))
+        return rows
+
+
+class JournalPostingIndex:
+    """Posting index of a closed year, served from the mapped binary journal without building verifications."""
+    def __init__(self, verification_list: VerificationList, journal: BinaryJournal):
+        self.year = verification_list.year
+        self.revision = verification_list.revision
+        self._journal = journal
+        self._postings: dict[int, JournalAccountPostings] = {}
+
+    def postings(self, account_number: int) -> JournalAccountPostings:
+        postings = self._postings.get(account_number)
+        if postings is None:
+            postings = self._postings[account_number] = JournalAccountPostings(self._journal, account_number)
+        return postings
+
+    def account_numbers(self, first_account: int, last_account: int) -> list[int]:
+        """Numbers of the accounts with postings within the range, sorted."""
+        numbers = self._journal.account_numbers
+        return list(numbers[bisect.bisect_left(numbers, first_account):bisect.bisect_right(numbers, last_account)])
+
+    def movements(self) -> dict[int, float]:
+        """Year-end movement (debit - credit) per account number."""
+        return self._journal.movements()
+
+
+_posting_indexes: dict[int, PostingIndex | JournalPostingIndex] = {}
 
 
-def get_balance_for_account(account: Account) -> float:
-    return get_balance_from_transactions(account, [t for t, _ in get_transactions_for_account(account)])
+def posting_index(verification_list: VerificationList | None = None) -> PostingIndex | JournalPostingIndex:
+    """Posting index for the given (default: current) year, rebuilt only when the journal changed."""
+    if verification_list is None:
+        verification_list = year_module.year().verification_list
+    index = _posting_indexes.get(verification_list.year)
+    if index is None or index.revision != verification_list.revision:
+        journal = verification_list.binary_journal
+        index = PostingIndex(verification_list) if journal is None else JournalPostingIndex(verification_list, journal)
+        _posting_indexes[verification_list.year] = index
+    return index
 
 
-def account_has_transactions(account: Account) -> bool:
-    return len(get_transactions_for_account(account)) > 0
+def get_account_postings(account: Account, verification_list: VerificationList | None = None) -> AccountPostings | JournalAccountPostings:
+    return posting_index(verification_list).postings(account.account_number)
@@ -0,0 +1,133 @@
+import bisect
+import csv
+import dataclasses as dc
+import datetime
+import re
+from pathlib import Path
+
+from posting import PostingBatch
+from transaction import Transaction
+from verification import VerificationList, verification_list
+
+BANK_ACCOUNT = 1930
+MATCH_WINDOW_DAYS = 3
+
+# Column names used by common bank exports, matched case-insensitively
+DATE_COLUMNS = ["date", "datum", "bokföringsdag", "bokföringsdatum", "transaktionsdatum", "valutadag"]
+TEXT_COLUMNS = ["text", "beskrivning", "description", "referens", "meddelande", "specifikation"]
+AMOUNT_COLUMNS = ["amount", "belopp"]
+
+
+@dc.dataclass
+class StatementLine:
+    date: datetime.date
+    text: str
+    amount: float
+
+
+def _find_column(header: list[str], candidates: list[str]) -> str:
+    lowered = {name.strip().lower(): name for name in header}
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered[candidate]
+    raise ValueError(f"No column matching any of {candidates} in header {header}")
+
+
+def _parse_amount(value: str) -> float:
+    # Swedish exports use space or "." as thousands separator and "," as decimal
+    # separator, English exports "," and ".". The decimal separator is the last
+    # of them when followed by one or two digits, the other one is stripped.
+    value = value.replace("\xa0", "").replace(" ", "").strip()
+    match = re.search(r"[.,](\d{1,2})$", value)
+    integer_part = value[:match.start()] if match else value
+    separators = set(integer_part) & {".", ","}
+    if len(separators) > 1 or (match and value[match.start()] in separators):
+        raise ValueError(f"Ambiguous decimal and thousands separators in amount '{value}'")
+    integer_part = integer_part.replace(".", "").replace(",", "")
+    return round(float(f"{integer_part}.{match.group(1)}" if match else integer_part), ndigits=2)
+
+
+def read_bank_statement(filepath: str | Path, encoding: str = "utf-8-sig") -> list[StatementLine]:
+    lines: list[StatementLine] = []
+    with open(filepath, "r", encoding=encoding, newline="") as csv_file:
+        try:
+            dialect = csv.Sniffer().sniff(csv_file.read(4096), delimiters=",;\t")
+        except csv.Error as err:
+            raise ValueError(f"{filepath}: not a readable CSV file: {err}") from None
+        csv_file.seek(0)
+        reader = csv.DictReader(csv_file, dialect=dialect)
+        date_col = _find_column(reader.fieldnames, DATE_COLUMNS)
+        text_col = _find_column(reader.fieldnames, TEXT_COLUMNS)
+        amount_col = _find_column(reader.fieldnames, AMOUNT_COLUMNS)
+        for row_num, row in enumerate(reader, start=2):
+            try:
+                lines.append(StatementLine(
+                    datetime.date.fromisoformat(row[date_col].strip()),
+                    row[text_col].strip(),
+                    _parse_amount(row[amount_col]),
+                ))
+            except (ValueError, AttributeError) as err:
+                raise ValueError(f"{filepath}:{row_num}: bad statement line: {err}") from None
+    return lines
+
+
+class PostingMatcher:
+    """
+    Index of the existing postings on the bank account, keyed on amount in
+    öre with the posting dates sorted per amount. Every posting can be
+    matched by one statement line only.
+    """
+    def __init__(self, verifications: VerificationList, account_number: int, window_days: int = MATCH_WINDOW_DAYS):
+        self._window = datetime.timedelta(days=window_days)
+        self._dates: dict[int, list[datetime.date]] = {}
+        for ver in verifications:
+            for trans in ver.transactions:
+                if trans.account_number == account_number:
+                    self._dates.setdefault(round((trans.debit - trans.credit) * 100), []).append(ver.date)
+        for dates in self._dates.values():
+            dates.sort()
+
+    def match(self, line: StatementLine) -> bool:
+        """Find and consume a posting with the same amount within the date window."""
+        dates = self._dates.get(round(line.amount * 100))
+        if not dates:
+            return False
+        idx = bisect.bisect_left(dates, line.date - self._window)
+        if idx < len(dates) and dates[idx] <= line.date + self._window:
+            del dates[idx]
+            return True
+        return False
+
+
+def import_bank_statement(filepath: str | Path, year: int, counter_account: int, account_number: int = BANK_ACCOUNT,
+                          window_days: int = MATCH_WINDOW_DAYS) -> int:
+    """
+    Create verifications for the lines of a bank statement CSV file that are
+    in the year and do not match an existing posting on the bank account.
+    Each has a row on the bank account and the balancing row on the counter
+    account, e.g. a suspense account, to be moved to the right account in
+    the verifications window. All are posted as one batch, so nothing is
+    posted into a closed year or on an unknown account, followed by one git
+    commit. Returns the number of created verifications.
+    """
+    print(f"Importing bank statement: {Path(filepath).absolute()}")
+    lines = read_bank_statement(filepath)
+    vl = verification_list(year)
+    matcher = PostingMatcher(vl, account_number, window_days)
+
+    batch = PostingBatch(year, f"Bank import - {Path(filepath).name}")
+    num_matched = 0
+    num_other_year = 0
+    for line in lines:
+        if line.date.year != year:
+            num_other_year += 1
+            continue
+        if matcher.match(line):
+            num_matched += 1
+            continue
+        debit, credit = (line.amount, 0.0) if line.amount > 0 else (0.0, -line.amount)
+        batch.add(line.date, [Transaction(account_number, debit, credit, line.text),
+                              Transaction(counter_account, credit, debit, line.text)], f"Bank: {line.text}")
+
+    print(f"{len(lines)} statement lines: {num_matched} already posted, {num_other_year} not in year {year}, {len(batch)} new")
+    return len(batch.commit())
@@ -0,0 +1,287 @@
+import bisect
+import datetime
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from config import config_get_cache_dir
+from transaction import Transaction
+# Imported as module, the verification list opens binary journals
+import verification as verification_module
+
+# Version 2 stores account numbers as 32 bit, older files are rebuilt
+BINARY_JOURNAL_MAGIC = b"ALOPJNL2"
+_BYTE_ORDER_MARK = 0x01020304
+# Magic, byte order mark, journal hash, number of postings, verifications,
+# accounts and strings
+_HEADER = struct.Struct("=8sI64sIIII")
+
+# Sections in file order, (name, typecode, count name). Every section starts
+# 8 byte aligned, so both sides compute the same layout from the counts.
+#
+# The postings are stored column wise in journal order, the postings of a
+# verification being ver_first[idx] .. ver_first[idx + 1]. The amount is
+# debit - credit in öre. acc_postings holds the posting indexes grouped per
+# account, the postings of acc_numbers[idx] being
+# acc_postings[acc_first[idx] .. acc_first[idx + 1]]. Notes and cost units
+# are indexes into the string table, index 0 being the empty string.
+_SECTIONS = (
+    ("post_account", "I", "postings"),
+    ("post_amount", "q", "postings"),
+    ("post_date", "I", "postings"),
+    ("post_ver_id", "I", "postings"),
+    ("post_notes", "I", "postings"),
+    ("post_cost_unit", "I", "postings"),
+    ("ver_id", "I", "verifications"),
+    ("ver_date", "I", "verifications"),
+    ("ver_first", "I", "verifications+1"),
+    ("ver_notes", "I", "verifications"),
+    ("ver_discarded", "B", "verifications"),
+    ("acc_numbers", "I", "accounts"),
+    ("acc_first", "I", "accounts+1"),
+    ("acc_postings", "I", "postings"),
+    ("str_offsets", "I", "strings+1"),
+)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _layout(counts: dict[str, int]) -> tuple[dict[str, tuple[int, int]], int]:
+    """Offset and size in bytes of each section, and the offset of the string data."""
+    layout = {}
+    offset = _align(_HEADER.size)
+    for name, typecode, count_name in _SECTIONS:
+        count = counts[count_name.removesuffix("+1")] + count_name.endswith("+1")
+        size = count * array(typecode).itemsize
+        layout[name] = (offset, size)
+        offset = _align(offset + size)
+    return layout, offset
+
+
+def _to_ore(value: float) -> int | None:
+    ore = round(value * 100)
+    return ore if ore / 100 == value else None
+
+
+def binary_journal_path(year: int) -> Path:
+    return config_get_cache_dir() / f"journal_{year}.bin"
+
+
+def write_binary_journal(path: Path, journal_hash: str, verifications: Iterable["verification_module.Verification"]) -> bool:
+    """
+    Write the verifications, sorted on id, in the binary journal format.
+    Returns False, writing nothing, if a posting can not be stored exactly:
+    an amount with fractions of öre, or both debit and credit set.
+    """
+    columns = {name: array(typecode) for name, typecode, _ in _SECTIONS}
+    strings: dict[str, int] = {"": 0}
+    acc_postings: dict[int, list[int]] = {}
+
+    def string_index(text: str) -> int:
+        idx = strings.get(text)
+        if idx is None:
+            idx = strings[text] = len(strings)
+        return idx
+
+    for ver in verifications:
+        date = ver.date.toordinal()
+        columns["ver_id"].append(ver.id)
+        columns["ver_date"].append(date)
+        columns["ver_first"].append(len(columns["post_account"]))
+        columns["ver_notes"].append(string_index(ver.notes))
+        columns["ver_discarded"].append(ver.discarded)
+        for trans in ver.transactions:
+            if trans.debit and trans.credit:
+                print(f"Verification {ver.id} has a posting with both debit and credit, no binary journal")
+                return False
+            amount = _to_ore(trans.debit - trans.credit)
+            if amount is None:
+                print(f"Verification {ver.id} has an amount with fractions of öre, no binary journal")
+                return False
+            acc_postings.setdefault(trans.account_number, []).append(len(columns["post_account"]))
+            columns["post_account"].append(trans.account_number)
+            columns["post_amount"].append(amount)
+            columns["post_date"].append(date)
+            columns["post_ver_id"].append(ver.id)
+            columns["post_notes"].append(string_index(trans.notes))
+            columns["post_cost_unit"].append(string_index(trans.cost_unit))
+    columns["ver_first"].append(len(columns["post_account"]))
+
+    for acc_num in sorted(acc_postings):
+        columns["acc_numbers"].append(acc_num)
+        columns["acc_first"].append(len(columns["acc_postings"]))
+        columns["acc_postings"].extend(acc_postings[acc_num])
+    columns["acc_first"].append(len(columns["acc_postings"]))
+
+    string_data = bytearray()
+    for text in strings:
+        columns["str_offsets"].append(len(string_data))
+        string_data += text.encode("utf-8")
+    columns["str_offsets"].append(len(string_data))
+
+    counts = {
+        "postings": len(columns["post_account"]),
+        "verifications": len(columns["ver_id"]),
+        "accounts": len(columns["acc_numbers"]),
+        "strings": len(strings),
+    }
+    layout, string_data_offset = _layout(counts)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as journal_file:
+        journal_file.write(_HEADER.pack(BINARY_JOURNAL_MAGIC, _BYTE_ORDER_MARK, journal_hash.encode("ascii"),
+                                        counts["postings"], counts["verifications"], counts["accounts"], counts["strings"]))
+        for name, _, _ in _SECTIONS:
+            offset, _ = layout[name]
+            journal_file.write(bytes(offset - journal_file.tell()))
+            columns[name].tofile(journal_file)
+        journal_file.write(bytes(string_data_offset - journal_file.tell()))
+        journal_file.write(string_data)
+    os.replace(tmp_path, path)
+    print(f"Stored binary journal with {counts['verifications']} verifications in: {path.absolute()}")
+    return True
+
+
+class BinaryJournal:
+    """
+    A closed year's journal in the binary format, memory mapped. Aggregates
+    and account lookups read the mapped columns directly, and Verification
+    objects are only built for the verifications asked for.
+    """
+    def __init__(self, path: Path):
+        with open(path, "rb") as journal_file:
+            self._mmap = mmap.mmap(journal_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byte_order_mark, journal_hash, num_postings, num_verifications, num_accounts, num_strings = _HEADER.unpack_from(self._mmap)
+        if magic != BINARY_JOURNAL_MAGIC or byte_order_mark != _BYTE_ORDER_MARK:
+            self._mmap.close()
+            raise ValueError(f"{path}: not a binary journal for this machine")
+        self.journal_hash = journal_hash.decode("ascii")
+        counts = {"postings": num_postings, "verifications": num_verifications, "accounts": num_accounts, "strings": num_strings}
+        layout, string_data_offset = _layout(counts)
+        buffer = memoryview(self._mmap)
+        self._columns: dict[str, memoryview] = {}
+        for name, typecode, _ in _SECTIONS:
+            offset, size = layout[name]
+            self._columns[name] = buffer[offset:offset + size].cast(typecode)
+        self._strings = buffer[string_data_offset:]
+        self._post_account = self._columns["post_account"]
+        self._post_amount = self._columns["post_amount"]
+        self._post_date = self._columns["post_date"]
+        self._ver_id = self._columns["ver_id"]
+        self._ver_first = self._columns["ver_first"]
+        self._acc_numbers = self._columns["acc_numbers"]
+        self._acc_first = self._columns["acc_first"]
+        self._acc_postings = self._columns["acc_postings"]
+
+    def close(self):
+        # The views must be released before the map can be closed
+        for column in self._columns.values():
+            column.release()
+        self._strings.release()
+        self._columns = {}
+        self._mmap.close()
+
+    def __len__(self) -> int:
+        return len(self._ver_id)
+
+    @property
+    def num_postings(self) -> int:
+        return len(self._post_account)
+
+    def _string(self, idx: int) -> str:
+        offsets = self._columns["str_offsets"]
+        return str(self._strings[offsets[idx]:offsets[idx + 1]], "utf-8")
+
+    def verification_at(self, idx: int) -> "verification_module.Verification":
+        """Build the verification at the index, a new object on every call."""
+        if idx < 0:
+            idx += len(self)
+        ver = verification_module.Verification(
+            id=self._ver_id[idx],
+            date=datetime.date.fromordinal(self._columns["ver_date"][idx]),
+            notes=self._string(self._columns["ver_notes"][idx]),
+            discarded=bool(self._columns["ver_discarded"][idx]),
+        )
+        for post in range(self._ver_first[idx], self._ver_first[idx + 1]):
+            ver.add_transaction(self.transaction_at(post))
+        return ver
+
+    def transaction_at(self, post: int) -> Transaction:
+        """Build the transaction of the posting at the index, a new object on every call."""
+        amount = self._post_amount[post] / 100
+        return Transaction(
+            account_number=self._post_account[post],
+            debit=amount if amount > 0 else 0.0,
+            credit=-amount if amount < 0 else 0.0,
+            notes=self._string(self._columns["post_notes"][post]),
+            cost_unit=self._string(self._columns["post_cost_unit"][post]),
+        )
+
+    def posting_amount(self, post: int) -> int:
+        """Amount (debit - credit) of the posting at the index, in öre."""
+        return self._post_amount[post]
+
+    def posting_verification_index(self, post: int) -> int:
+        """Index of the verification holding the posting at the index."""
+        # The last verification starting at or before the posting, verifications
+        # without postings start at the same posting as the next one
+        return bisect.bisect_right(self._ver_first, post) - 1
+
+    def __iter__(self) -> Iterator["verification_module.Verification"]:
+        return (self.verification_at(idx) for idx in range(len(self)))
+
+    def find_verification_index(self, id: int) -> int | None:
+        idx = bisect.bisect_left(self._ver_id, id)
+        if idx < len(self._ver_id) and self._ver_id[idx] == id:
+            return idx
+        return None
+
+    @property
+    def account_numbers(self) -> memoryview:
+        """Numbers of the accounts with postings, sorted."""
+        return self._acc_numbers
+
+    def account_postings(self, account_number: int) -> memoryview:
+        """Indexes of the postings on the account, in journal order."""
+        idx = bisect.bisect_left(self._acc_numbers, account_number)
+        if idx < len(self._acc_numbers) and self._acc_numbers[idx] == account_number:
+            return self._acc_postings[self._acc_first[idx]:self._acc_first[idx + 1]]
+        return self._acc_postings[0:0]
+
+    def account_posting_count(self, account_number: int) -> int:
+        return len(self.account_postings(account_number))
+
+    def account_movement(self, account_number: int, start: datetime.date | None = None, end: datetime.date | None = None) -> float:
+        """Movement (debit - credit) of the account, optionally within the dates (inclusive)."""
+        postings = self.account_postings(account_number)
+        if start is None and end is None:
+            return sum(self._post_amount[post] for post in postings) / 100
+        first = start.toordinal() if start is not None else 0
+        last = end.toordinal() if end is not None else sys.maxsize
+        return sum(self._post_amount[post] for post in postings if first <= self._post_date[post] <= last) / 100
+
+    def movements(self) -> dict[int, float]:
+        """Year-end movement (debit - credit) per account number."""
+        return {acc_num: self.account_movement(acc_num) for acc_num in self._acc_numbers}
+
+
+def open_binary_journal(year: int, journal_hash: str) -> BinaryJournal | None:
+    """The binary journal of the year, if there is one matching the journal hash."""
+    path = binary_journal_path(year)
+    if not path.exists():
+        return None
+    try:
+        journal = BinaryJournal(path)
+    except (ValueError, struct.error) as err:
+        print(f"Ignoring binary journal: {err}")
+        return None
+    if journal.journal_hash != journal_hash:
+        print(f"Binary journal for year {year} is stale, ignoring it")
+        journal.close()
+        return None
+    return journal
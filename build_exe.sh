@@ -48,6 +48,7 @@ pyinstaller -wF --name ALOPCounting.exe --distpath $dir main.py
 mkdir -p $dir/userdata
 cp build-bundles/base_accounts.json $dir/userdata/base_accounts.json
 cp config.toml $dir/config.toml
+cp kontoplan.txt $dir/kontoplan.txt
 
 cd $dir
 /c/Program/7-Zip/7z.exe a "../$name.zip" ./*
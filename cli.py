@@ -0,0 +1,312 @@
+import argparse
+import csv
+import datetime
+import sys
+
+from _version import __version__
+from account import account_list_init
+from config import config_do_git_commit, config_init
+from sie import SIE_ENCODING, import_sie, export_sie
+from export import LEDGER_FIELDS, export_csv, export_jsonl, ledger_rows
+from bank_import import BANK_ACCOUNT, MATCH_WINDOW_DAYS, import_bank_statement
+from year import Year, archive_year, year_init, year
+from year_archive import unarchive_year
+from report import create_balance_report, create_result_report, create_cost_unit_result_report, create_vat_report, create_monthly_result_report, create_comparison_result_report
+from vat import quarter_period
+from query import Query
+from transaction import Transaction
+from history import year_at
+from consistency import verify_ledger
+from recurring import INTERVAL_MONTHS, RecurringTemplate, add_recurring_template, generate_recurring, load_recurring_templates, remove_recurring_template
+from repo_maintenance import load_maintenance_state, repo_stats, run_maintenance
+from memory_report import memory_report
+from verification import verification_list_init, verification_lists_years
+
+
+def cli_init() -> bool:
+    if not config_init():
+        print("Failed to load or create config!")
+        return False
+    account_list_init()
+    verification_list_init()
+    year_init()
+    return True
+
+
+def cmd_import_sie(args: argparse.Namespace) -> int:
+    try:
+        import_sie(args.file, encoding=args.encoding)
+    except ValueError as err:
+        print(err)
+        return 1
+    return 0
+
+
+def cmd_import_bank(args: argparse.Namespace) -> int:
+    try:
+        import_bank_statement(args.file, args.year or year().year, args.counter_account, args.account, args.days)
+    except ValueError as err:
+        print(err)
+        return 1
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    years = args.year or None
+    if args.format == "sie":
+        export_sie(args.out, years)
+    elif args.format == "csv":
+        export_csv(args.out, years)
+    else:
+        export_jsonl(args.out, years)
+    return 0
+
+
+def cmd_report(args: argparse.Namespace) -> int:
+    if args.at:
+        try:
+            report_year = year_at(args.at, args.year or year().year)
+        except ValueError as err:
+            print(err)
+            return 1
+    else:
+        report_year = Year(args.year or year().year)
+    start_date, end_date = quarter_period(report_year.year, args.quarter) if args.quarter else (None, None)
+    if args.report == "balance":
+        create_balance_report(args.out, report_year, start_date, end_date)
+    elif args.report == "result":
+        create_result_report(args.out, report_year, start_date, end_date)
+    elif args.report == "cost-units":
+        create_cost_unit_result_report(args.out, report_year)
+    elif args.report == "monthly":
+        create_monthly_result_report(args.out, report_year)
+    elif args.report == "comparison":
+        create_comparison_result_report(args.out, report_year)
+    else:
+        create_vat_report(args.out, report_year, start_date, end_date)
+    print(f"Report written to: {args.out}")
+    return 0
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    num_matches = 0
+    for search_year in args.year or verification_lists_years():
+        for _, ver in Query().years(search_year).text(args.query).verifications():
+            print(f"{search_year}  {ver.id:>6}  {ver.date}  {ver.notes}")
+            num_matches += 1
+    print(f"{num_matches} matching verifications")
+    return 0
+
+
+def cmd_query(args: argparse.Namespace) -> int:
+    query = Query()
+    if args.year:
+        query = query.years(*args.year)
+    if args.start or args.end:
+        query = query.dates(args.start, args.end)
+    if args.account:
+        query = query.accounts(*args.account)
+    if args.min_amount is not None or args.max_amount is not None:
+        query = query.amount(args.min_amount, args.max_amount)
+    if args.discarded is not None:
+        query = query.discarded(args.discarded == "yes")
+    if args.text:
+        query = query.text(args.text)
+    if args.sum:
+        print(query.sum())
+        return 0
+    if args.out is None:
+        print("An output CSV file is needed, unless --sum is given")
+        return 1
+    num_rows = 0
+    with open(args.out, "w", encoding="utf-8", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=LEDGER_FIELDS)
+        writer.writeheader()
+        for row in ledger_rows(query=query):
+            writer.writerow(row)
+            num_rows += 1
+    print(f"Wrote {num_rows} postings to: {args.out}")
+    return 0
+
+
+def cmd_verify(args: argparse.Namespace) -> int:
+    findings = verify_ledger(args.year or None, args.jobs)
+    for finding in findings:
+        print(finding)
+    return 1 if findings else 0
+
+
+def cmd_memory(args: argparse.Namespace) -> int:
+    print(memory_report(args.year or None))
+    return 0
+
+
+def cmd_archive(args: argparse.Namespace) -> int:
+    try:
+        archive_year(args.year)
+    except ValueError as err:
+        print(err)
+        return 1
+    config_do_git_commit(f"Archive year {args.year}")
+    return 0
+
+
+def cmd_unarchive(args: argparse.Namespace) -> int:
+    try:
+        unarchive_year(args.year)
+    except ValueError as err:
+        print(err)
+        return 1
+    config_do_git_commit(f"Unarchive year {args.year}")
+    return 0
+
+
+def _parse_recurring_row(value: str) -> Transaction:
+    # ACCOUNT:AMOUNT[:NOTES], debit if positive, credit if negative
+    parts = value.split(":", 2)
+    if len(parts) < 2:
+        raise argparse.ArgumentTypeError(f"expected ACCOUNT:AMOUNT, got '{value}'")
+    amount = round(float(parts[1].replace(",", ".")), ndigits=2)
+    return Transaction(int(parts[0]), max(amount, 0.0), max(-amount, 0.0), parts[2] if len(parts) > 2 else "")
+
+
+def cmd_recurring(args: argparse.Namespace) -> int:
+    try:
+        if args.action == "list":
+            for template in load_recurring_templates():
+                rows = ", ".join(f"{trans.account_number}:{trans.debit - trans.credit:g}" for trans in template.transactions)
+                print(f"{template.name}: {template.interval} on day {template.day} from {template.start}"
+                      f"{f' to {template.end}' if template.end else ''}, last {template.last_generated or 'never'}: {rows}")
+        elif args.action == "add":
+            if not args.name or not args.start or not args.row:
+                print("add needs --name, --start and --row")
+                return 1
+            add_recurring_template(RecurringTemplate(args.name, args.start, args.row, args.notes or "", args.interval,
+                                                     args.day or args.start.day, args.end))
+            config_do_git_commit(f"Recurring - add template {args.name}")
+        elif args.action == "remove":
+            if not args.name:
+                print("remove needs --name")
+                return 1
+            remove_recurring_template(args.name)
+            config_do_git_commit(f"Recurring - remove template {args.name}")
+        else:
+            print(f"Created {generate_recurring(args.until or datetime.date.today())} verifications")
+    except ValueError as err:
+        print(err)
+        return 1
+    return 0
+
+
+def cmd_maintenance(args: argparse.Namespace) -> int:
+    if args.stats:
+        for stats in load_maintenance_state().stats:
+            print(f"{datetime.datetime.fromtimestamp(stats.time):%Y-%m-%d %H:%M} {stats}")
+        print(f"Now: {repo_stats()}")
+        return 0
+    run_maintenance(force=True, squash_days=args.squash_older_than)
+    return 0
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="ALOPCounting command line interface")
+    parser.add_argument("--version", action="version", version=__version__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_sie_parser = subparsers.add_parser("import-sie", help="import accounts, incoming balances and verifications from a SIE4 file")
+    import_sie_parser.add_argument("file", help="SIE4 file to import")
+    import_sie_parser.add_argument("--encoding", default=SIE_ENCODING, help=f"file encoding (default: {SIE_ENCODING})")
+    import_sie_parser.set_defaults(func=cmd_import_sie)
+
+    import_bank_parser = subparsers.add_parser("import-bank", help="create verifications for the new lines of a bank statement CSV file")
+    import_bank_parser.add_argument("file", help="bank statement CSV file with date, text and amount columns")
+    import_bank_parser.add_argument("--year", type=int, help="year to import into (default: last year)")
+    import_bank_parser.add_argument("--account", type=int, default=BANK_ACCOUNT, help=f"bank account (default: {BANK_ACCOUNT})")
+    import_bank_parser.add_argument("--counter-account", type=int, required=True, help="account for the balancing row, e.g. a suspense account")
+    import_bank_parser.add_argument("--days", type=int, default=MATCH_WINDOW_DAYS, help=f"date window when matching existing postings (default: {MATCH_WINDOW_DAYS})")
+    import_bank_parser.set_defaults(func=cmd_import_bank)
+
+    export_parser = subparsers.add_parser("export", help="export the ledger as SIE4 (one file per year), CSV or JSON lines")
+    export_parser.add_argument("format", choices=["sie", "csv", "jsonl"])
+    export_parser.add_argument("out", help="output directory for sie, output file for csv and jsonl")
+    export_parser.add_argument("--year", type=int, action="append", help="year to export, can be repeated (default: all years)")
+    export_parser.set_defaults(func=cmd_export)
+
+    search_parser = subparsers.add_parser("search", help="search verifications on notes, account numbers and amounts")
+    search_parser.add_argument("query", help="words, account numbers or amounts, all must match")
+    search_parser.add_argument("--year", type=int, action="append", help="year to search, can be repeated (default: all years)")
+    search_parser.set_defaults(func=cmd_search)
+
+    query_parser = subparsers.add_parser("query", help="write postings to a CSV file, or print their sum, filtered on year, date, account, amount and text")
+    query_parser.add_argument("out", nargs="?", help="output CSV file, not needed with --sum")
+    query_parser.add_argument("--year", type=int, nargs="+", metavar=("FIRST", "LAST"), help="year or year range")
+    query_parser.add_argument("--start", type=datetime.date.fromisoformat, help="first date, YYYY-MM-DD")
+    query_parser.add_argument("--end", type=datetime.date.fromisoformat, help="last date, YYYY-MM-DD")
+    query_parser.add_argument("--account", type=int, nargs="+", metavar=("FIRST", "LAST"), help="account or account range")
+    query_parser.add_argument("--min-amount", type=float)
+    query_parser.add_argument("--max-amount", type=float)
+    query_parser.add_argument("--discarded", choices=["yes", "no"], help="only discarded or only not discarded verifications")
+    query_parser.add_argument("--text", help="words, account numbers or amounts in the verification")
+    query_parser.add_argument("--sum", action="store_true", help="print the sum of debit - credit instead of the postings")
+    query_parser.set_defaults(func=cmd_query)
+
+    report_parser = subparsers.add_parser("report", help="create a html report")
+    report_parser.add_argument("report", choices=["balance", "result", "cost-units", "vat", "monthly", "comparison"])
+    report_parser.add_argument("out", help="output html file")
+    report_parser.add_argument("--year", type=int, help="year of the report (default: last year)")
+    report_parser.add_argument("--quarter", type=int, choices=[1, 2, 3, 4], help="report only this quarter of the year")
+    report_parser.add_argument("--at", help="report the ledger as it was at a git commit of the userdata, or at the end of a date YYYY-MM-DD")
+    report_parser.set_defaults(func=cmd_report)
+
+    verify_parser = subparsers.add_parser("verify", help="check the ledger for consistency, exits with 1 if anything was found")
+    verify_parser.add_argument("--year", type=int, action="append", help="year to check, can be repeated (default: all years)")
+    verify_parser.add_argument("--jobs", type=int, help="number of worker processes (default: number of CPUs)")
+    # Reads the files itself, without loading the ledger
+    verify_parser.set_defaults(func=cmd_verify, load_ledger=False)
+
+    memory_parser = subparsers.add_parser("memory", help="show memory use per year and structure")
+    memory_parser.add_argument("--year", type=int, action="append", help="year to show, can be repeated (default: all years)")
+    memory_parser.set_defaults(func=cmd_memory)
+
+    archive_parser = subparsers.add_parser("archive", help="pack a closed year into one compressed file in the userdata dir")
+    archive_parser.add_argument("year", type=int)
+    archive_parser.set_defaults(func=cmd_archive)
+
+    unarchive_parser = subparsers.add_parser("unarchive", help="restore the directory of an archived year")
+    unarchive_parser.add_argument("year", type=int)
+    unarchive_parser.set_defaults(func=cmd_unarchive)
+
+    recurring_parser = subparsers.add_parser("recurring", help="list, add and remove recurring verification templates, or generate the due verifications")
+    recurring_parser.add_argument("action", choices=["list", "add", "remove", "generate"])
+    recurring_parser.add_argument("--name", help="template name (add, remove)")
+    recurring_parser.add_argument("--start", type=datetime.date.fromisoformat, help="first date, YYYY-MM-DD (add)")
+    recurring_parser.add_argument("--end", type=datetime.date.fromisoformat, help="last date, YYYY-MM-DD (add, default: no end)")
+    recurring_parser.add_argument("--interval", choices=list(INTERVAL_MONTHS), default="monthly", help="(add, default: monthly)")
+    recurring_parser.add_argument("--day", type=int, help="day of month (add, default: day of --start)")
+    recurring_parser.add_argument("--row", type=_parse_recurring_row, action="append", help="ACCOUNT:AMOUNT[:NOTES], positive for debit, can be repeated (add)")
+    recurring_parser.add_argument("--notes", help="verification notes (add, default: the name)")
+    recurring_parser.add_argument("--until", type=datetime.date.fromisoformat, help="generate up to this date, YYYY-MM-DD (default: today)")
+    recurring_parser.set_defaults(func=cmd_recurring)
+
+    maintenance_parser = subparsers.add_parser("maintenance", help="gc the userdata git repository, optionally squashing old STARTUP/EXIT commits")
+    maintenance_parser.add_argument("--squash-older-than", type=int, metavar="DAYS", help="squash runs of STARTUP/EXIT commits older than this (default: as configured)")
+    maintenance_parser.add_argument("--stats", action="store_true", help="only show the size of the repository over time")
+    maintenance_parser.set_defaults(func=cmd_maintenance, load_ledger=False)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = create_parser().parse_args(argv)
+    print(f"Running ALOPCounting CLI, version: {__version__}")
+    if getattr(args, "load_ledger", True):
+        if not cli_init():
+            return 1
+    elif not config_init():
+        print("Failed to load or create config!")
+        return 1
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import dataclasses as dc
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterable
+
+from atomic_write import atomic_write_files
+from config import config_get_closing_path
+from dataclass_json import dataclass_json_dumps, dataclass_json_loads
+
+
+@dc.dataclass
+class ClosingSnapshot:
+    year: int
+    journal_hash: str
+    num_verifications: int
+    # Year-end movement (debit - credit) and closing balance per account number
+    movements: dict[int, float] = dc.field(default_factory=dict)
+    closing_balances: dict[int, float] = dc.field(default_factory=dict)
+    # Size and modification time in ns per verification file when the journal
+    # was hashed, the files are only hashed again when these no longer match
+    files: dict[str, list[int]] = dc.field(default_factory=dict)
+
+    def __post_init__(self):
+        # JSON object keys are always strings
+        self.movements = {int(k): v for k, v in self.movements.items()}
+        self.closing_balances = {int(k): v for k, v in self.closing_balances.items()}
+
+
+def journal_hash_of_files(files: Iterable[tuple[str, bytes]]) -> str:
+    """Content hash of verification files given as (name, content), ordered on name."""
+    digest = hashlib.sha256()
+    for name, content in files:
+        digest.update(name.encode("utf-8"))
+        digest.update(content)
+    return digest.hexdigest()
+
+
+def journal_hash(verifications_dir: str | Path) -> str:
+    """Content hash of all verification files in a year directory."""
+    dir = Path(verifications_dir)
+    if not dir.exists():
+        return journal_hash_of_files([])
+    # Sort on the name string, comparing Path objects is slow for large years
+    filepaths = sorted((p for p in dir.iterdir() if "verification" in p.name), key=lambda p: p.name)
+    return journal_hash_of_files((p.name, p.read_bytes()) for p in filepaths)
+
+
+def journal_manifest(verifications_dir: str | Path) -> dict[str, list[int]]:
+    """Size and modification time of all verification files in a year directory, without reading them."""
+    if not Path(verifications_dir).exists():
+        return {}
+    manifest = {}
+    with os.scandir(verifications_dir) as entries:
+        for entry in entries:
+            if "verification" in entry.name:
+                stat = entry.stat()
+                manifest[entry.name] = [stat.st_size, stat.st_mtime_ns]
+    return dict(sorted(manifest.items()))
+
+
+def load_closing_snapshot(year: int) -> ClosingSnapshot | None:
+    path = config_get_closing_path(year)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as closing_file:
+        return dataclass_json_loads(closing_file.read())
+
+
+def save_closing_snapshot(snapshot: ClosingSnapshot):
+    path = config_get_closing_path(snapshot.year)
+    print(f"Storing closing snapshot in file: {path.absolute()}")
+    atomic_write_files({path: dataclass_json_dumps(snapshot, indent=4)})
+
+
+def remove_closing_snapshot(year: int):
+    path = config_get_closing_path(year)
+    if path.exists():
+        path.unlink()
+
+
+def closing_snapshot_is_stale(snapshot: ClosingSnapshot, verifications_dir: str | Path) -> bool:
+    manifest = journal_manifest(verifications_dir)
+    if manifest == snapshot.files:
+        return False
+    # Touched or from before the manifest, only the content tells
+    if snapshot.journal_hash != journal_hash(verifications_dir):
+        return True
+    print(f"Verification files for year {snapshot.year} touched but unchanged, updating the closing snapshot")
+    snapshot.files = manifest
+    save_closing_snapshot(snapshot)
+    return False
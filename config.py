@@ -1,13 +1,20 @@
 from os import makedirs, PathLike
 from pathlib import Path
 from glob import iglob
+import time
 from typing import Iterator
 
 import tomlkit as toml
-from git import Repo
+from git import Actor, Repo
 from git.exc import InvalidGitRepositoryError
 
 CONFIG_FILENAME = "config.toml"
+CLOSING_FILENAME = "closing.json"
+RECURRING_FILENAME = "recurring.json"
+# Derived data in the userdata dir, not committed
+CACHE_DIRNAME = ".cache"
+# Archived years are stored as <year>.zip in the userdata dir
+ARCHIVE_SUFFIX = ".zip"
 
 DEFAULT_TOML_CONFIG: toml.TOMLDocument = toml.parse("""\
 [userdata]
@@ -29,6 +36,15 @@ def _is_git_repo(path: PathLike) -> bool:
     except InvalidGitRepositoryError:
         return False
 
+def _exclude_cache_dir_from_git(dir: Path):
+    exclude_path = Path(Repo(dir).git_dir) / "info" / "exclude"
+    pattern = f"/{CACHE_DIRNAME}/"
+    if exclude_path.exists() and pattern in exclude_path.read_text().splitlines():
+        return
+    exclude_path.parent.mkdir(exist_ok=True)
+    with open(exclude_path, "a") as exclude_file:
+        exclude_file.write(f"{pattern}\n")
+
 def config_init() -> bool:
     global _toml_config
     conf_path = Path(CONFIG_FILENAME)
@@ -83,9 +99,18 @@ def config_init() -> bool:
     if not _is_git_repo(dir):
         print(f"Creating git repo in userdata dir: {dir.absolute()}")
         repo = Repo.init(dir)
+    _exclude_cache_dir_from_git(dir)
 
     return config_do_git_commit("STARTUP - Add accounts and verifications")
 
+def config_get_userdata_dir() -> Path:
+    global _toml_config
+    return Path(_toml_config["userdata"]["userdata_storage_path"].value)
+
+def config_get_accounts_filename() -> str:
+    global _toml_config
+    return _toml_config["userdata"]["accounts_filename"].value
+
 def config_get_accounts_iterator() -> Iterator[str]:
     global _toml_config
     return iglob(_toml_config["userdata"]["userdata_storage_path"].value + "/**/" + _toml_config["userdata"]["accounts_filename"].value)
@@ -106,6 +131,27 @@ def config_get_verifications_dir_path(year: int) -> Path:
     global _toml_config
     return Path(_toml_config["userdata"]["userdata_storage_path"].value) / Path(str(year))
 
+def config_get_closing_path(year: int) -> Path:
+    return config_get_verifications_dir_path(year) / Path(CLOSING_FILENAME)
+
+def config_get_recurring_path() -> Path:
+    global _toml_config
+    return Path(_toml_config["userdata"]["userdata_storage_path"].value) / Path(RECURRING_FILENAME)
+
+def config_get_archive_path(year: int) -> Path:
+    global _toml_config
+    return Path(_toml_config["userdata"]["userdata_storage_path"].value) / Path(f"{year}{ARCHIVE_SUFFIX}")
+
+def config_get_archives_iterator() -> Iterator[str]:
+    global _toml_config
+    return iglob(_toml_config["userdata"]["userdata_storage_path"].value + f"/*{ARCHIVE_SUFFIX}")
+
+def config_get_cache_dir() -> Path:
+    global _toml_config
+    dir = Path(_toml_config["userdata"]["userdata_storage_path"].value) / Path(CACHE_DIRNAME)
+    dir.mkdir(exist_ok=True)
+    return dir
+
 def config_get_company_name() -> str:
     global _toml_config
     return _toml_config["info"]["company_name"].value
@@ -114,6 +160,12 @@ def config_get_company_number() -> str:
     global _toml_config
     return _toml_config["info"]["company_number"].value
 
+def config_get_squash_automatic_commits_days() -> int | None:
+    # Optional, no squashing unless set
+    global _toml_config
+    days = _toml_config.get("maintenance", {}).get("squash_automatic_commits_after_days")
+    return None if days is None else int(days)
+
 def config_do_git_commit(msg: str) -> bool:
     global _toml_config
     dir = Path(_toml_config["userdata"]["userdata_storage_path"].value)
@@ -123,8 +175,20 @@ def config_do_git_commit(msg: str) -> bool:
     else:
         repo = Repo(dir)
 
-    if repo.is_dirty() or repo.untracked_files:
+    if repo.is_dirty(untracked_files=True):
+        start = time.perf_counter()
         repo.git.add(all=True)
-        repo.index.commit(msg)
+        # Commit with the git executable, much faster than GitPython's index
+        # for large trees. Resolve the identity like GitPython does, as git
+        # refuses to commit without a configured user.
+        author = Actor.author(repo.config_reader())
+        committer = Actor.committer(repo.config_reader())
+        repo.git.commit(message=msg, no_verify=True, env={
+            "GIT_AUTHOR_NAME": author.name,
+            "GIT_AUTHOR_EMAIL": author.email,
+            "GIT_COMMITTER_NAME": committer.name,
+            "GIT_COMMITTER_EMAIL": committer.email,
+        })
+        print(f"Committed '{msg}' in {time.perf_counter() - start:.2f} s")
 
     return True
@@ -0,0 +1,201 @@
+import dataclasses as dc
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from account import Account, AccountList
+from balance import get_balance_from_movement
+from closing import journal_hash_of_files
+from config import config_get_accounts_filename, config_get_accounts_path, config_get_archive_path, config_get_verifications_dir_iterator, config_get_verifications_dir_path
+from dataclass_json import dataclass_json_loads
+from verification import Verification
+from year_archive import YearArchive, archived_years
+
+
+@dc.dataclass
+class Finding:
+    year: int
+    message: str
+    # None for findings about the whole year
+    verification_id: int | None = None
+
+    def __str__(self) -> str:
+        where = f"{self.year}" if self.verification_id is None else f"{self.year} ver {self.verification_id}"
+        return f"{where}: {self.message}"
+
+
+@dc.dataclass
+class YearCheck:
+    """Findings of one year, and what the next year needs to check its opening balances."""
+    year: int
+    findings: list[Finding] = dc.field(default_factory=list)
+    # Balance sheet accounts only, account number -> balance
+    incoming_balances: dict[int, float] = dc.field(default_factory=dict)
+    closing_balances: dict[int, float] = dc.field(default_factory=dict)
+
+
+@dc.dataclass
+class YearPaths:
+    """
+    Where a year is stored, resolved from the config before starting a
+    worker. Workers started with spawn (macOS, Windows) do not inherit the
+    loaded config, only the default one.
+    """
+    verifications_dir: str
+    accounts_path: str
+    # Name of the accounts file within an archive
+    accounts_filename: str
+    archive_path: str | None = None
+
+
+def _year_paths(year: int) -> YearPaths:
+    archive_path = config_get_archive_path(year)
+    return YearPaths(
+        verifications_dir=str(config_get_verifications_dir_path(year).absolute()),
+        accounts_path=str(config_get_accounts_path(year).absolute()),
+        accounts_filename=config_get_accounts_filename(),
+        archive_path=str(archive_path.absolute()) if archive_path.exists() else None,
+    )
+
+
+def _check_verifications(year: int, verifications: list[Verification], accounts: dict[int, Account], check: YearCheck):
+    movements: dict[int, float] = {}
+    seen_ids: set[int] = set()
+    for ver in verifications:
+        if ver.id in seen_ids:
+            check.findings.append(Finding(year, "duplicate verification id", ver.id))
+        seen_ids.add(ver.id)
+        if ver.date.year != year:
+            check.findings.append(Finding(year, f"date {ver.date} not in the year", ver.id))
+        if not ver.transactions:
+            check.findings.append(Finding(year, "no transactions", ver.id))
+        for trans in ver.transactions:
+            if trans.account_number not in accounts:
+                check.findings.append(Finding(year, f"unknown account {trans.account_number}", ver.id))
+            # Discarded verifications count in the balances, as in balance.py
+            movements[trans.account_number] = movements.get(trans.account_number, 0.0) + trans.debit - trans.credit
+        if not ver.discarded:
+            difference = round(sum(trans.debit - trans.credit for trans in ver.transactions), ndigits=2)
+            if difference != 0:
+                check.findings.append(Finding(year, f"not balanced, debit - credit is {difference}", ver.id))
+
+    if seen_ids:
+        missing = sorted(set(range(min(seen_ids), max(seen_ids) + 1)) - seen_ids)
+        if min(seen_ids) != 0:
+            check.findings.append(Finding(year, f"verification ids start at {min(seen_ids)}, not 0"))
+        if missing:
+            shown = ", ".join(map(str, missing[:10])) + (", ..." if len(missing) > 10 else "")
+            check.findings.append(Finding(year, f"{len(missing)} missing verification ids: {shown}"))
+
+    for acc in accounts.values():
+        if acc.is_asset or acc.is_debt:
+            check.incoming_balances[acc.account_number] = acc.incoming_balance
+            check.closing_balances[acc.account_number] = get_balance_from_movement(acc, movements.get(acc.account_number, 0.0))
+
+
+def _read_archive(year: int, archive_path: str, accounts_filename: str, check: YearCheck) -> tuple[list[Account], list[Verification]]:
+    archive = YearArchive(Path(archive_path))
+    try:
+        accounts_text = archive.read_text(accounts_filename)
+        if accounts_text is None:
+            check.findings.append(Finding(year, f"no accounts file in {archive_path}"))
+        accounts = [] if accounts_text is None else dataclass_json_loads(accounts_text)
+        verifications = []
+        for member in archive.index.verification_members:
+            try:
+                verifications.append(dataclass_json_loads(archive.read_text(member)))
+            except ValueError as err:
+                check.findings.append(Finding(year, f"unreadable verification file {member} in {archive_path}: {err}"))
+        if archive.index.journal_hash != journal_hash_of_files((name, archive.read_bytes(name)) for name in sorted(archive.index.files) if "verification" in name):
+            check.findings.append(Finding(year, f"archive {archive_path} does not match its index"))
+    finally:
+        archive.close()
+    return accounts, verifications
+
+
+def _read_dir(year: int, verifications_dir: str, accounts_path: str, check: YearCheck) -> tuple[list[Account], list[Verification]]:
+    accounts_filepath = Path(accounts_path)
+    if not accounts_filepath.exists():
+        check.findings.append(Finding(year, f"no accounts file {accounts_filepath}"))
+        accounts = []
+    else:
+        accounts = AccountList._parse_accounts_file(accounts_filepath)
+    verifications: list[Verification] = []
+    dir = Path(verifications_dir)
+    for filepath in dir.iterdir() if dir.exists() else []:
+        if "verification" not in filepath.name:
+            continue
+        try:
+            verifications.append(Verification.load_from_file(filepath))
+        except ValueError as err:
+            check.findings.append(Finding(year, f"unreadable verification file {filepath.name}: {err}"))
+    return accounts, verifications
+
+
+def check_year(year: int, paths: YearPaths) -> YearCheck:
+    """
+    Check one year as stored on disk, in its directory or its archive. Runs
+    in a worker process, so it reads the files itself instead of using the
+    loaded lists, and uses only the given paths, not the config.
+    """
+    check = YearCheck(year)
+    if paths.archive_path is not None:
+        accounts, verifications = _read_archive(year, paths.archive_path, paths.accounts_filename, check)
+    else:
+        accounts, verifications = _read_dir(year, paths.verifications_dir, paths.accounts_path, check)
+    accounts_by_number: dict[int, Account] = {}
+    for acc in accounts:
+        if acc.account_number in accounts_by_number:
+            check.findings.append(Finding(year, f"duplicate account {acc.account_number}"))
+        accounts_by_number[acc.account_number] = acc
+    verifications.sort()
+    _check_verifications(year, verifications, accounts_by_number, check)
+    return check
+
+
+def _check_opening_balances(previous: YearCheck, current: YearCheck) -> list[Finding]:
+    findings = []
+    for acc_num in sorted(previous.closing_balances.keys() | current.incoming_balances.keys()):
+        closing = previous.closing_balances.get(acc_num, 0.0)
+        opening = current.incoming_balances.get(acc_num, 0.0)
+        if round(closing - opening, ndigits=2) != 0:
+            findings.append(Finding(current.year, f"incoming balance {opening} of account {acc_num} is not the closing balance {closing} of {previous.year}"))
+    return findings
+
+
+def _ledger_years() -> list[int]:
+    # From the year dirs and archives on disk, a corrupt file must not stop the check
+    years = set(archived_years())
+    for dir in config_get_verifications_dir_iterator():
+        if Path(dir).is_dir() and Path(dir).name.isdigit():
+            years.add(int(Path(dir).name))
+    return sorted(years)
+
+
+def verify_ledger(years: list[int] | None = None, max_workers: int | None = None) -> list[Finding]:
+    """
+    Check the given (default: all) years as stored on disk, one worker
+    process per year: balanced verifications, known accounts, dates within
+    the year, unique and contiguous ids, and incoming balances equal to the
+    closing balances of the previous year. Returns all findings, ordered on
+    year.
+    """
+    all_years = _ledger_years()
+    years = all_years if years is None else sorted(years)
+    # The previous years are needed for the incoming balances
+    checked_years = sorted(set(years) | {all_years[all_years.index(y) - 1] for y in years if y in all_years and all_years.index(y) > 0})
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(check_year, y, _year_paths(y)) for y in checked_years]
+        checks = {future.result().year: future.result() for future in futures}
+
+    findings: list[Finding] = []
+    for y in years:
+        if y not in checks:
+            findings.append(Finding(y, "year not present"))
+            continue
+        findings += checks[y].findings
+        if y in all_years and all_years.index(y) > 0:
+            findings += _check_opening_balances(checks[all_years[all_years.index(y) - 1]], checks[y])
+    print(f"Checked {len(checked_years)} years in {time.perf_counter() - start:.2f} s, {len(findings)} findings")
+    return findings
@@ -0,0 +1,45 @@
+from verification import VerificationList
+
+
+class CostUnitIndex:
+    """
+    Debit and credit per (cost unit, account) of one year, built in a single
+    pass over the journal. Transactions without a cost unit are not included.
+    """
+    def __init__(self, verification_list: VerificationList):
+        self.year = verification_list.year
+        self.revision = verification_list.revision
+        self._totals: dict[str, dict[int, list[float]]] = {}
+        for ver in verification_list:
+            for trans in ver.transactions:
+                if not trans.cost_unit:
+                    continue
+                unit_totals = self._totals.setdefault(trans.cost_unit, {})
+                totals = unit_totals.get(trans.account_number)
+                if totals is None:
+                    totals = unit_totals[trans.account_number] = [0.0, 0.0]
+                totals[0] += trans.debit
+                totals[1] += trans.credit
+
+    def units(self) -> list[str]:
+        return sorted(self._totals)
+
+    def totals(self, unit: str) -> dict[int, tuple[float, float]]:
+        """(debit, credit) per account number for the cost unit."""
+        return {acc_num: (debit, credit) for acc_num, (debit, credit) in self._totals.get(unit, {}).items()}
+
+    def movements(self, unit: str) -> dict[int, float]:
+        """Movement (debit - credit) per account number for the cost unit."""
+        return {acc_num: debit - credit for acc_num, (debit, credit) in self._totals.get(unit, {}).items()}
+
+
+_cost_unit_indexes: dict[int, CostUnitIndex] = {}
+
+
+def cost_unit_index(verification_list: VerificationList) -> CostUnitIndex:
+    """Cost unit index for the year, rebuilt only when the journal changed."""
+    index = _cost_unit_indexes.get(verification_list.year)
+    if index is None or index.revision != verification_list.revision:
+        index = CostUnitIndex(verification_list)
+        _cost_unit_indexes[verification_list.year] = index
+    return index
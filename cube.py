@@ -0,0 +1,122 @@
+import dataclasses as dc
+from pathlib import Path
+
+from config import config_get_cache_dir
+from dataclass_json import dataclass_json_dumps, dataclass_json_loads
+from verification import Verification, VerificationList
+
+
+@dc.dataclass
+class MonthlyCube:
+    """
+    Debit and credit per (month, account) of one year. Kept up to date
+    incrementally from verification changes, and persisted for closed years
+    together with the journal hash of their closing snapshot.
+    """
+    year: int
+    journal_hash: str = ""
+    # "month:account" -> [debit, credit], string keys to be stored as JSON
+    cells: dict[str, list[float]] = dc.field(default_factory=dict)
+
+    def _apply(self, ver: Verification, factor: int):
+        for trans in ver.transactions:
+            key = f"{ver.date.month}:{trans.account_number}"
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = [0.0, 0.0]
+            cell[0] = round(cell[0] + factor * trans.debit, ndigits=2)
+            cell[1] = round(cell[1] + factor * trans.credit, ndigits=2)
+
+    def update(self, old: Verification | None, new: Verification | None):
+        if old is not None:
+            self._apply(old, -1)
+        if new is not None:
+            self._apply(new, 1)
+        self.journal_hash = ""
+
+    def accounts(self) -> list[int]:
+        return sorted({int(key.split(":")[1]) for key in self.cells})
+
+    def debit_credit(self, month: int, account_number: int) -> tuple[float, float]:
+        debit, credit = self.cells.get(f"{month}:{account_number}", (0.0, 0.0))
+        return debit, credit
+
+    def movement(self, month: int, account_number: int) -> float:
+        debit, credit = self.debit_credit(month, account_number)
+        return round(debit - credit, ndigits=2)
+
+    def monthly_movements(self, account_number: int) -> list[float]:
+        """Movement (debit - credit) for each month, January first."""
+        return [self.movement(month, account_number) for month in range(1, 13)]
+
+
+def _cube_path(year: int) -> Path:
+    return config_get_cache_dir() / f"cube_{year}.json"
+
+
+def save_monthly_cube(cube: MonthlyCube):
+    with open(_cube_path(cube.year), "w", encoding="utf-8") as cube_file:
+        cube_file.write(dataclass_json_dumps(cube))
+
+
+def _load_monthly_cube(year: int) -> MonthlyCube | None:
+    path = _cube_path(year)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as cube_file:
+        return dataclass_json_loads(cube_file.read())
+
+
+_cubes: dict[int, MonthlyCube] = {}
+# The list, and its revision, each cached cube follows. Another list of the
+# same year, e.g. the year at an earlier commit, gets its own cube.
+_cube_sources: dict[int, tuple[VerificationList, int]] = {}
+
+
+def _build_monthly_cube(verification_list: VerificationList) -> MonthlyCube:
+    cube = MonthlyCube(verification_list.year)
+    for ver in verification_list:
+        cube.update(None, ver)
+    return cube
+
+
+def _on_verification_changed(verification_list: VerificationList, old: Verification | None, new: Verification | None):
+    source = _cube_sources.get(verification_list.year)
+    if source is None or source[0] is not verification_list:
+        # The cube follows another list of the year, rebuilt when asked for
+        return
+    if old is None and new is None:
+        # The journal was reloaded
+        _cubes[verification_list.year] = _build_monthly_cube(verification_list)
+    else:
+        _cubes[verification_list.year].update(old, new)
+    _cube_sources[verification_list.year] = (verification_list, verification_list.revision)
+
+
+def monthly_cube(verification_list: VerificationList) -> MonthlyCube:
+    """
+    The monthly cube of a year. A closed year uses the persisted cube when it
+    matches the closing snapshot, without loading the journal. Otherwise the
+    cube is built once from the journal, and after that follows the changes.
+    """
+    year = verification_list.year
+    source = _cube_sources.get(year)
+    if source is not None and source[0] is verification_list and source[1] == verification_list.revision:
+        return _cubes[year]
+
+    cube = None
+    snapshot = verification_list.closing_snapshot
+    if snapshot is not None:
+        cube = _load_monthly_cube(year)
+        if cube is not None and cube.journal_hash != snapshot.journal_hash:
+            cube = None
+    if cube is None:
+        cube = _build_monthly_cube(verification_list)
+        if snapshot is not None:
+            cube.journal_hash = snapshot.journal_hash
+            save_monthly_cube(cube)
+
+    _cubes[year] = cube
+    _cube_sources[year] = (verification_list, verification_list.revision)
+    verification_list.add_change_listener(_on_verification_changed)
+    return cube
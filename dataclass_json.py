@@ -34,7 +34,64 @@ def _dataclass_object_load(d):
     except (ModuleNotFoundError, ValueError, AttributeError, TypeError):
         raise ValueError(f"Invalid dataclass reference {ref!r}") from None
 
+def _dumps_indented(obj: Any, indent: str, level: int, parts: list[str]):
+    # Same output as json.dumps(indent=...), but without the overhead of the
+    # pure-Python encoder json falls back to when indenting
+    if isinstance(obj, str):
+        parts.append(_encode_str(obj))
+    elif obj is None:
+        parts.append('null')
+    elif obj is True:
+        parts.append('true')
+    elif obj is False:
+        parts.append('false')
+    elif isinstance(obj, int):
+        parts.append(int.__repr__(obj))
+    elif isinstance(obj, float):
+        parts.append(_encode_float(obj))
+    elif isinstance(obj, (list, tuple)):
+        if not obj:
+            parts.append('[]')
+            return
+        newline = '\n' + indent * (level + 1)
+        parts.append('[')
+        for idx, item in enumerate(obj):
+            parts.append(newline if idx == 0 else ',' + newline)
+            _dumps_indented(item, indent, level + 1, parts)
+        parts.append('\n' + indent * level + ']')
+    elif isinstance(obj, dict):
+        if not obj:
+            parts.append('{}')
+            return
+        newline = '\n' + indent * (level + 1)
+        parts.append('{')
+        for idx, (key, value) in enumerate(obj.items()):
+            parts.append(newline if idx == 0 else ',' + newline)
+            parts.append(_encode_str(key if isinstance(key, str) else _encode_key(key)))
+            parts.append(': ')
+            _dumps_indented(value, indent, level + 1, parts)
+        parts.append('\n' + indent * level + '}')
+    else:
+        _dumps_indented(_dataclass_object_dump(obj), indent, level, parts)
+
+def _encode_key(key: Any) -> str:
+    # Non-string keys are converted the same way as by json
+    if isinstance(key, float):
+        return _encode_float(key)
+    return json.dumps(key)
+
+def _encode_float(value: float) -> str:
+    if value != value or value in (float('inf'), float('-inf')):
+        return json.dumps(value)
+    return float.__repr__(value)
+
+_encode_str = json.encoder.encode_basestring
+
 def dataclass_json_dumps(obj: Any, indent = 0) -> str:
+    if indent and isinstance(indent, int):
+        parts: list[str] = []
+        _dumps_indented(obj, ' ' * indent, 0, parts)
+        return ''.join(parts)
     return json.dumps(obj, default=_dataclass_object_dump, indent=indent, ensure_ascii=False)
 
 def dataclass_json_loads(obj: str) -> Any:
@@ -0,0 +1,107 @@
+import bisect
+import cProfile
+import os
+import re
+import time
+from pathlib import Path
+
+# Set to 1 to profile the GUI events
+PROFILE_ENV = "ALOPCOUNTING_PROFILE"
+# Events slower than this many ms get a cProfile dump, unset for no cProfile
+PROFILE_SLOW_MS_ENV = "ALOPCOUNTING_PROFILE_SLOW_MS"
+PROFILE_DIR = "profile"
+
+# Upper bounds in ms of the histogram buckets, the last bucket is unbounded
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000]
+
+# Row number in events like row3_delete, the rows are summed up together
+_ROW_REGEX = re.compile(r"row\d+")
+
+
+class EventStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, duration_ms)] += 1
+
+
+class EventProfiler:
+    """
+    Wall time per (window, event) of the GUI event loop, from the event
+    being read until the loop is back reading the next one, so updates of
+    the windows caused by the event are included.
+    """
+    def __init__(self, slow_ms: float | None = None, out_dir: str | Path = PROFILE_DIR):
+        self._slow_ms = slow_ms
+        self._out_dir = Path(out_dir)
+        self._stats: dict[tuple[str, str], EventStats] = {}
+        self._current: tuple[str, str] | None = None
+        self._start = 0.0
+        self._cprofile: cProfile.Profile | None = None
+        self._num_slow = 0
+
+    def start_event(self, window_name: str, event):
+        self.end_event()
+        self._current = (window_name, _ROW_REGEX.sub("rowN", str(event)))
+        if self._slow_ms is not None:
+            # Which event will be slow is not known up front, profile all
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._start = time.perf_counter()
+
+    def end_event(self):
+        if self._current is None:
+            return
+        duration_ms = (time.perf_counter() - self._start) * 1000
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            if duration_ms >= self._slow_ms:
+                self._dump_slow_event(duration_ms)
+            self._cprofile = None
+        self._stats.setdefault(self._current, EventStats()).add(duration_ms)
+        self._current = None
+
+    def _dump_slow_event(self, duration_ms: float):
+        self._out_dir.mkdir(exist_ok=True)
+        self._num_slow += 1
+        window_name, event = self._current
+        name = re.sub(r"\W+", "_", f"{self._num_slow:04}_{window_name}_{event}")
+        self._cprofile.dump_stats(self._out_dir / f"{name}.prof")
+        print(f"Slow event {window_name}/{event}: {duration_ms:.1f} ms, profile in {self._out_dir / name}.prof")
+
+    def summary(self) -> str:
+        bucket_names = [f"<{bound}" for bound in HISTOGRAM_BOUNDS_MS] + [f">={HISTOGRAM_BOUNDS_MS[-1]}"]
+        lines = [f"{'window':<40} {'event':<30} {'count':>6} {'total ms':>10} {'mean ms':>9} {'max ms':>9}  histogram (ms)"]
+        # Where the time went first
+        for (window_name, event), stats in sorted(self._stats.items(), key=lambda item: -item[1].total_ms):
+            histogram = " ".join(f"{name}:{count}" for name, count in zip(bucket_names, stats.histogram) if count)
+            lines.append(f"{window_name[:40]:<40} {event[:30]:<30} {stats.count:>6} {stats.total_ms:>10.1f} "
+                         f"{stats.total_ms / stats.count:>9.1f} {stats.max_ms:>9.1f}  {histogram}")
+        if self._num_slow:
+            lines.append(f"{self._num_slow} slow events profiled in {self._out_dir.absolute()}, read with: python -m pstats <file>")
+        return "\n".join(lines)
+
+    def write_summary(self):
+        self.end_event()
+        self._out_dir.mkdir(exist_ok=True)
+        summary = self.summary()
+        print(summary)
+        with open(self._out_dir / "events.txt", "w", encoding="utf-8") as summary_file:
+            summary_file.write(summary + "\n")
+        print(f"Event profile summary written to: {(self._out_dir / 'events.txt').absolute()}")
+
+
+def event_profiler_from_env() -> EventProfiler | None:
+    """An event profiler if enabled with the environment variables, else None."""
+    if os.environ.get(PROFILE_ENV, "") in ("", "0"):
+        return None
+    slow_ms = os.environ.get(PROFILE_SLOW_MS_ENV)
+    print(f"Profiling GUI events{f', cProfile of events slower than {slow_ms} ms' if slow_ms else ''}")
+    return EventProfiler(float(slow_ms) if slow_ms else None)
@@ -0,0 +1,69 @@
+import csv
+import json
+from pathlib import Path
+from typing import Iterator
+
+from account import account_list, account_lists_years
+from query import Posting, Query
+
+LEDGER_FIELDS = ["year", "verification", "date", "account", "account_description", "debit", "credit", "cost_unit", "notes", "verification_notes", "discarded"]
+
+
+def posting_row(posting: Posting, descriptions: dict[int, str]) -> dict:
+    ver = posting.verification
+    trans = posting.transaction
+    return {
+        "year": posting.year,
+        "verification": ver.id,
+        "date": ver.date.isoformat(),
+        "account": trans.account_number,
+        "account_description": descriptions.get(trans.account_number, ""),
+        "debit": trans.debit,
+        "credit": trans.credit,
+        "cost_unit": trans.cost_unit,
+        "notes": trans.notes,
+        "verification_notes": ver.notes,
+        "discarded": ver.discarded,
+    }
+
+
+def ledger_rows(years: list[int] | None = None, query: Query | None = None) -> Iterator[dict]:
+    """
+    One row per posting matching the query (default all), for the given
+    years (default all years) within the years of the query.
+    """
+    if years is None:
+        years = account_lists_years()
+    if query is None:
+        query = Query()
+    for year in years:
+        if query.first_year is not None and not query.first_year <= year <= query.last_year:
+            continue
+        descriptions = {acc.account_number: acc.description for acc in account_list(year)}
+        for posting in query.years(year):
+            yield posting_row(posting, descriptions)
+
+
+def export_csv(path: str | Path, years: list[int] | None = None) -> int:
+    print(f"Exporting ledger to CSV file: {Path(path).absolute()}")
+    num_rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=LEDGER_FIELDS)
+        writer.writeheader()
+        for row in ledger_rows(years):
+            writer.writerow(row)
+            num_rows += 1
+    print(f"Exported {num_rows} transactions")
+    return num_rows
+
+
+def export_jsonl(path: str | Path, years: list[int] | None = None) -> int:
+    print(f"Exporting ledger to JSON lines file: {Path(path).absolute()}")
+    num_rows = 0
+    with open(path, "w", encoding="utf-8") as jsonl_file:
+        for row in ledger_rows(years):
+            jsonl_file.write(json.dumps(row, ensure_ascii=False))
+            jsonl_file.write("\n")
+            num_rows += 1
+    print(f"Exported {num_rows} transactions")
+    return num_rows
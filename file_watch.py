@@ -0,0 +1,96 @@
+import dataclasses as dc
+import os
+from pathlib import Path
+from typing import Callable
+
+# (size, mtime_ns) of a file
+FileStamp = tuple[int, int]
+
+
+@dc.dataclass
+class FileChanges:
+    added: list[Path] = dc.field(default_factory=list)
+    modified: list[Path] = dc.field(default_factory=list)
+    removed: list[Path] = dc.field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+
+class FileWatcher:
+    """
+    Finds added, modified and removed files by polling their size and mtime.
+    Files written by the program itself are reported with note_file_written
+    and note_file_removed, so that only changes made by others are found.
+    """
+    def __init__(self, root: str | Path, match: Callable[[str], bool]):
+        self._root = Path(root)
+        self._match = match
+        self._stamps = self._scan()
+        _watchers.append(self)
+
+    def close(self):
+        _watchers.remove(self)
+
+    def _scan(self) -> dict[str, FileStamp]:
+        stamps: dict[str, FileStamp] = {}
+        if not self._root.is_dir():
+            return stamps
+        # The files are at most one directory level down, in the year dirs
+        with os.scandir(self._root) as root_entries:
+            for root_entry in root_entries:
+                if root_entry.is_file() and self._match(root_entry.name):
+                    stat = root_entry.stat()
+                    stamps[root_entry.path] = (stat.st_size, stat.st_mtime_ns)
+                elif root_entry.is_dir() and not root_entry.name.startswith("."):
+                    with os.scandir(root_entry.path) as entries:
+                        for entry in entries:
+                            if self._match(entry.name) and entry.is_file():
+                                stat = entry.stat()
+                                stamps[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return stamps
+
+    def poll(self) -> FileChanges:
+        stamps = self._scan()
+        changes = FileChanges()
+        for path, stamp in stamps.items():
+            old_stamp = self._stamps.get(path)
+            if old_stamp is None:
+                changes.added.append(Path(path))
+            elif old_stamp != stamp:
+                changes.modified.append(Path(path))
+        changes.removed = [Path(path) for path in self._stamps.keys() - stamps.keys()]
+        self._stamps = stamps
+        return changes
+
+    def _key(self, path: str | Path) -> str | None:
+        # Same form as the paths from the scan, None if not below the root
+        rel_path = os.path.relpath(path, self._root)
+        if rel_path.startswith(os.pardir) or not self._match(os.path.basename(rel_path)):
+            return None
+        return os.path.join(self._root, rel_path)
+
+    def _file_written(self, path: str | Path):
+        key = self._key(path)
+        if key is not None:
+            stat = os.stat(key)
+            self._stamps[key] = (stat.st_size, stat.st_mtime_ns)
+
+    def _file_removed(self, path: str | Path):
+        key = self._key(path)
+        if key is not None:
+            self._stamps.pop(key, None)
+
+
+_watchers: list[FileWatcher] = []
+
+
+def note_file_written(path: str | Path):
+    """Tell the watchers that the program itself wrote the file, it is not reported as changed."""
+    for watcher in _watchers:
+        watcher._file_written(path)
+
+
+def note_file_removed(path: str | Path):
+    for watcher in _watchers:
+        watcher._file_removed(path)
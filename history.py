@@ -0,0 +1,130 @@
+import datetime
+import io
+import subprocess
+import threading
+from pathlib import Path
+
+from account import AccountList
+from config import config_get_accounts_filename, config_get_archive_path, config_get_userdata_dir
+from dataclass_json import dataclass_json_loads
+from verification import VerificationList
+from year import Year
+from year_archive import YearArchive
+
+
+def _git(*args: str) -> str:
+    result = subprocess.run(["git", "-C", str(config_get_userdata_dir()), *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ValueError(f"git {' '.join(args)}: {result.stderr.strip()}")
+    return result.stdout
+
+
+def resolve_commit(at: str) -> str:
+    """
+    The commit of a revision (hash, branch, HEAD~3, ...) or a date, YYYY-MM-DD,
+    meaning the last commit before the end of that day.
+    """
+    try:
+        day = datetime.date.fromisoformat(at)
+    except ValueError:
+        return _git("rev-parse", "--verify", f"{at}^{{commit}}").strip()
+    commit = _git("rev-list", "-1", f"--before={day + datetime.timedelta(days=1)} 00:00", "HEAD").strip()
+    if not commit:
+        raise ValueError(f"No commit before the end of {day}")
+    return commit
+
+
+def commit_description(commit: str) -> str:
+    return _git("log", "-1", "--format=%h %ci %s", commit).strip()
+
+
+def read_blobs(object_ids: list[str]) -> list[bytes]:
+    """
+    Contents of the objects, read from the object database through one
+    'git cat-file --batch' process instead of one git call per object.
+    """
+    process = subprocess.Popen(["git", "-C", str(config_get_userdata_dir()), "cat-file", "--batch"],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    # Written from another thread, git blocks writing its output while the
+    # requests are still being written otherwise
+    def write_requests():
+        process.stdin.write("".join(f"{object_id}\n" for object_id in object_ids).encode("ascii"))
+        process.stdin.close()
+    writer = threading.Thread(target=write_requests)
+    writer.start()
+
+    blobs = []
+    for object_id in object_ids:
+        header = process.stdout.readline().split()
+        if len(header) != 3:
+            raise ValueError(f"Object {object_id} missing in the userdata repository")
+        blobs.append(process.stdout.read(int(header[2])))
+        # Each object is followed by a newline
+        process.stdout.read(1)
+    writer.join()
+    process.stdout.close()
+    process.wait()
+    return blobs
+
+
+def _tree_files(commit: str, path: str) -> dict[str, str]:
+    """File name -> object id of the files in the path at the commit."""
+    files = {}
+    for entry in _git("ls-tree", "-z", commit, path).split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        _, object_type, object_id = info.split()
+        if object_type == "blob":
+            files[Path(path).name] = object_id
+    return files
+
+
+class HistoricalYear(Year):
+    """
+    A year of the ledger as it was at a commit, read-only and not touching
+    the working tree. Works with the reports like the current year does.
+    """
+    def __init__(self, commit: str, year: int):
+        super().__init__(year)
+        self.commit = commit
+        files = _tree_files(commit, f"{year}/")
+        accounts_filename = config_get_accounts_filename()
+        archive_name = config_get_archive_path(year).name
+        if accounts_filename in files:
+            names = [name for name in files if "verification" in name]
+            blobs = read_blobs([files[accounts_filename]] + [files[name] for name in names])
+            accounts = dataclass_json_loads(blobs[0].decode("utf-8"))
+            verifications = [dataclass_json_loads(blob.decode("utf-8")) for blob in blobs[1:]]
+        else:
+            # Archived at the commit, or not there at all
+            archive_files = _tree_files(commit, archive_name)
+            if archive_name not in archive_files:
+                raise ValueError(f"No year {year} at commit {commit}")
+            archive = YearArchive(io.BytesIO(read_blobs([archive_files[archive_name]])[0]))
+            accounts = archive.load_accounts()
+            verifications = list(archive)
+            archive.close()
+        print(f"Read year {year} at {commit_description(commit)}: {len(accounts)} accounts, {len(verifications)} verifications")
+        self._account_list = AccountList(None, year, accounts=accounts)
+        self._verification_list = VerificationList(None, year, verifications=verifications)
+
+    def other_year(self, year: int) -> "HistoricalYear | None":
+        try:
+            return HistoricalYear(self.commit, year)
+        except ValueError:
+            return None
+
+    @property
+    def verification_list(self) -> VerificationList:
+        return self._verification_list
+
+    @property
+    def account_list(self) -> AccountList:
+        return self._account_list
+
+
+def year_at(at: str, year: int) -> HistoricalYear:
+    """The year as it was at a revision or date, see resolve_commit."""
+    return HistoricalYear(resolve_commit(at), year)
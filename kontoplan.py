@@ -0,0 +1,42 @@
+import re
+from pathlib import Path
+
+from account import Account, AccountIndex
+
+CHART_OF_ACCOUNTS_FILENAME = "kontoplan.txt"
+
+# One account per line: 1930, "Företagskonto/checkkonto/ affärskonto"
+_CHART_LINE_REGEX = re.compile(r'^\s*(?P<number>\d+)\s*,\s*"(?P<description>.*)"\s*$')
+
+
+def load_chart_of_accounts(filepath: str | Path) -> list[Account]:
+    filepath = Path(filepath)
+    print(f"Loading chart of accounts from: {filepath.absolute()}")
+    accounts: list[Account] = []
+    with open(filepath, "r", encoding="utf-8") as chart_file:
+        for line_num, line in enumerate(chart_file, start=1):
+            if not line.strip():
+                continue
+            match = _CHART_LINE_REGEX.match(line)
+            if not match:
+                print(f"Bad line {line_num} in chart of accounts, ignoring: {line.strip()}")
+                continue
+            accounts.append(Account(int(match.group("number")), match.group("description")))
+    print(f"Loaded {len(accounts)} accounts from chart of accounts")
+    return accounts
+
+
+_chart_of_accounts: AccountIndex | None = None
+
+
+def chart_of_accounts() -> AccountIndex:
+    """The chart of accounts (BAS kontoplan), loaded and indexed on first use."""
+    global _chart_of_accounts
+    if _chart_of_accounts is None:
+        chart_path = Path(CHART_OF_ACCOUNTS_FILENAME)
+        if chart_path.exists():
+            _chart_of_accounts = AccountIndex(load_chart_of_accounts(chart_path))
+        else:
+            print(f"No chart of accounts file '{chart_path.absolute()}'")
+            _chart_of_accounts = AccountIndex([])
+    return _chart_of_accounts
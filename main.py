@@ -1,19 +1,33 @@
 
+import bisect
+import copy
+import multiprocessing
 import re
 from typing import Any
 import webbrowser
-from account import Account, account_list_init
+from account import Account, MAX_SEARCH_MATCHES, account_list_init
 from transaction import Transaction
 from verification import Verification, verification_list_init
-from balance import account_has_transactions, get_transactions_for_account, get_balance_for_account, get_balance_from_transactions
+from balance import account_has_transactions, get_account_postings, get_balance_for_account
+from kontoplan import chart_of_accounts
 from config import config_init, config_do_git_commit, config_get_company_name, config_get_company_number
-from year import year_init, year
+from year import year_init, year, roll_forward_incoming_balances, close_year
 import PySimpleGUI as sg
 import pprint
 import dataclasses as dc
 from _version import __version__
 from datetime import date
-from report import create_balance_report, create_result_report
+from report import create_balance_report, create_result_report, create_cost_unit_result_report, create_vat_report, create_monthly_result_report, create_comparison_result_report
+from vat import quarter_period
+from search import search_index
+from sie import import_sie
+from bank_import import import_bank_statement
+from recurring import generate_recurring
+from consistency import verify_ledger
+from memory_report import memory_report
+from repo_maintenance import BackgroundMaintenance
+from event_profiler import EventProfiler, event_profiler_from_env
+from userdata_watch import UserdataWatcher, USERDATA_POLL_INTERVAL_MS
 
 @dc.dataclass
 class ColInfo:
@@ -26,9 +40,11 @@ COLS = {
     "des": ColInfo("Description", (30, 1)),
     "deb": ColInfo("Debit", (10, 1)),
     "cre": ColInfo("Credit", (10, 1)),
+    "cu": ColInfo("Cost unit", (10, 1)),
     "not": ColInfo("Notes", (50, 1)),
 }
 MAX_ROWS = 20
+TRANS_PAGE_SIZE = 50
 
 
 def populate_verification_layout(window: sg.Window, current_ver_idx: int):
@@ -54,9 +70,11 @@ def populate_verification_layout(window: sg.Window, current_ver_idx: int):
 
     for i, trans in enumerate(ver.transactions):
         window[f"row{i}_acc"].update(trans.account_number)
-        window[f"row{i}_des"].update(year().account_list.find_account(trans.account_number).description)
+        acc = year().account_list.find_account(trans.account_number)
+        window[f"row{i}_des"].update(acc.description if acc else "UNKNOWN ACCOUNT")
         window[f"row{i}_deb"].update(trans.debit)
         window[f"row{i}_cre"].update(trans.credit)
+        window[f"row{i}_cu"].update(trans.cost_unit)
         window[f"row{i}_not"].update(trans.notes)
 
     tot_deb = 0
@@ -68,21 +86,41 @@ def populate_verification_layout(window: sg.Window, current_ver_idx: int):
     window["accumulate_diff"].update(diff)
 
 
-def get_transactions_from_layout(values: dict[str: str]) -> list[Transaction] | None:
+def get_transactions_from_layout(values: dict[str: str], add_accounts: bool = False) -> list[Transaction] | None:
+    """
+    Accounts not used this year are added from the chart of accounts only
+    with add_accounts, otherwise the layout does not give transactions.
+    """
     rows_dict = {row: {k: v for k, v in values.items() if f"row{row}_" in k} for row in range(MAX_ROWS)}
     new_transes = []
+    # Added to the year once all rows are valid
+    new_accounts: dict[int, Account] = {}
     for row, vals in rows_dict.items():
-        if not vals[f"row{row}_acc"]:
+        # Type-ahead entries are shown as "number  description"
+        acc_parts = str(vals[f"row{row}_acc"] or "").split()
+        if not acc_parts:
             continue
 
         debit = 0.0
         credit = 0.0
 
-        acc_val = vals[f"row{row}_acc"]
-        acc = year().account_list.find_account(acc_val)
-        if not acc:
-            sg.popup(f"Row {row}: No account with number '{acc_val}'!")
+        acc_val = acc_parts[0]
+        if not acc_val.isdigit():
+            sg.popup(f"Row {row}: Bad account '{acc_val}', not a number!")
             return None
+        acc = year().account_list.find_account(acc_val) or new_accounts.get(int(acc_val))
+        if not acc:
+            chart_acc = chart_of_accounts().find_account(acc_val)
+            if chart_acc is None:
+                sg.popup(f"Row {row}: No account with number '{acc_val}'!")
+                return None
+            if not add_accounts:
+                return None
+            ok = sg.popup_ok_cancel(f"Row {row}: Account {chart_acc.account_number} '{chart_acc.description}' not used this year, add it from the chart of accounts?")
+            if ok != "OK":
+                return None
+            acc = Account(chart_acc.account_number, chart_acc.description)
+            new_accounts[acc.account_number] = acc
         try:
             debit = round(float(str(vals[f"row{row}_deb"]).replace(",", ".")), ndigits=2)
         except ValueError:
@@ -100,13 +138,17 @@ def get_transactions_from_layout(values: dict[str: str]) -> list[Transaction] |
             sg.popup(f"Row {row}: Both kredit and debet cannot be set!")
             return None
 
-        new_transes.append(Transaction(acc.account_number, debit, credit, vals[f"row{row}_not"]))
+        new_transes.append(Transaction(acc.account_number, debit, credit, vals[f"row{row}_not"], str(vals[f"row{row}_cu"]).strip()))
 
+    if new_accounts:
+        for acc in new_accounts.values():
+            year().account_list.add_account(acc)
+        year().account_list.save_accounts()
     return new_transes
 
 
 def store_verification_from_layout(verification: Verification, values: dict[str: str]) -> bool:
-    new_transes = get_transactions_from_layout(values)
+    new_transes = get_transactions_from_layout(values, add_accounts=True)
     if new_transes is None:
         return False
     verification.transactions = new_transes
@@ -139,6 +181,7 @@ def get_column_layout() -> list[list[Any]]:
         sg.Text(COLS["des"].name, justification='left', size=COLS["des"].size[0], pad=(1,1), border_width=0,),
         sg.Text(COLS["deb"].name, justification='left', size=COLS["deb"].size[0] - 2, pad=(1,1), border_width=0,),
         sg.Text(COLS["cre"].name, justification='left', size=COLS["cre"].size[0] - 1, pad=(1,1), border_width=0,),
+        sg.Text(COLS["cu"].name, justification='left', size=COLS["cu"].size[0], pad=(1,1), border_width=0,),
         sg.Text(COLS["not"].name, justification='left', size=COLS["not"].size[0] - 4, pad=(1,1), border_width=0,),
         sg.Text("", size=(3, 0)),
     ], [sg.HorizontalSeparator()]])
@@ -152,11 +195,12 @@ def get_column_layout() -> list[list[Any]]:
             sg.Text(size=COLS["des"].size, pad=(1,1), border_width=0, justification='left', key=f"row{row}_des", background_color=color),
             sg.InputText(size=COLS["deb"].size, pad=(1,1), border_width=0, justification='right', key=f"row{row}_deb"),
             sg.InputText(size=COLS["cre"].size, pad=(1,1), border_width=0, justification='right', key=f"row{row}_cre"),
+            sg.InputText(size=COLS["cu"].size, pad=(1,1), border_width=0, justification='left', key=f"row{row}_cu"),
             sg.InputText(size=COLS["not"].size, pad=(1,1), border_width=0, justification='left', key=f"row{row}_not"),
             sg.Button("X", key=f"row{row}_delete", pad=(3, 0)),
         ]], background_color=color)]]
 
-    return [header], [sg.Column(column_layout, scrollable=True, vertical_scroll_only=True, size=(1000, 300), key="ver_col")]
+    return [header], [sg.Column(column_layout, scrollable=True, vertical_scroll_only=True, size=(1100, 300), key="ver_col")]
 
 
 def get_accumulation_layout() -> list[list[Any]]:
@@ -166,6 +210,7 @@ def get_accumulation_layout() -> list[list[Any]]:
         sg.Text("", justification='left', size=COLS["des"].size[0], pad=(1,1), border_width=0,),
         sg.Text("", key="accumulate_deb", justification='right', size=COLS["deb"].size[0] - 2, pad=(1,1), border_width=0,),
         sg.Text("", key="accumulate_cre", justification='right', size=COLS["cre"].size[0] - 1, pad=(1,1), border_width=0,),
+        sg.Text("", justification='left', size=COLS["cu"].size[0], pad=(1,1), border_width=0,),
         sg.Text("Diff:", justification='right', size=COLS["not"].size[0] - 4, pad=(1,1), border_width=0,),
         sg.Text("", size=(6, 1), justification="right", key="accumulate_diff"),
     ]]
@@ -198,7 +243,7 @@ def get_accounts_column_layout() -> list[list[Any]]:
     return [header], [sg.Column(column_layout, scrollable=True, vertical_scroll_only=True, size=(900, 400), key="acc_col")]
 
 
-def get_account_transactions_column_layout(account: Account) -> list[list[Any]]:
+def get_account_transactions_column_layout() -> list[list[Any]]:
     header = sg.Column([[
         sg.Text("", size=(4, 1)),
         sg.Text("Verification", justification='left', size=(15, 1), pad=(1,1), border_width=0,),
@@ -210,7 +255,6 @@ def get_account_transactions_column_layout(account: Account) -> list[list[Any]]:
     ], [sg.HorizontalSeparator()]])
 
     column_layout = []
-    balance = account.incoming_balance
     color = sg.theme_background_color()
     column_layout += [[sg.Column([[
         sg.Text("", size=(4, 1), background_color=color),
@@ -218,27 +262,50 @@ def get_account_transactions_column_layout(account: Account) -> list[list[Any]]:
         sg.Text("Incoming", justification='left', size=(15, 1), pad=(1,1), border_width=0, background_color=color),
         sg.Text("", justification='right', size=COLS["deb"].size[0], pad=(3,1), border_width=0, background_color=color),
         sg.Text("", justification='right', size=COLS["cre"].size[0], pad=(3,1), border_width=0, background_color=color),
-        sg.Text(balance, justification='right', size=(10, 1), pad=(1,1), border_width=0, background_color=color),
+        sg.Text("", justification='right', size=(10, 1), pad=(1,1), border_width=0, background_color=color, key="trans_incoming"),
         sg.Text("", size=(6, 1), background_color=color),
     ]], background_color=color)]]
 
-
-    for row, (trans, ver) in enumerate(get_transactions_for_account(account)):
-        balance += (trans.debit - trans.credit) * (-1 if account.is_debt or account.is_income else 1)
+    # Fixed number of rows, updated in place when paging
+    for row in range(TRANS_PAGE_SIZE):
         color = sg.theme_background_color() if row % 2 else alternative_background_color()
         column_layout += [[sg.Column([[
             sg.Text("", size=(4, 1), background_color=color),
-            sg.Text(ver.id, justification='left', size=(15, 1), pad=(1,1), border_width=0, background_color=color),
-            sg.Text(str(ver.date), justification='left', size=(15, 1), pad=(1,1), border_width=0, background_color=color),
-            sg.Text(trans.debit, justification='right', size=COLS["deb"].size[0], pad=(3,1), border_width=0, background_color=color),
-            sg.Text(trans.credit, justification='right', size=COLS["cre"].size[0], pad=(3,1), border_width=0, background_color=color),
-            sg.Text(balance, justification='right', size=(10, 1), pad=(1,1), border_width=0, background_color=color),
-            sg.Text("", size=(6, 1), background_color=color),
+            sg.Text("", justification='left', size=(15, 1), pad=(1,1), border_width=0, background_color=color, key=f"row{row}_trans_ver"),
+            sg.Text("", justification='left', size=(15, 1), pad=(1,1), border_width=0, background_color=color, key=f"row{row}_trans_date"),
+            sg.Text("", justification='right', size=COLS["deb"].size[0], pad=(3,1), border_width=0, background_color=color, key=f"row{row}_trans_deb"),
+            sg.Text("", justification='right', size=COLS["cre"].size[0], pad=(3,1), border_width=0, background_color=color, key=f"row{row}_trans_cre"),
+            sg.Text("", justification='right', size=(10, 1), pad=(1,1), border_width=0, background_color=color, key=f"row{row}_trans_bal"),
+            sg.Button("Go to", key=f"row{row}_trans_goto", pad=(6, 0)),
         ]], background_color=color)]]
 
     return [header], [sg.Column(column_layout, scrollable=True, vertical_scroll_only=True, size=(None, 400), key="trans_acc_col")]
 
 
+def populate_account_transactions_layout(window: sg.Window, account: Account, page: int):
+    postings = get_account_postings(account)
+    num_pages = max(1, -(-len(postings) // TRANS_PAGE_SIZE))
+    window["trans_acc_title"].update(f'Transactions for account: {account.account_number}')
+    window["trans_acc_desc"].update(account.description)
+    window["trans_page"].update(f"Page {page + 1} / {num_pages}  ({len(postings)} transactions)")
+    window["prev_page"].update(disabled=(page == 0))
+    window["next_page"].update(disabled=(page >= num_pages - 1))
+    window["trans_incoming"].update(account.incoming_balance)
+
+    rows = postings.page(account, year().verification_list, page * TRANS_PAGE_SIZE, TRANS_PAGE_SIZE)
+    for row in range(TRANS_PAGE_SIZE):
+        if row < len(rows):
+            _, ver, trans, balance = rows[row]
+            window[f"row{row}_trans_ver"].update(ver.id)
+            window[f"row{row}_trans_date"].update(str(ver.date))
+            window[f"row{row}_trans_deb"].update(trans.debit)
+            window[f"row{row}_trans_cre"].update(trans.credit)
+            window[f"row{row}_trans_bal"].update(balance)
+        else:
+            [window[f"row{row}_trans_{col}"].update("") for col in ("ver", "date", "deb", "cre", "bal")]
+        window[f"row{row}_trans_goto"].update(visible=(row < len(rows)))
+
+
 ROW_REGEX = re.compile(r'row(?P<row>\d+)_\w+')
 
 
@@ -251,7 +318,11 @@ def create_verifications_window() -> sg.Window:
             sg.Button('Prev', key='prev', pad=((10, 4), (2, 2))),
             sg.Button('Next', key='next', pad=(4, 2)),
             sg.VerticalSeparator(),
-            sg.Button('New verification', key='new_ver', pad=(4, 2))
+            sg.Button('New verification', key='new_ver', pad=(4, 2)),
+            sg.VerticalSeparator(),
+            sg.InputText(size=(30, 1), key='search_text', pad=((10, 4), (2, 2))),
+            sg.Button('Search', key='search', pad=(4, 2)),
+            sg.Text("", key="search_result", pad=(4, 2)),
         ],
         [sg.HorizontalSeparator()],
         [sg.Text("Verification:"), sg.Text("?", key="ver_id")],
@@ -269,7 +340,22 @@ def create_verifications_window() -> sg.Window:
         [sg.Column(get_accumulation_layout(), key="accumulation_col")],
     ]
 
-    return sg.Window('ALOPcounting Verifications', layout, size=(1000, 600), finalize=True, resizable=True)
+    window = sg.Window('ALOPcounting Verifications', layout, size=(1100, 600), finalize=True, resizable=True)
+    # Enter searches only in the search field, not in the rows
+    window["search_text"].bind("<Return>", "_enter")
+    for row in range(MAX_ROWS):
+        # Type-ahead search for accounts
+        window[f"row{row}_acc"].bind("<KeyRelease>", "_typed")
+    return window
+
+
+def account_type_ahead_values(query: str) -> list[str]:
+    """Matching accounts of the year first, then from the chart of accounts."""
+    matches = year().account_list.search(query, MAX_SEARCH_MATCHES)
+    if len(matches) < MAX_SEARCH_MATCHES:
+        numbers = {acc.account_number for acc in matches}
+        matches += [acc for acc in chart_of_accounts().search(query, MAX_SEARCH_MATCHES) if acc.account_number not in numbers]
+    return [f"{acc.account_number}  {acc.description}" for acc in matches[:MAX_SEARCH_MATCHES]]
 
 
 def create_accounts_window() -> sg.Window:
@@ -285,30 +371,43 @@ def create_accounts_window() -> sg.Window:
         [
             sg.Button('New account', key="new_acc", pad=((0, 4), (4, 4))),
             sg.Button('Recalculate incoming balance', key="recalc_incoming_balance", pad=((4, 4), (4, 4))),
-            sg.Button('Balance report', key="balance_report", pad=((4, 4), (4, 4))),
-            sg.Button('Result report', key="result_report", pad=((4, 4), (4, 4))),
+            sg.Button('Roll balances forward', key="roll_forward_balances", pad=((4, 4), (4, 4))),
             sg.Button('Quit', pad=((4, 4), (4, 4)))
         ],
+        [
+            sg.Button('Balance report', key="balance_report", pad=((0, 4), (4, 4))),
+            sg.Button('Result report', key="result_report", pad=((4, 4), (4, 4))),
+            sg.Button('Cost unit report', key="cost_unit_report", pad=((4, 4), (4, 4))),
+            sg.Button('VAT report', key="vat_report", pad=((4, 4), (4, 4))),
+            sg.Button('Monthly report', key="monthly_report", pad=((4, 4), (4, 4))),
+            sg.Button('Compare with last year', key="comparison_report", pad=((4, 4), (4, 4))),
+        ],
         get_accounts_column_layout(),
     ]
 
     return sg.Window('ALOPcounting Accounts', layout, size=(1000, 500), finalize=True, resizable=True)
 
 
-def create_account_transactions_window(account: Account) -> sg.Window:
+def create_account_transactions_window() -> sg.Window:
     sg.set_options(element_padding=(0, 0))
 
     layout = [
         [
-            sg.Text(f'Transactions for account: {account.account_number}', font='Any 18'),
+            sg.Text('', font='Any 18', key="trans_acc_title"),
         ],
         [sg.HorizontalSeparator()],
-        [sg.Text(account.description)],
-        [sg.Button('Quit', pad=((0, 4), (4, 4)))],
-        get_account_transactions_column_layout(account),
+        [sg.Text('', key="trans_acc_desc")],
+        [
+            sg.Button('Quit', pad=((0, 4), (4, 4))),
+            sg.VerticalSeparator(),
+            sg.Button('Prev page', key='prev_page', pad=((10, 4), (4, 4))),
+            sg.Button('Next page', key='next_page', pad=(4, 4)),
+            sg.Text('', key="trans_page", pad=(10, 0)),
+        ],
+        get_account_transactions_column_layout(),
     ]
 
-    return sg.Window('ALOPcounting Transactions for Account', layout, size=(600, 500), finalize=True, resizable=True)
+    return sg.Window('ALOPcounting Transactions for Account', layout, size=(700, 500), finalize=True, resizable=True)
 
 
 def create_main_window() -> sg.Window:
@@ -324,13 +423,19 @@ def create_main_window() -> sg.Window:
             sg.Button('Prev', key='prev_year', pad=((10, 4), (2, 2))),
             sg.Button('Next', key='next_year', pad=(4, 2)),
             sg.VerticalSeparator(),
-            sg.Button('New year', key='new_year', pad=(4, 2))
+            sg.Button('New year', key='new_year', pad=(4, 2)),
+            sg.VerticalSeparator(),
+            sg.Button('Close year', key='close_year', pad=(4, 2)),
         ],
         [sg.HorizontalSeparator()],
         [sg.Text("Number of verifications:"), sg.Text(year().verification_list.len, key="num_verifications")],
         [sg.Text("Number of accounts:"), sg.Text(year().account_list.len, key="num_accounts")],
         [sg.Button('Show accounts', size=(15, None))],
         [sg.Button('Show verifications', size=(15, None))],
+        [sg.Button('Import SIE', key='import_sie', size=(15, None))],
+        [sg.Button('Import bank', key='import_bank', size=(15, None))],
+        [sg.Button('Recurring', key='recurring', size=(15, None))],
+        [sg.Button('Memory use', key='memory_report', size=(15, None))],
         [sg.Text('')],
         [sg.Push(), sg.Button('Quit', size=(10, None))],
     ]
@@ -339,11 +444,13 @@ def create_main_window() -> sg.Window:
     return sg.Window('ALOPcounting Main', layout, finalize=True, resizable=True)
 
 
-def main_loop():
+def main_loop(userdata_watcher: UserdataWatcher, maintenance: BackgroundMaintenance, profiler: EventProfiler | None = None):
     main_window = create_main_window()
     accounts_window = None
     verifications_window = None
     account_transactions_window = None
+    trans_account = None
+    trans_page = 0
 
     current_ver_idx = 0
     ver_num_rows = 0
@@ -354,7 +461,8 @@ def main_loop():
         # Update values
         main_window["num_accounts"].update(year().account_list.len)
         main_window["num_verifications"].update(year().verification_list.len)
-        main_window["current_year"].update(year().year)
+        main_window["current_year"].update(f"{year().year} (closed)" if year().verification_list.year_closed else year().year)
+        main_window["close_year"].update("Open year" if year().verification_list.year_closed else "Close year")
         if year().verification_list.len:
             ver = year().verification_list.get_verification_at(current_ver_idx)
         else:
@@ -378,8 +486,43 @@ def main_loop():
                 verifications_window["discard_indicator"].update("")
                 verifications_window["discard_ver"].update("Discard verification")
 
-        # Read the event
-        window, event, values = sg.read_all_windows()
+        # Read the event, look for changes on disk when idle
+        if profiler is not None:
+            profiler.end_event()
+        window, event, values = sg.read_all_windows(timeout=USERDATA_POLL_INTERVAL_MS)
+        if profiler is not None:
+            profiler.start_event(window.Title if window is not None else "idle", event)
+        if event != sg.TIMEOUT_EVENT:
+            maintenance.activity()
+        if event == sg.TIMEOUT_EVENT:
+            maintenance.idle()
+            if year().year not in userdata_watcher.poll():
+                continue
+            if accounts_window is not None:
+                # Reopen window to repopulate
+                accounts_window.close()
+                accounts_window = create_accounts_window()
+            if account_transactions_window is not None:
+                trans_account = year().account_list.find_account(trans_account.account_number)
+                if trans_account is None:
+                    account_transactions_window.close()
+                    account_transactions_window = None
+                else:
+                    trans_page = 0
+                    populate_account_transactions_layout(account_transactions_window, trans_account, trans_page)
+            if verifications_window is not None and year().verification_list.len:
+                # Keep showing the same verification, and the unsaved edits
+                # of it unless it was changed on disk as well
+                ver_idx = year().verification_list.find_verification_index(ver.id)
+                if ver_idx is None:
+                    current_ver_idx = min(current_ver_idx, year().verification_list.len - 1)
+                    repopulate_ver = True
+                else:
+                    current_ver_idx = ver_idx
+                    if year().verification_list.get_verification_at(ver_idx) != ver:
+                        sg.popup(f"Verification {ver.id} was changed on disk, showing the new version")
+                        repopulate_ver = True
+            continue
         if window is None:
             sg.popup_error("read_all_windwos returned window == None ??!?")
             break
@@ -398,20 +541,75 @@ def main_loop():
             elif event == 'Show accounts' and accounts_window is None:
                 accounts_window = create_accounts_window()
             elif event == "prev_year":
-                if accounts_window is None and verifications_window is None:
+                if accounts_window is None and verifications_window is None and account_transactions_window is None:
                     year().goto_prev_year()
                 else:
-                    sg.popup("Close accounts and verifications windows first!")
+                    sg.popup("Close accounts, verifications and transactions windows first!")
             elif event == "next_year":
-                if accounts_window is None and verifications_window is None:
+                if accounts_window is None and verifications_window is None and account_transactions_window is None:
                     year().goto_next_year()
                 else:
-                    sg.popup("Close accounts and verifications windows first!")
+                    sg.popup("Close accounts, verifications and transactions windows first!")
+            elif event == "import_sie":
+                if accounts_window is None and verifications_window is None and account_transactions_window is None:
+                    sie_path = sg.popup_get_file("SIE4 file to import", file_types=(("SIE files", "*.se *.si *.sie"), ("All files", "*.*")))
+                    if sie_path:
+                        try:
+                            num_imported = import_sie(sie_path)
+                        except ValueError as err:
+                            sg.popup_error(f"Import failed!\n\n{err}")
+                            continue
+                        sg.popup(f"Imported {num_imported} verifications")
+                else:
+                    sg.popup("Close accounts, verifications and transactions windows first!")
+            elif event == "import_bank":
+                if accounts_window is None and verifications_window is None and account_transactions_window is None:
+                    bank_path = sg.popup_get_file("Bank statement CSV file to import", file_types=(("CSV files", "*.csv"), ("All files", "*.*")))
+                    counter_input = sg.popup_get_text("Counter account for the balancing rows, e.g. a suspense account") if bank_path else None
+                    if counter_input:
+                        if not counter_input.strip().isdigit():
+                            sg.popup(f"Bad account '{counter_input}', not a number!")
+                            continue
+                        try:
+                            num_imported = import_bank_statement(bank_path, year().year, int(counter_input.strip()))
+                        except ValueError as err:
+                            sg.popup_error(f"Import failed!\n\n{err}")
+                            continue
+                        sg.popup(f"Created {num_imported} verifications")
+                else:
+                    sg.popup("Close accounts, verifications and transactions windows first!")
+            elif event == "recurring":
+                if accounts_window is None and verifications_window is None and account_transactions_window is None:
+                    up_to = sg.popup_get_text("Create the recurring verifications due up to (YYYY-MM-DD)", default_text=str(date.today()))
+                    if up_to:
+                        try:
+                            num_created = generate_recurring(date.fromisoformat(up_to.strip()))
+                        except ValueError as err:
+                            sg.popup_error(f"No recurring verifications created!\n\n{err}")
+                            continue
+                        sg.popup(f"Created {num_created} recurring verifications")
+                else:
+                    sg.popup("Close accounts, verifications and transactions windows first!")
+            elif event == "memory_report":
+                sg.popup_scrolled(memory_report(), title="Memory use", size=(110, 30), font="Courier 10")
+            elif event == "close_year":
+                if accounts_window is None and verifications_window is None and account_transactions_window is None:
+                    if year().verification_list.year_closed:
+                        year().verification_list.open_year()
+                    elif sg.popup_ok_cancel(f"Close year {year().year}?") == "OK":
+                        findings = verify_ledger([year().year])
+                        if findings:
+                            sg.popup_scrolled("\n".join(map(str, findings)), title=f"{len(findings)} findings in year {year().year}", size=(100, 20))
+                            if sg.popup_ok_cancel(f"Close year {year().year} anyway?") != "OK":
+                                continue
+                        close_year(year().year)
+                else:
+                    sg.popup("Close accounts, verifications and transactions windows first!")
             elif event == "new_year":
-                if accounts_window is None and verifications_window is None:
+                if accounts_window is None and verifications_window is None and account_transactions_window is None:
                     year().create_new_year()
                 else:
-                    sg.popup("Close accounts and verifications windows first!")
+                    sg.popup("Close accounts, verifications and transactions windows first!")
 
         # Accounts window
         elif window == accounts_window:
@@ -435,7 +633,8 @@ def main_loop():
                 if year().account_list.find_account(new_acc_num):
                     sg.popup(f"Bad account, '{new_acc_num}' already exists!")
                     continue
-                new_acc_desc = sg.popup_get_text("Add new account description")
+                chart_acc = chart_of_accounts().find_account(new_acc_num)
+                new_acc_desc = sg.popup_get_text("Add new account description", default_text=chart_acc.description if chart_acc else "")
                 new_acc = Account(new_acc_num, new_acc_desc)
                 year().account_list.add_account(new_acc)
                 year().account_list.save_accounts()
@@ -451,11 +650,17 @@ def main_loop():
                     accounts_window.close()
                     accounts_window = create_accounts_window()
 
+            elif event == "roll_forward_balances":
+                ok = sg.popup_ok_cancel("Recalculate incoming balance of all later years based on this year?")
+                if ok == "OK":
+                    saved_years = roll_forward_incoming_balances(year().year)
+                    sg.popup(f"Updated incoming balances for years: {', '.join(map(str, saved_years)) or 'none'}")
+
             elif "_delete_acc" in event:
                 match = ROW_REGEX.match(event)
                 assert match, f"Bad event '{event}'"
                 idx = int(match.group('row'))
-                acc = year().account_list.get_accounts()[idx]
+                acc = year().account_list[idx]
                 if account_has_transactions(acc) or get_balance_for_account(acc) != 0:
                     sg.popup(f"Account {acc.account_number} has transactions or a non-zero balance, not allowed to be removed!")
                     continue
@@ -471,20 +676,44 @@ def main_loop():
                 match = ROW_REGEX.match(event)
                 assert match, f"Bad event '{event}'"
                 idx = int(match.group('row'))
-                acc = year().account_list.get_accounts()[idx]
-                if account_transactions_window is not None:
-                    # Close and reopen with new account
-                    account_transactions_window.close()
-                account_transactions_window = create_account_transactions_window(acc)
+                trans_account = year().account_list[idx]
+                trans_page = 0
+                if account_transactions_window is None:
+                    account_transactions_window = create_account_transactions_window()
+                populate_account_transactions_layout(account_transactions_window, trans_account, trans_page)
 
             elif "balance_report" in event:
                 create_balance_report("balance.html", year())
                 webbrowser.open_new_tab("balance.html")
 
-            elif "result_report" in event:
+            elif event == "result_report":
                 create_result_report("result.html", year())
                 webbrowser.open_new_tab("result.html")
 
+            elif event == "vat_report":
+                quarter_input = sg.popup_get_text("Quarter (1 - 4), empty for the whole year")
+                if quarter_input is None:
+                    continue
+                try:
+                    start_date, end_date = quarter_period(year().year, int(quarter_input)) if quarter_input.strip() else (None, None)
+                except ValueError:
+                    sg.popup(f"Bad quarter '{quarter_input}'!")
+                    continue
+                create_vat_report("vat.html", year(), start_date, end_date)
+                webbrowser.open_new_tab("vat.html")
+
+            elif event == "monthly_report":
+                create_monthly_result_report("monthly.html", year())
+                webbrowser.open_new_tab("monthly.html")
+
+            elif event == "comparison_report":
+                create_comparison_result_report("comparison.html", year())
+                webbrowser.open_new_tab("comparison.html")
+
+            elif event == "cost_unit_report":
+                create_cost_unit_result_report("cost_units.html", year())
+                webbrowser.open_new_tab("cost_units.html")
+
         # Verifications window
         elif window == verifications_window:
             print("verifications_window", event)
@@ -517,14 +746,23 @@ def main_loop():
                     repopulate_ver = True
 
             elif event == 'validate':
+                old_ver = copy.deepcopy(ver)
                 if store_verification_from_layout(ver, values):
+                    year().verification_list.verification_changed(old_ver, ver)
                     repopulate_ver = True
 
             elif event == "discard_ver":
+                old_ver = copy.deepcopy(ver)
                 if store_verification_from_layout(ver, values):
                     ver.discarded = not ver.discarded
+                    year().verification_list.verification_changed(old_ver, ver)
                     repopulate_ver = True
 
+            elif event.endswith("_acc_typed"):
+                acc_key = event[:-len("_typed")]
+                typed = str(values[acc_key])
+                verifications_window[acc_key].update(value=typed, values=account_type_ahead_values(typed))
+
             elif "_delete" in event:
                 match = ROW_REGEX.match(event)
                 assert match, f"Bad event '{event}'"
@@ -551,6 +789,21 @@ def main_loop():
                     year().verification_list.add_verification(ver)
                     repopulate_ver = True
 
+            elif event in ("search", "search_text_enter"):
+                ids = search_index(year().verification_list).search(values["search_text"])
+                if not ids:
+                    verifications_window["search_result"].update("No matches")
+                    continue
+                ok = "OK"
+                if not cmp_verification_and_layout(ver, values):
+                    ok = sg.popup_ok_cancel("Verification has changed and not been saved, discard changes?")
+                if ok == "OK":
+                    # Next match after the current verification, wrapping around
+                    next_pos = bisect.bisect_right(ids, ver.id) % len(ids)
+                    current_ver_idx = year().verification_list.find_verification_index(ids[next_pos])
+                    verifications_window["search_result"].update(f"Match {next_pos + 1} of {len(ids)}")
+                    repopulate_ver = True
+
             elif event == "ver_date_sel":
                 new_month, new_day, new_year = sg.popup_get_date(close_when_chosen=True, begin_at_sunday_plus=1, start_year=ver.date.year, start_mon=ver.date.month, start_day=ver.date.day)
                 new_date = date(year=new_year, month=new_month, day=new_day)
@@ -558,7 +811,9 @@ def main_loop():
                 if new_date.year != year().year:
                     sg.popup(f"Chosen date not in current year! new_date.year {new_date.year}, year().year {year().year}")
                     continue
+                old_ver = copy.deepcopy(ver)
                 ver.date = new_date
+                year().verification_list.verification_changed(old_ver, ver)
                 verifications_window["ver_date"].update(ver.date)
 
         # Transactions for account window
@@ -567,6 +822,28 @@ def main_loop():
             if event == sg.WIN_CLOSED or event == 'Quit': # if user closes window or clicks quit
                 account_transactions_window.close()
                 account_transactions_window = None
+                trans_account = None
+
+            elif event == 'next_page':
+                trans_page += 1
+                populate_account_transactions_layout(account_transactions_window, trans_account, trans_page)
+
+            elif event == 'prev_page':
+                trans_page -= 1
+                populate_account_transactions_layout(account_transactions_window, trans_account, trans_page)
+
+            elif "_trans_goto" in event:
+                match = ROW_REGEX.match(event)
+                assert match, f"Bad event '{event}'"
+                idx = trans_page * TRANS_PAGE_SIZE + int(match.group('row'))
+                if verifications_window is not None:
+                    ok = sg.popup_ok_cancel("Unsaved changes in the verifications window will be discarded, go to verification?")
+                    if ok != "OK":
+                        continue
+                else:
+                    verifications_window = create_verifications_window()
+                current_ver_idx = get_account_postings(trans_account).verification_index(idx)
+                repopulate_ver = True
 
 
 def main():
@@ -581,10 +858,19 @@ def main():
     verification_list_init()
     year_init()
 
-    main_loop()
+    userdata_watcher = UserdataWatcher()
+    maintenance = BackgroundMaintenance()
+    profiler = event_profiler_from_env()
+    main_loop(userdata_watcher, maintenance, profiler)
+    userdata_watcher.close()
+    maintenance.close()
+    if profiler is not None:
+        profiler.write_summary()
 
     config_do_git_commit("EXIT - Commit accounts and verifications")
 
 
 if __name__ == "__main__":
+    # The consistency check runs in worker processes, also from the exe
+    multiprocessing.freeze_support()
     main()
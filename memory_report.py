@@ -0,0 +1,146 @@
+import dataclasses as dc
+import datetime
+import sys
+import tracemalloc
+import types
+from array import array
+
+import balance
+import cost_units
+import cube
+import kontoplan
+import range_index
+import search
+from account import AccountList, account_list, account_lists_years
+from dataclass_json import dataclass_json_dumps, dataclass_json_loads
+from transaction import Transaction
+from verification import Verification, VerificationList, verification_list
+
+# Resident bytes per posting, with its share of the verification, that the
+# synthetic ledger must stay below
+BYTES_PER_POSTING_BUDGET = 512
+
+# Never walked into: other years' lists and code are not part of a structure
+_OPAQUE_TYPES = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType,
+                 VerificationList, AccountList, memoryview)
+
+
+def deep_sizeof(obj, seen: set[int]) -> int:
+    """Bytes of the object and everything it references, not counting objects already in seen."""
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _OPAQUE_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, bool, datetime.date, array)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return size
+
+
+@dc.dataclass
+class MemoryUsage:
+    structure: str
+    bytes: int
+    objects: int | None = None
+
+
+def year_memory_usage(year: int, seen: set[int]) -> list[MemoryUsage]:
+    """
+    Memory used by one year, per structure. Objects shared between
+    structures are counted for the first one only, in the order listed.
+    """
+    usage = []
+    acc_list = account_list(year)
+    usage.append(MemoryUsage("accounts", deep_sizeof(acc_list._accounts, seen), len(acc_list)))
+    if acc_list._search_index is not None:
+        usage.append(MemoryUsage("account search index", deep_sizeof(acc_list._search_index, seen)))
+
+    ver_list = verification_list(year)
+    if ver_list._loaded_verifications is None:
+        journal = ver_list.binary_journal
+        mapped = f", binary journal of {len(journal._mmap)} bytes mapped" if journal is not None else ""
+        usage.append(MemoryUsage(f"verifications (not loaded{mapped})", 0, 0))
+    else:
+        vers = ver_list._loaded_verifications
+        transactions = [trans for ver in vers for trans in ver.transactions]
+        usage.append(MemoryUsage("transactions", deep_sizeof(transactions, seen) - sys.getsizeof(transactions), len(transactions)))
+        usage.append(MemoryUsage("verifications", deep_sizeof(vers, seen), len(vers)))
+
+    caches = [
+        ("posting index", balance._posting_indexes),
+        ("cost unit index", cost_units._cost_unit_indexes),
+        ("account range index", range_index._account_range_indexes),
+        ("monthly cube", cube._cubes),
+        ("search index", search._search_indexes),
+    ]
+    for name, indexes in caches:
+        if year in indexes:
+            usage.append(MemoryUsage(name, deep_sizeof(indexes[year], seen)))
+    return usage
+
+
+def memory_report(years: list[int] | None = None) -> str:
+    """Memory use per year and structure, and the top allocation sites when tracemalloc is tracing."""
+    seen: set[int] = set()
+    lines = [f"{'year':<6} {'structure':<60} {'objects':>9} {'bytes':>12}"]
+    total = 0
+    for report_year in years or account_lists_years():
+        for usage in year_memory_usage(report_year, seen):
+            objects = "" if usage.objects is None else usage.objects
+            lines.append(f"{report_year:<6} {usage.structure:<60} {objects:>9} {usage.bytes:>12}")
+            total += usage.bytes
+    if kontoplan._chart_of_accounts is not None:
+        chart_bytes = deep_sizeof(kontoplan._chart_of_accounts, seen)
+        lines.append(f"{'':<6} {'chart of accounts':<60} {len(kontoplan._chart_of_accounts):>9} {chart_bytes:>12}")
+        total += chart_bytes
+    lines.append(f"{'':<6} {'total':<60} {'':>9} {total:>12}")
+
+    if tracemalloc.is_tracing():
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append("")
+        lines.append(f"Traced by tracemalloc: {current} bytes, peak {peak} bytes. Top allocation sites:")
+        for stat in snapshot.statistics("lineno")[:10]:
+            lines.append(f"  {stat.size:>12} bytes {stat.count:>9} blocks  {stat.traceback}")
+    else:
+        lines.append("")
+        lines.append("Start with PYTHONTRACEMALLOC=1 to also get the allocation sites.")
+    return "\n".join(lines)
+
+
+def synthetic_bytes_per_posting(num_verifications: int = 10000) -> float:
+    """
+    Resident bytes per posting of a synthetic ledger, two postings per
+    verification, loaded through JSON like the real verification files.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    verifications = []
+    start_date = datetime.date(2000, 1, 1)
+    for idx in range(num_verifications):
+        amount = float(100 + idx % 977)
+        ver = Verification(idx, start_date + datetime.timedelta(days=idx % 365), notes=f"Invoice {idx}")
+        ver.add_transaction(Transaction(3000 + idx % 50, 0.0, amount, f"Sale {idx % 100}"))
+        ver.add_transaction(Transaction(1930, amount, 0.0))
+        verifications.append(dataclass_json_loads(dataclass_json_dumps(ver)))
+    after, _ = tracemalloc.get_traced_memory()
+    if not was_tracing:
+        tracemalloc.stop()
+    num_postings = sum(len(ver.transactions) for ver in verifications)
+    return (after - before) / num_postings
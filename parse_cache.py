@@ -0,0 +1,97 @@
+import dataclasses as dc
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from config import config_get_cache_dir
+
+T = TypeVar("T")
+
+# Bump when a cached class changes shape, older caches are then ignored
+PARSE_CACHE_VERSION = 1
+# Files modified this close to the cache write may change again within the
+# same mtime tick, without the size changing, so they are never trusted
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+@dc.dataclass
+class ParseCache:
+    """
+    Parsed objects of a set of files, with the size and mtime of each file
+    when it was parsed. Stored as a pickle in the cache dir.
+    """
+    version: int = PARSE_CACHE_VERSION
+    written_ns: int = 0
+    # File name -> (size, mtime_ns)
+    manifest: dict[str, tuple[int, int]] = dc.field(default_factory=dict)
+    objects: dict[str, object] = dc.field(default_factory=dict)
+
+
+def _parse_cache_path(name: str) -> Path:
+    return config_get_cache_dir() / f"parsed_{name}.pickle"
+
+
+def _load_parse_cache(name: str) -> ParseCache:
+    path = _parse_cache_path(name)
+    if not path.exists():
+        return ParseCache()
+    try:
+        with open(path, "rb") as cache_file:
+            cache = pickle.load(cache_file)
+    except Exception as err:
+        print(f"Ignoring unreadable parse cache {path}: {err}")
+        return ParseCache()
+    if not isinstance(cache, ParseCache) or cache.version != PARSE_CACHE_VERSION:
+        print(f"Ignoring parse cache of another version: {path}")
+        return ParseCache()
+    return cache
+
+
+def _save_parse_cache(name: str, cache: ParseCache):
+    path = _parse_cache_path(name)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as cache_file:
+        pickle.dump(cache, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_files_cached(name: str, filepaths: list[Path], parse: Callable[[Path], T]) -> list[T]:
+    """
+    Parse the files with parse, in the given order, reusing the objects of the
+    named cache for files with the same size and mtime as when they were
+    cached. The cache is rewritten only if any file was parsed or removed.
+    """
+    cache = _load_parse_cache(name)
+    trusted_before_ns = cache.written_ns - _RACY_WINDOW_NS
+    new_cache = ParseCache()
+    parsed: list[T] = []
+    num_parsed = 0
+    for filepath in filepaths:
+        stat = filepath.stat()
+        key = filepath.name
+        file_id = (stat.st_size, stat.st_mtime_ns)
+        if cache.manifest.get(key) == file_id and stat.st_mtime_ns < trusted_before_ns:
+            obj = cache.objects[key]
+        else:
+            obj = parse(filepath)
+            num_parsed += 1
+        new_cache.manifest[key] = file_id
+        new_cache.objects[key] = obj
+        parsed.append(obj)
+
+    if num_parsed or len(new_cache.manifest) != len(cache.manifest):
+        print(f"Parsed {num_parsed} of {len(filepaths)} files, {len(filepaths) - num_parsed} from cache '{name}'")
+        # Parse again on the next load if modified within the racy window
+        new_cache.written_ns = time.time_ns()
+        _save_parse_cache(name, new_cache)
+    else:
+        print(f"All {len(filepaths)} files unchanged, loaded from cache '{name}'")
+    return parsed
+
+
+def remove_parse_cache(name: str):
+    path = _parse_cache_path(name)
+    if path.exists():
+        path.unlink()
@@ -0,0 +1,165 @@
+import dataclasses as dc
+import datetime
+import time
+from pathlib import Path
+
+from account import Account, account_list
+from config import config_do_git_commit, config_get_verifications_dir_path
+from kontoplan import chart_of_accounts
+from transaction import Transaction
+from verification import Verification, verification_list, verification_lists_years
+
+
+@dc.dataclass
+class PostingError:
+    # Index of the verification in the batch
+    index: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"Verification {self.index} of the batch: {self.message}"
+
+
+class PostingBatchError(ValueError):
+    def __init__(self, errors: list[PostingError]):
+        self.errors = errors
+        shown = "\n".join(map(str, errors[:20])) + (f"\n... and {len(errors) - 20} more" if len(errors) > 20 else "")
+        super().__init__(f"{len(errors)} errors in posting batch, nothing posted:\n{shown}")
+
+
+class PostingBatch:
+    """
+    Posts many verifications into one year as one unit of work:
+
+        with PostingBatch(2026, "Payroll 2026-05") as batch:
+            batch.add(datetime.date(2026, 5, 25), [Transaction(7210, 30000.0, 0.0), Transaction(1930, 0.0, 30000.0)], "Salary")
+
+    All verifications are validated together when committed, on leaving the
+    with block or by commit(). If any is invalid nothing is posted and
+    PostingBatchError lists all errors. Otherwise the verifications get the
+    next ids of the year, the indexes follow through the change listeners,
+    only the new files are written, in one group, and one git commit is made.
+    Leaving the with block by an exception discards the batch.
+    """
+    def __init__(self, year: int, message: str, add_missing_accounts: bool = False):
+        self._year = year
+        self._message = message
+        # Accounts not used in the year are added from the chart of accounts
+        self._add_missing_accounts = add_missing_accounts
+        self._verifications: list[Verification] = []
+        self._committed = False
+
+    def __enter__(self) -> "PostingBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        # Exceptions are not suppressed, the batch is discarded
+
+    def __len__(self) -> int:
+        return len(self._verifications)
+
+    def add(self, date: datetime.date, transactions: list[Transaction], notes: str = "") -> Verification:
+        """Add a verification to the batch, its id is given when committed."""
+        if self._committed:
+            raise ValueError("Posting batch already committed")
+        ver = Verification(-1, date, list(transactions), notes)
+        self._verifications.append(ver)
+        return ver
+
+    def validate(self) -> tuple[list[PostingError], list[Account]]:
+        """All errors of the batch, and the accounts to add from the chart of accounts."""
+        errors: list[PostingError] = []
+        if self._year not in verification_lists_years():
+            return [PostingError(0, f"year {self._year} not present")], []
+        vl = verification_list(self._year)
+        if vl.year_closed:
+            errors.append(PostingError(0, f"year {self._year} is closed"))
+        known_accounts = {acc.account_number for acc in account_list(self._year)}
+        new_accounts: dict[int, Account] = {}
+        for idx, ver in enumerate(self._verifications):
+            if ver.date.year != self._year:
+                errors.append(PostingError(idx, f"date {ver.date} not in year {self._year}"))
+            if not ver.transactions:
+                errors.append(PostingError(idx, "no transactions"))
+            balance_ore = 0
+            for trans in ver.transactions:
+                if trans.account_number not in known_accounts and trans.account_number not in new_accounts:
+                    chart_acc = chart_of_accounts().find_account(trans.account_number) if self._add_missing_accounts else None
+                    if chart_acc is None:
+                        errors.append(PostingError(idx, f"unknown account {trans.account_number}"))
+                    else:
+                        new_accounts[chart_acc.account_number] = Account(chart_acc.account_number, chart_acc.description)
+                if trans.debit and trans.credit:
+                    errors.append(PostingError(idx, f"account {trans.account_number}: both debit and credit set"))
+                if trans.debit < 0 or trans.credit < 0:
+                    errors.append(PostingError(idx, f"account {trans.account_number}: negative amount"))
+                if any(abs(amount * 100 - round(amount * 100)) > 1e-6 for amount in (trans.debit, trans.credit)):
+                    errors.append(PostingError(idx, f"account {trans.account_number}: amount with fractions of öre"))
+                # In öre, sums of floats are not exact
+                balance_ore += round(trans.debit * 100) - round(trans.credit * 100)
+            if balance_ore:
+                errors.append(PostingError(idx, f"not balanced, debit - credit is {balance_ore / 100}"))
+        return errors, list(new_accounts.values())
+
+    def commit(self, git_commit: bool = True) -> list[Verification]:
+        """
+        Validate, post and save the batch, returns the posted verifications.
+        Without git_commit the caller commits, e.g. after more batches.
+        """
+        if self._committed:
+            raise ValueError("Posting batch already committed")
+        start = time.perf_counter()
+        errors, new_accounts = self.validate()
+        if errors:
+            raise PostingBatchError(errors)
+        self._committed = True
+        if not self._verifications:
+            return []
+
+        vl = verification_list(self._year)
+        acc_list = account_list(self._year)
+        # Ids are kept sorted, the batch follows the last verification
+        next_id = vl.next_id
+        for ver in self._verifications:
+            ver.id = next_id
+            next_id += 1
+        for acc in new_accounts:
+            acc_list.add_account(acc)
+        vl.add_verifications(self._verifications)
+        validate_time = time.perf_counter()
+        accounts_saved = False
+        try:
+            if new_accounts:
+                acc_list.save_accounts()
+                accounts_saved = True
+            vl.save_new_verifications(self._verifications)
+        except BaseException:
+            self._rollback(new_accounts, accounts_saved)
+            raise
+        save_time = time.perf_counter()
+        if git_commit:
+            config_do_git_commit(f"{self._message} - {len(self._verifications)} verifications")
+        end = time.perf_counter()
+        print(f"Posted {len(self._verifications)} verifications into year {self._year} in {(end - start) * 1000:.1f} ms "
+              f"(validate and index {(validate_time - start) * 1000:.1f} ms, save {(save_time - validate_time) * 1000:.1f} ms, "
+              f"commit {(end - save_time) * 1000:.1f} ms)")
+        return self._verifications
+
+    def _rollback(self, new_accounts: list[Account], accounts_saved: bool):
+        print(f"Saving the posting batch failed, removing its {len(self._verifications)} verifications")
+        vl = verification_list(self._year)
+        vl.remove_verifications(self._verifications)
+        dir = Path(config_get_verifications_dir_path(self._year))
+        for ver in self._verifications:
+            (dir / ver.filename).unlink(missing_ok=True)
+        acc_list = account_list(self._year)
+        for acc in new_accounts:
+            acc_list.remove_account(acc)
+        if accounts_saved:
+            # The accounts file on disk must not keep the added accounts either
+            try:
+                acc_list.save_accounts()
+            except OSError as err:
+                print(f"Could not remove the added accounts from the accounts file of {self._year}: {err}")
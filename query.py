@@ -0,0 +1,130 @@
+import dataclasses as dc
+import datetime
+import heapq
+from typing import Iterator
+
+import balance
+from search import search_index
+from transaction import Transaction
+from verification import Verification, VerificationList, verification_list, verification_lists_years
+
+
+@dc.dataclass(frozen=True)
+class Posting:
+    year: int
+    verification: Verification
+    transaction: Transaction
+
+
+@dc.dataclass(frozen=True)
+class Query:
+    """
+    Lazily evaluated query over the postings of all years. Each filter
+    method returns a new query, nothing is read until the query is iterated.
+    Postings are returned per year in journal order. An index is used when
+    one fits the filters: the search index for text, the posting index for
+    account ranges, otherwise the journal is scanned.
+
+        for posting in Query().years(2023).accounts(2610, 2650).dates(start, end):
+            ...
+    """
+    first_year: int | None = None
+    last_year: int | None = None
+    start: datetime.date | None = None
+    end: datetime.date | None = None
+    first_account: int | None = None
+    last_account: int | None = None
+    min_amount: float | None = None
+    max_amount: float | None = None
+    include_discarded: bool | None = None
+    text_query: str | None = None
+
+    def years(self, first: int, last: int | None = None) -> "Query":
+        return dc.replace(self, first_year=first, last_year=first if last is None else last)
+
+    def dates(self, start: datetime.date | None, end: datetime.date | None) -> "Query":
+        return dc.replace(self, start=start, end=end)
+
+    def accounts(self, first: int, last: int | None = None) -> "Query":
+        return dc.replace(self, first_account=first, last_account=first if last is None else last)
+
+    def amount(self, min_amount: float | None = None, max_amount: float | None = None) -> "Query":
+        """Postings with debit or credit within the limits."""
+        return dc.replace(self, min_amount=min_amount, max_amount=max_amount)
+
+    def discarded(self, discarded: bool) -> "Query":
+        """Only discarded (True) or only not discarded (False) verifications."""
+        return dc.replace(self, include_discarded=discarded)
+
+    def text(self, query: str) -> "Query":
+        return dc.replace(self, text_query=query)
+
+    def _years(self) -> Iterator[int]:
+        for year in verification_lists_years():
+            if self.first_year is not None and year < self.first_year:
+                continue
+            if self.last_year is not None and year > self.last_year:
+                continue
+            if self.start is not None and year < self.start.year:
+                continue
+            if self.end is not None and year > self.end.year:
+                continue
+            yield year
+
+    def _verification_matches(self, ver: Verification) -> bool:
+        if self.include_discarded is not None and ver.discarded != self.include_discarded:
+            return False
+        if self.start is not None and ver.date < self.start:
+            return False
+        if self.end is not None and ver.date > self.end:
+            return False
+        return True
+
+    def _transaction_matches(self, trans: Transaction) -> bool:
+        if self.first_account is not None and not self.first_account <= trans.account_number <= self.last_account:
+            return False
+        amount = trans.debit or trans.credit
+        if self.min_amount is not None and amount < self.min_amount:
+            return False
+        if self.max_amount is not None and amount > self.max_amount:
+            return False
+        return True
+
+    def _candidates(self, vl: VerificationList) -> Iterator[tuple[Verification, Transaction]]:
+        if self.text_query:
+            for id in search_index(vl).search(self.text_query):
+                ver = vl.find_verification(id)
+                for trans in ver.transactions:
+                    yield ver, trans
+        elif self.first_account is not None:
+            index = balance.posting_index(vl)
+            account_postings = [index.postings(acc_num) for acc_num in index.account_numbers(self.first_account, self.last_account)]
+            # Merge the postings of the accounts back into journal order
+            for ver_idx, trans in heapq.merge(*(postings.items() for postings in account_postings), key=lambda item: item[0]):
+                yield vl.get_verification_at(ver_idx), trans
+        else:
+            for ver in vl:
+                for trans in ver.transactions:
+                    yield ver, trans
+
+    def __iter__(self) -> Iterator[Posting]:
+        for year in self._years():
+            for ver, trans in self._candidates(verification_list(year)):
+                if self._verification_matches(ver) and self._transaction_matches(trans):
+                    yield Posting(year, ver, trans)
+
+    def verifications(self) -> Iterator[tuple[int, Verification]]:
+        """(year, verification) for the verifications with at least one matching posting."""
+        seen: tuple[int, int] | None = None
+        for posting in self:
+            key = (posting.year, posting.verification.id)
+            if key != seen:
+                seen = key
+                yield posting.year, posting.verification
+
+    def count(self) -> int:
+        return sum(1 for _ in self)
+
+    def sum(self) -> float:
+        """Movement (debit - credit) of the matching postings."""
+        return round(sum(p.transaction.debit - p.transaction.credit for p in self), ndigits=2)
@@ -0,0 +1,91 @@
+import bisect
+import datetime
+from itertools import accumulate
+
+from verification import VerificationList
+
+
+class AccountRangeIndex:
+    """
+    Movements (debit - credit) of one year indexed for range queries over
+    account numbers and dates. The account numbers are sorted with prefix
+    sums of the year totals, and each account has its postings sorted on date
+    with prefix sums, so a range sum costs a few bisects per account instead
+    of a walk over the journal.
+    """
+    def __init__(self, verification_list: VerificationList):
+        self.year = verification_list.year
+        self.revision = verification_list.revision
+        postings: dict[int, list[tuple[int, float]]] = {}
+        for ver in verification_list:
+            ordinal = ver.date.toordinal()
+            for trans in ver.transactions:
+                postings.setdefault(trans.account_number, []).append((ordinal, trans.debit - trans.credit))
+
+        self._accounts = sorted(postings)
+        self._dates: list[list[int]] = []
+        self._sums: list[list[float]] = []
+        for acc_num in self._accounts:
+            acc_postings = sorted(postings[acc_num])
+            self._dates.append([ordinal for ordinal, _ in acc_postings])
+            self._sums.append(list(accumulate((amount for _, amount in acc_postings), initial=0.0)))
+        self._total_sums = list(accumulate((sums[-1] for sums in self._sums), initial=0.0))
+
+    @property
+    def accounts(self) -> list[int]:
+        """Account numbers with postings, sorted."""
+        return self._accounts
+
+    def _account_range(self, first_account: int, last_account: int) -> tuple[int, int]:
+        return bisect.bisect_left(self._accounts, first_account), bisect.bisect_right(self._accounts, last_account)
+
+    def _account_sum(self, idx: int, start: datetime.date | None, end: datetime.date | None) -> float:
+        dates = self._dates[idx]
+        lo = 0 if start is None else bisect.bisect_left(dates, start.toordinal())
+        hi = len(dates) if end is None else bisect.bisect_right(dates, end.toordinal())
+        return self._sums[idx][hi] - self._sums[idx][lo] if hi > lo else 0.0
+
+    def posting_count(self, account_number: int, start: datetime.date | None = None, end: datetime.date | None = None) -> int:
+        """Number of postings on the account between start and end (inclusive)."""
+        lo, hi = self._account_range(account_number, account_number)
+        if lo == hi:
+            return 0
+        dates = self._dates[lo]
+        first = 0 if start is None else bisect.bisect_left(dates, start.toordinal())
+        last = len(dates) if end is None else bisect.bisect_right(dates, end.toordinal())
+        return max(last - first, 0)
+
+    def sum(self, first_account: int, last_account: int, start: datetime.date | None = None, end: datetime.date | None = None) -> float:
+        """Movement of the accounts first_account..last_account (inclusive) between start and end (inclusive)."""
+        lo, hi = self._account_range(first_account, last_account)
+        if start is None and end is None:
+            return round(self._total_sums[hi] - self._total_sums[lo], ndigits=2)
+        return round(sum(self._account_sum(idx, start, end) for idx in range(lo, hi)), ndigits=2)
+
+    def account_sums(self, first_account: int, last_account: int, start: datetime.date | None = None, end: datetime.date | None = None) -> dict[int, float]:
+        """Movement per account in the range, for accounts with postings."""
+        lo, hi = self._account_range(first_account, last_account)
+        return {self._accounts[idx]: round(self._account_sum(idx, start, end), ndigits=2) for idx in range(lo, hi)}
+
+    def group_sums(self, digits: int, start: datetime.date | None = None, end: datetime.date | None = None) -> dict[int, float]:
+        """
+        Movement per BAS group, the first digits of the account number, e.g.
+        19 for 1900-1999 with digits=2 or 193 for 1930-1939 with digits=3.
+        """
+        groups: dict[int, float] = {}
+        for acc_num, amount in self.account_sums(0, 9999, start, end).items():
+            group = int(str(acc_num)[:digits])
+            groups[group] = round(groups.get(group, 0.0) + amount, ndigits=2)
+        return groups
+
+
+_account_range_indexes: dict[int, AccountRangeIndex] = {}
+
+
+def account_range_index(verification_list: VerificationList) -> AccountRangeIndex:
+    """Account range index for the year, rebuilt only when the journal changed."""
+    index = _account_range_indexes.get(verification_list.year)
+    if index is None or index.revision != verification_list.revision:
+        index = AccountRangeIndex(verification_list)
+        _account_range_indexes[verification_list.year] = index
+    return index
@@ -0,0 +1,138 @@
+import calendar
+import dataclasses as dc
+import datetime
+import time
+
+from atomic_write import atomic_write_files
+from config import config_do_git_commit, config_get_recurring_path
+from dataclass_json import dataclass_json_dumps, dataclass_json_loads
+from posting import PostingBatch, PostingBatchError, PostingError
+from transaction import Transaction
+from verification import verification_lists_years
+
+# Months between two verifications of a template
+INTERVAL_MONTHS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+
+
+@dc.dataclass
+class RecurringTemplate:
+    name: str
+    start: datetime.date
+    transactions: list[Transaction] = dc.field(default_factory=list)
+    notes: str = ""
+    interval: str = "monthly"
+    # Day of the month, the last day of shorter months
+    day: int = 25
+    # Last date to generate, None for no end
+    end: datetime.date | None = None
+    # Date of the last generated verification, None if none yet
+    last_generated: datetime.date | None = None
+
+    def due_dates(self, up_to: datetime.date) -> list[datetime.date]:
+        """Dates not generated yet, up to and including the given date."""
+        step = INTERVAL_MONTHS[self.interval]
+        last = self.end if self.end is not None and self.end < up_to else up_to
+        dates = []
+        month_index = self.start.year * 12 + self.start.month - 1
+        while True:
+            year, month = divmod(month_index, 12)
+            date = datetime.date(year, month + 1, min(self.day, calendar.monthrange(year, month + 1)[1]))
+            if date > last:
+                return dates
+            if date >= self.start and (self.last_generated is None or date > self.last_generated):
+                dates.append(date)
+            month_index += step
+
+
+def load_recurring_templates() -> list[RecurringTemplate]:
+    path = config_get_recurring_path()
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as recurring_file:
+        return dataclass_json_loads(recurring_file.read())
+
+
+def save_recurring_templates(templates: list[RecurringTemplate]):
+    path = config_get_recurring_path()
+    print(f"Storing {len(templates)} recurring templates in file: {path.absolute()}")
+    atomic_write_files({path: dataclass_json_dumps(templates, indent=4)})
+
+
+def add_recurring_template(template: RecurringTemplate):
+    if template.interval not in INTERVAL_MONTHS:
+        raise ValueError(f"Unknown interval '{template.interval}', expected one of {', '.join(INTERVAL_MONTHS)}")
+    if not 1 <= template.day <= 31:
+        raise ValueError(f"Bad day of month {template.day}")
+    if round(sum(trans.debit - trans.credit for trans in template.transactions), ndigits=2) != 0:
+        raise ValueError(f"Template '{template.name}' is not balanced")
+    templates = load_recurring_templates()
+    if any(other.name == template.name for other in templates):
+        raise ValueError(f"A recurring template named '{template.name}' already exists")
+    templates.append(template)
+    save_recurring_templates(templates)
+
+
+def remove_recurring_template(name: str):
+    templates = load_recurring_templates()
+    remaining = [template for template in templates if template.name != name]
+    if len(remaining) == len(templates):
+        raise ValueError(f"No recurring template named '{name}'")
+    save_recurring_templates(remaining)
+
+
+def generate_recurring(up_to: datetime.date) -> int:
+    """
+    Create the verifications of all templates due up to and including the
+    given date. One posting batch per year, all validated before any is
+    posted. The templates are saved after each posted year, so a failure in
+    a later year does not post the earlier ones again, and all is committed
+    once. Dates in years not created yet are left for a later run. Returns
+    the number of created verifications.
+    """
+    start = time.perf_counter()
+    templates = load_recurring_templates()
+    years = set(verification_lists_years())
+    batches: dict[int, PostingBatch] = {}
+    # Template of each verification in the batches, for the errors
+    batch_templates: dict[int, list[str]] = {}
+    # Last date per template in each batch, generated once the batch is posted
+    batch_last_dates: dict[int, dict[int, datetime.date]] = {}
+    skipped_years: set[int] = set()
+    for template_idx, template in enumerate(templates):
+        for date in template.due_dates(up_to):
+            if date.year not in years:
+                skipped_years.add(date.year)
+                # Later dates wait too, the template continues from its last generated date
+                break
+            if date.year not in batches:
+                batches[date.year] = PostingBatch(date.year, "Recurring", add_missing_accounts=True)
+                batch_templates[date.year] = []
+                batch_last_dates[date.year] = {}
+            batch_templates[date.year].append(template.name)
+            # Each verification gets its own transaction objects
+            batches[date.year].add(date, [dc.replace(trans) for trans in template.transactions],
+                                   f"{template.notes or template.name} {date:%Y-%m}")
+            batch_last_dates[date.year][template_idx] = date
+    if skipped_years:
+        print(f"Not creating recurring verifications in years not created yet: {', '.join(map(str, sorted(skipped_years)))}")
+    if not batches:
+        print(f"No recurring verifications due up to {up_to}")
+        return 0
+
+    errors = []
+    for year, batch in batches.items():
+        errors += [PostingError(err.index, f"template '{batch_templates[year][err.index]}' in {year}: {err.message}")
+                   for err in batch.validate()[0]]
+    if errors:
+        raise PostingBatchError(errors)
+    num_created = 0
+    for year, batch in sorted(batches.items()):
+        num_created += len(batch.commit(git_commit=False))
+        for template_idx, date in batch_last_dates[year].items():
+            templates[template_idx].last_generated = date
+        save_recurring_templates(templates)
+    generate_time = time.perf_counter()
+    config_do_git_commit(f"Recurring - {num_created} verifications up to {up_to}")
+    print(f"Generated {num_created} recurring verifications from {len(templates)} templates in "
+          f"{(generate_time - start) * 1000:.1f} ms, committed in {(time.perf_counter() - generate_time) * 1000:.1f} ms")
+    return num_created
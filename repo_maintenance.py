@@ -0,0 +1,221 @@
+import dataclasses as dc
+import datetime
+import threading
+import time
+
+from git import Repo
+from git.exc import GitCommandError
+
+from config import config_get_cache_dir, config_get_squash_automatic_commits_days, config_get_userdata_dir
+from dataclass_json import dataclass_json_dumps, dataclass_json_loads
+
+# Messages of the commits made on start and exit of the program
+AUTOMATIC_COMMIT_PREFIXES = ("STARTUP - ", "EXIT - ")
+
+# Run gc when there are more loose objects or packs than this, or when the
+# last maintenance is older than the interval
+GC_LOOSE_OBJECTS = 1000
+GC_PACKS = 10
+MAINTENANCE_INTERVAL_DAYS = 7
+# Seconds without GUI events before maintenance may start
+MAINTENANCE_IDLE_SECONDS = 120
+
+MAINTENANCE_STATE_FILENAME = "maintenance.json"
+# Size snapshots kept in the state, the oldest are dropped
+MAX_STATS_HISTORY = 200
+
+_FIELD_SEPARATOR = "\x1f"
+_RECORD_SEPARATOR = "\x1e"
+
+
+@dc.dataclass
+class RepoStats:
+    time: float
+    loose_objects: int
+    loose_kib: int
+    packs: int
+    pack_kib: int
+    commits: int
+
+    def __str__(self) -> str:
+        return (f"{self.commits} commits, {self.loose_objects} loose objects ({self.loose_kib} KiB), "
+                f"{self.packs} packs ({self.pack_kib} KiB)")
+
+
+@dc.dataclass
+class MaintenanceState:
+    last_run: float = 0.0
+    stats: list[RepoStats] = dc.field(default_factory=list)
+
+
+def _repo() -> Repo:
+    return Repo(config_get_userdata_dir())
+
+
+def _state_path():
+    return config_get_cache_dir() / MAINTENANCE_STATE_FILENAME
+
+
+def load_maintenance_state() -> MaintenanceState:
+    path = _state_path()
+    if not path.exists():
+        return MaintenanceState()
+    try:
+        with open(path, "r", encoding="utf-8") as state_file:
+            return dataclass_json_loads(state_file.read())
+    except ValueError as err:
+        print(f"Ignoring unreadable maintenance state {path}: {err}")
+        return MaintenanceState()
+
+
+def _save_maintenance_state(state: MaintenanceState):
+    state.stats = state.stats[-MAX_STATS_HISTORY:]
+    with open(_state_path(), "w", encoding="utf-8") as state_file:
+        state_file.write(dataclass_json_dumps(state))
+
+
+def repo_stats() -> RepoStats:
+    """Size and object counts of the userdata repository, from git count-objects."""
+    repo = _repo()
+    counts = {}
+    for line in repo.git.count_objects("-v").splitlines():
+        key, value = line.split(":", 1)
+        counts[key.strip()] = int(value.strip())
+    commits = int(repo.git.rev_list("--count", "HEAD")) if repo.head.is_valid() else 0
+    return RepoStats(time.time(), counts["count"], counts["size"], counts["packs"], counts["size-pack"], commits)
+
+
+def maintenance_due(stats: RepoStats, state: MaintenanceState) -> bool:
+    return (stats.loose_objects > GC_LOOSE_OBJECTS or stats.packs > GC_PACKS
+            or time.time() - state.last_run > MAINTENANCE_INTERVAL_DAYS * 24 * 3600)
+
+
+def _is_automatic(message: str) -> bool:
+    return message.startswith(AUTOMATIC_COMMIT_PREFIXES)
+
+
+def squash_automatic_commits(older_than_days: int) -> int:
+    """
+    Squash each run of consecutive STARTUP/EXIT commits older than the given
+    number of days into the last commit of the run. The other commits are
+    kept, with their trees, authors and dates, so the ledger is the same at
+    every kept commit. Nothing is done for a history with merges, or if a
+    commit is made while rewriting. Returns the number of commits removed.
+    """
+    repo = _repo()
+    if not repo.head.is_valid():
+        return 0
+    start = time.perf_counter()
+    head = repo.head.commit.hexsha
+    log_format = _FIELD_SEPARATOR.join(["%H", "%P", "%T", "%an", "%ae", "%ad", "%cn", "%ce", "%cd", "%ct", "%B"])
+    output = repo.git.log("--reverse", "--date=raw", f"--format={log_format}{_RECORD_SEPARATOR}", head, strip_newline_in_stdout=False)
+    commits = [record.lstrip("\n").split(_FIELD_SEPARATOR) for record in output.split(_RECORD_SEPARATOR) if record.strip()]
+    if any(len(parents.split()) > 1 for _, parents, *_ in commits):
+        print("The userdata repository has merge commits, not squashing")
+        return 0
+
+    cutoff = time.time() - older_than_days * 24 * 3600
+
+    def squashable(commit: list[str]) -> bool:
+        return _is_automatic(commit[10]) and int(commit[9]) < cutoff
+
+    num_removed = 0
+    run_start = None
+    new_parent = None
+    rewriting = False
+    for idx, commit in enumerate(commits):
+        sha, _, tree, author_name, author_email, author_date, committer_name, committer_email, committer_date, _, message = commit
+        if squashable(commit) and idx + 1 < len(commits) and squashable(commits[idx + 1]):
+            # Absorbed by the last commit of the run
+            run_start = run_start or author_date
+            num_removed += 1
+            rewriting = True
+            continue
+        if run_start is not None:
+            first_date = datetime.datetime.fromtimestamp(int(run_start.split()[0])).strftime("%Y-%m-%d")
+            message = f"{message.rstrip()}\n\nSquashed automatic commits since {first_date}"
+            run_start = None
+        elif not rewriting:
+            new_parent = sha
+            continue
+        new_parent = repo.git.commit_tree(tree, *(["-p", new_parent] if new_parent else []), "-m", message.rstrip(), env={
+            "GIT_AUTHOR_NAME": author_name,
+            "GIT_AUTHOR_EMAIL": author_email,
+            "GIT_AUTHOR_DATE": author_date,
+            "GIT_COMMITTER_NAME": committer_name,
+            "GIT_COMMITTER_EMAIL": committer_email,
+            "GIT_COMMITTER_DATE": committer_date,
+        })
+
+    if not num_removed:
+        return 0
+    try:
+        # Only if HEAD was not moved meanwhile, the tree of the tip is unchanged
+        # so the index and working tree stay as they are
+        repo.git.update_ref("-m", "squash automatic commits", "HEAD", new_parent, head)
+    except GitCommandError as err:
+        print(f"Not squashing, the userdata repository changed: {err}")
+        return 0
+    print(f"Squashed {num_removed} automatic commits older than {older_than_days} days in {time.perf_counter() - start:.2f} s")
+    return num_removed
+
+
+def run_maintenance(force: bool = False, squash_days: int | None = None) -> RepoStats:
+    """
+    Squash automatic commits older than squash_days (default: as configured,
+    if at all), and gc the userdata repository, if it is due or forced.
+    Returns the stats after.
+    """
+    state = load_maintenance_state()
+    stats = repo_stats()
+    state.stats.append(stats)
+    print(f"Userdata repository: {stats}")
+    if not force and not maintenance_due(stats, state):
+        _save_maintenance_state(state)
+        return stats
+
+    start = time.perf_counter()
+    if squash_days is None:
+        squash_days = config_get_squash_automatic_commits_days()
+    if squash_days is not None and squash_automatic_commits(squash_days):
+        # The reflog of HEAD would keep the squashed commits for 90 days.
+        # They are pruned by the gc after git's grace period for unreachable
+        # objects, pruning at once could drop the objects of a commit being made.
+        _repo().git.reflog("expire", "--expire-unreachable=now", "--all")
+    _repo().git.gc("--quiet")
+    stats = repo_stats()
+    state.stats.append(stats)
+    state.last_run = stats.time
+    _save_maintenance_state(state)
+    print(f"Userdata repository maintained in {time.perf_counter() - start:.2f} s: {stats}")
+    return stats
+
+
+class BackgroundMaintenance:
+    """
+    Runs the maintenance in a thread once the GUI has been idle for a while,
+    at most once per program run. Git locks the refs and the index, so
+    commits made meanwhile are safe.
+    """
+    def __init__(self):
+        self._last_activity = time.monotonic()
+        self._thread: threading.Thread | None = None
+
+    def activity(self):
+        self._last_activity = time.monotonic()
+
+    def idle(self):
+        if self._thread is not None or time.monotonic() - self._last_activity < MAINTENANCE_IDLE_SECONDS:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            run_maintenance()
+        except (GitCommandError, OSError) as err:
+            print(f"Userdata repository maintenance failed: {err}")
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.join()
@@ -1,25 +1,18 @@
-from datetime import date
+from datetime import date, timedelta
 import dominate
 import dominate.tags as dt
 
 from year import Year
-from balance import get_balance_for_account, account_has_transactions
+from account import Account
+from balance import get_balance_for_account, account_has_transactions, account_sign
+from cost_units import cost_unit_index
+from cube import monthly_cube
+from range_index import AccountRangeIndex, account_range_index
+from vat import vat_summary
 from config import config_get_company_name, config_get_company_number
 
 
-def create_balance_report(filename: str, year: Year, start_date: date=None, end_date: date=None):
-    doc = dominate.document(title='ALOP Counting - Balance report')
-
-    if start_date is None:
-        start_date = year.period_start
-    if end_date is None:
-        end_date = year.period_end
-    if start_date.year != year.year or end_date.year != year.year:
-        raise ValueError("Start or end is not in year")
-    if end_date < start_date:
-        raise ValueError("End is before start")
-
-    css = """\
+REPORT_CSS = """\
 body{
     print-color-adjust: exact;
     -webkit-print-color-adjust: exact;
@@ -40,6 +33,8 @@ tr:nth-child(odd) {
 }
 """
 
+
+def _add_report_css(doc: dominate.document, filename: str, css: str = REPORT_CSS):
     css_filename = f"{filename}.css"
 
     with open(css_filename, "w") as css_file:
@@ -47,8 +42,59 @@ tr:nth-child(odd) {
 
     with doc.head:
         dt.link(rel='stylesheet', href=css_filename)
-        # dt.script(type='text/javascript', src='script.js')
-        pass
+
+
+def _add_report_heading(title: str, year: Year, start_date: date, end_date: date):
+    dt.h1(title)
+    dt.h2(config_get_company_name(), style="margin: 4pt 0 4pt 0")
+    dt.h2(config_get_company_number(), style="margin: 4pt 0 10pt 0")
+    dt.p(f'Accounting year: {year.period_start}  \u2013  {year.period_end}', style="margin: 4pt 0 4pt 0")
+    dt.p(f'Period: {start_date}  \u2013  {end_date}', style="margin: 4pt 0 4pt 0")
+    dt.p(f'Printed: {date.today()}', style="margin: 4pt 0 4pt 0")
+    id = "\u2013" if not year.verification_list.len else str(year.verification_list[-1].id)
+    dt.p(f'Last ver. no.: {id}', style="margin: 4pt 0 4pt 0")
+
+
+def _fmt(amount: float) -> str:
+    return '{:,.2f}'.format(amount).replace(',', ' ')
+
+
+def _period_index(year: Year, start_date: date, end_date: date) -> AccountRangeIndex | None:
+    """The account range index for a period shorter than the year, None for the whole year."""
+    if (start_date, end_date) == (year.period_start, year.period_end):
+        return None
+    return account_range_index(year.verification_list)
+
+
+def _period_balance(acc: Account, year: Year, index: AccountRangeIndex | None, start_date: date, end_date: date) -> tuple[float, float, bool]:
+    """
+    Balance at the start of the period, its change in the period, and if the
+    account has postings in the period.
+    """
+    if index is None:
+        acc_bal = get_balance_for_account(acc, year.verification_list)
+        return acc.incoming_balance, round(acc_bal - acc.incoming_balance, ndigits=2), account_has_transactions(acc, year.verification_list)
+    sign = account_sign(acc)
+    before = index.sum(acc.account_number, acc.account_number, year.period_start, start_date - timedelta(days=1))
+    period = index.sum(acc.account_number, acc.account_number, start_date, end_date)
+    return (round(acc.incoming_balance + sign * before, ndigits=2), round(sign * period, ndigits=2),
+            index.posting_count(acc.account_number, start_date, end_date) > 0)
+
+
+def create_balance_report(filename: str, year: Year, start_date: date=None, end_date: date=None):
+    doc = dominate.document(title='ALOP Counting - Balance report')
+
+    if start_date is None:
+        start_date = year.period_start
+    if end_date is None:
+        end_date = year.period_end
+    if start_date.year != year.year or end_date.year != year.year:
+        raise ValueError("Start or end is not in year")
+    if end_date < start_date:
+        raise ValueError("End is before start")
+    index = _period_index(year, start_date, end_date)
+
+    _add_report_css(doc, filename)
 
     with doc:
         with dt.div(id='header'):
@@ -56,14 +102,7 @@ tr:nth-child(odd) {
 
         with dt.div(style='margin: 50px; font-family: sans-serif; font-size: smaller;'):
             dt.attr(cls='body')
-            dt.h1('Balance report')
-            dt.h2(config_get_company_name(), style="margin: 4pt 0 4pt 0")
-            dt.h2(config_get_company_number(), style="margin: 4pt 0 10pt 0")
-            dt.p(f'Accounting year: {year.period_start}  \u2013  {year.period_end}', style="margin: 4pt 0 4pt 0")
-            dt.p(f'Period: {start_date}  \u2013  {end_date}', style="margin: 4pt 0 4pt 0")
-            dt.p(f'Printed: {date.today()}', style="margin: 4pt 0 4pt 0")
-            id = "\u2013" if not year.verification_list.len else str(year.verification_list[-1].id)
-            dt.p(f'Last ver. no.: {id}', style="margin: 4pt 0 4pt 0")
+            _add_report_heading('Balance report', year, start_date, end_date)
 
             inc_bal_ass_sum = 0
             per_bal_ass_sum = 0
@@ -76,22 +115,24 @@ tr:nth-child(odd) {
                     dt.th("Period")
                     dt.th("Outgoing balance")
                 for acc in year.account_list:
-                    if not (acc.is_asset and (account_has_transactions(acc) or acc.incoming_balance != 0)):
+                    if not acc.is_asset:
+                        continue
+                    inc_bal, per_bal, has_postings = _period_balance(acc, year, index, start_date, end_date)
+                    if not (has_postings or inc_bal != 0):
                         continue
                     with dt.tr():
-                        acc_bal = get_balance_for_account(acc)
                         dt.td(f"{acc.account_number}  {acc.description}", style='text-align: left')
-                        dt.td('{:,.2f}'.format(acc.incoming_balance).replace(',', ' '))
-                        dt.td('{:,.2f}'.format(acc_bal - acc.incoming_balance).replace(',', ' '))
-                        dt.td('{:,.2f}'.format(acc_bal).replace(',', ' '))
-                    inc_bal_ass_sum += acc.incoming_balance
-                    per_bal_ass_sum += acc_bal - acc.incoming_balance
-                    out_bal_ass_sum += acc_bal
+                        dt.td(_fmt(inc_bal))
+                        dt.td(_fmt(per_bal))
+                        dt.td(_fmt(inc_bal + per_bal))
+                    inc_bal_ass_sum += inc_bal
+                    per_bal_ass_sum += per_bal
+                    out_bal_ass_sum += inc_bal + per_bal
                 with dt.tr(style='font-size: medium; border-top: 2px solid black; background-color: white'):
                     dt.th("Sum debts", style='text-align: left')
-                    dt.th('{:,.2f}'.format(inc_bal_ass_sum).replace(',', ' '))
-                    dt.th('{:,.2f}'.format(per_bal_ass_sum).replace(',', ' '))
-                    dt.th('{:,.2f}'.format(out_bal_ass_sum).replace(',', ' '))
+                    dt.th(_fmt(inc_bal_ass_sum))
+                    dt.th(_fmt(per_bal_ass_sum))
+                    dt.th(_fmt(out_bal_ass_sum))
 
             inc_bal_deb_sum = 0
             per_bal_deb_sum = 0
@@ -104,22 +145,24 @@ tr:nth-child(odd) {
                     dt.th("Period")
                     dt.th("Outgoing balance")
                 for acc in year.account_list:
-                    if not (acc.is_debt and (account_has_transactions(acc) or acc.incoming_balance != 0)):
+                    if not acc.is_debt:
+                        continue
+                    inc_bal, per_bal, has_postings = _period_balance(acc, year, index, start_date, end_date)
+                    if not (has_postings or inc_bal != 0):
                         continue
                     with dt.tr():
-                        acc_bal = get_balance_for_account(acc)
                         dt.td(f"{acc.account_number}  {acc.description}", style='text-align: left')
-                        dt.td('{:,.2f}'.format(acc.incoming_balance).replace(',', ' '))
-                        dt.td('{:,.2f}'.format(acc_bal - acc.incoming_balance).replace(',', ' '))
-                        dt.td('{:,.2f}'.format(acc_bal).replace(',', ' '))
-                    inc_bal_deb_sum += acc.incoming_balance
-                    per_bal_deb_sum += acc_bal - acc.incoming_balance
-                    out_bal_deb_sum += acc_bal
+                        dt.td(_fmt(inc_bal))
+                        dt.td(_fmt(per_bal))
+                        dt.td(_fmt(inc_bal + per_bal))
+                    inc_bal_deb_sum += inc_bal
+                    per_bal_deb_sum += per_bal
+                    out_bal_deb_sum += inc_bal + per_bal
                 with dt.tr(style='font-size: medium; border-top: 2px solid black; background-color: white'):
                     dt.th("Sum debts", style='text-align: left')
-                    dt.th('{:,.2f}'.format(inc_bal_deb_sum).replace(',', ' '))
-                    dt.th('{:,.2f}'.format(per_bal_deb_sum).replace(',', ' '))
-                    dt.th('{:,.2f}'.format(out_bal_deb_sum).replace(',', ' '))
+                    dt.th(_fmt(inc_bal_deb_sum))
+                    dt.th(_fmt(per_bal_deb_sum))
+                    dt.th(_fmt(out_bal_deb_sum))
 
             with dt.table(style='text-align: right; margin-top: 60pt'):
                 with dt.tr(style='background-color: white'):
@@ -129,9 +172,9 @@ tr:nth-child(odd) {
                     dt.th("Outgoing balance")
                 with dt.tr(style="font-size: large; border-top: 2px solid black; background-color: white"):
                     dt.th("Difference assets and debts", style='text-align: left')
-                    dt.th('{:,.2f}'.format(inc_bal_ass_sum - inc_bal_deb_sum).replace(',', ' '))
-                    dt.th('{:,.2f}'.format(per_bal_ass_sum - per_bal_deb_sum).replace(',', ' '))
-                    dt.th('{:,.2f}'.format(out_bal_ass_sum - out_bal_deb_sum).replace(',', ' '))
+                    dt.th(_fmt(inc_bal_ass_sum - inc_bal_deb_sum))
+                    dt.th(_fmt(per_bal_ass_sum - per_bal_deb_sum))
+                    dt.th(_fmt(out_bal_ass_sum - out_bal_deb_sum))
 
     with open(filename, "w") as html_file:
         html_file.write(str(doc))
@@ -148,37 +191,9 @@ def create_result_report(filename: str, year: Year, start_date: date=None, end_d
         raise ValueError("Start or end is not in year")
     if end_date < start_date:
         raise ValueError("End is before start")
+    index = _period_index(year, start_date, end_date)
 
-    css = """\
-body{
-    print-color-adjust: exact;
-    -webkit-print-color-adjust: exact;
-}
-
-table {
-  border-collapse: collapse;
-  width: 500pt;
-}
-
-th, td {
-  padding: 8px;
-  min-width: 80pt
-}
-
-tr:nth-child(odd) {
-    background-color: #f0f0f0;
-}
-"""
-
-    css_filename = f"{filename}.css"
-
-    with open(css_filename, "w") as css_file:
-        css_file.write(css)
-
-    with doc.head:
-        dt.link(rel='stylesheet', href=css_filename)
-        # dt.script(type='text/javascript', src='script.js')
-        pass
+    _add_report_css(doc, filename)
 
     with doc:
         with dt.div(id='header'):
@@ -186,14 +201,7 @@ tr:nth-child(odd) {
 
         with dt.div(style='margin: 50px; font-family: sans-serif; font-size: smaller;'):
             dt.attr(cls='body')
-            dt.h1('Result report')
-            dt.h2(config_get_company_name(), style="margin: 4pt 0 4pt 0")
-            dt.h2(config_get_company_number(), style="margin: 4pt 0 10pt 0")
-            dt.p(f'Accounting year: {year.period_start}  \u2013  {year.period_end}', style="margin: 4pt 0 4pt 0")
-            dt.p(f'Period: {start_date}  \u2013  {end_date}', style="margin: 4pt 0 4pt 0")
-            dt.p(f'Printed: {date.today()}', style="margin: 4pt 0 4pt 0")
-            id = "\u2013" if not year.verification_list.len else str(year.verification_list[-1].id)
-            dt.p(f'Last ver. no.: {id}', style="margin: 4pt 0 4pt 0")
+            _add_report_heading('Result report', year, start_date, end_date)
 
             per_bal_inc_sum = 0
             dt.h2('Incomes', style='margin: 40pt 0 0 0')
@@ -202,16 +210,19 @@ tr:nth-child(odd) {
                     dt.th("")
                     dt.th("Period")
                 for acc in year.account_list:
-                    if not (acc.is_income and account_has_transactions(acc)):
+                    if not acc.is_income:
+                        continue
+                    # Result accounts have no incoming balance
+                    _, acc_bal, has_postings = _period_balance(acc, year, index, start_date, end_date)
+                    if not has_postings:
                         continue
                     with dt.tr():
-                        acc_bal = get_balance_for_account(acc)
                         dt.td(f"{acc.account_number}  {acc.description}", style='text-align: left')
-                        dt.td('{:,.2f}'.format(acc_bal).replace(',', ' '))
+                        dt.td(_fmt(acc_bal))
                     per_bal_inc_sum += acc_bal
                 with dt.tr(style='font-size: medium; border-top: 2px solid black; background-color: white'):
                     dt.th("Sum incomes", style='text-align: left')
-                    dt.th('{:,.2f}'.format(per_bal_inc_sum).replace(',', ' '))
+                    dt.th(_fmt(per_bal_inc_sum))
 
             per_bal_cos_sum = 0
             dt.h2('Costs', style='margin: 40pt 0 0 0')
@@ -220,16 +231,19 @@ tr:nth-child(odd) {
                     dt.th("")
                     dt.th("Period")
                 for acc in year.account_list:
-                    if not (acc.is_cost and account_has_transactions(acc)):
+                    if not acc.is_cost:
+                        continue
+                    # Result accounts have no incoming balance
+                    _, acc_bal, has_postings = _period_balance(acc, year, index, start_date, end_date)
+                    if not has_postings:
                         continue
                     with dt.tr():
-                        acc_bal = get_balance_for_account(acc)
                         dt.td(f"{acc.account_number}  {acc.description}", style='text-align: left')
-                        dt.td('{:,.2f}'.format(acc_bal).replace(',', ' '))
+                        dt.td(_fmt(acc_bal))
                     per_bal_cos_sum += acc_bal
                 with dt.tr(style='font-size: medium; border-top: 2px solid black; background-color: white'):
                     dt.th("Sum costs", style='text-align: left')
-                    dt.th('{:,.2f}'.format(per_bal_cos_sum).replace(',', ' '))
+                    dt.th(_fmt(per_bal_cos_sum))
 
             with dt.table(style='text-align: right; margin-top: 60pt'):
                 with dt.tr(style='background-color: white'):
@@ -237,7 +251,264 @@ tr:nth-child(odd) {
                     dt.th("Period")
                 with dt.tr(style="font-size: large; border-top: 2px solid black; background-color: white"):
                     dt.th("Calculated result", style='text-align: left')
-                    dt.th('{:,.2f}'.format(per_bal_inc_sum - per_bal_cos_sum).replace(',', ' '))
+                    dt.th(_fmt(per_bal_inc_sum - per_bal_cos_sum))
+
+    with open(filename, "w") as html_file:
+        html_file.write(str(doc))
+
+
+def create_cost_unit_result_report(filename: str, year: Year):
+    """Result report for every cost unit of the year, from the cost unit index in one pass."""
+    doc = dominate.document(title='ALOP Counting - Cost unit result report')
+    _add_report_css(doc, filename)
+
+    index = cost_unit_index(year.verification_list)
+    results: dict[str, float] = {}
+
+    with doc:
+        with dt.div(id='header'):
+            pass
+
+        with dt.div(style='margin: 50px; font-family: sans-serif; font-size: smaller;'):
+            dt.attr(cls='body')
+            _add_report_heading('Cost unit result report', year, year.period_start, year.period_end)
+
+            for unit in index.units():
+                movements = index.movements(unit)
+                accounts = [year.account_list.find_account(acc_num) for acc_num in sorted(movements)]
+                dt.h2(f'Cost unit: {unit}', style='margin: 40pt 0 0 0')
+                with dt.table(style='text-align: right'):
+                    with dt.tr(style="border-bottom: 2px solid black; background-color: white"):
+                        dt.th("")
+                        dt.th("Period")
+                    inc_sum = 0
+                    cos_sum = 0
+                    for acc in accounts:
+                        if acc is None or not (acc.is_income or acc.is_cost):
+                            continue
+                        acc_bal = account_sign(acc) * movements[acc.account_number]
+                        with dt.tr():
+                            dt.td(f"{acc.account_number}  {acc.description}", style='text-align: left')
+                            dt.td(_fmt(acc_bal))
+                        if acc.is_income:
+                            inc_sum += acc_bal
+                        else:
+                            cos_sum += acc_bal
+                    with dt.tr(style='font-size: medium; border-top: 2px solid black; background-color: white'):
+                        dt.th("Sum incomes", style='text-align: left')
+                        dt.th(_fmt(inc_sum))
+                    with dt.tr(style='font-size: medium; background-color: white'):
+                        dt.th("Sum costs", style='text-align: left')
+                        dt.th(_fmt(cos_sum))
+                    with dt.tr(style='font-size: medium; background-color: white'):
+                        dt.th("Calculated result", style='text-align: left')
+                        dt.th(_fmt(inc_sum - cos_sum))
+                results[unit] = inc_sum - cos_sum
+
+            dt.h2('All cost units', style='margin: 60pt 0 0 0')
+            with dt.table(style='text-align: right'):
+                with dt.tr(style="border-bottom: 2px solid black; background-color: white"):
+                    dt.th("")
+                    dt.th("Calculated result")
+                for unit, result in results.items():
+                    with dt.tr():
+                        dt.td(unit, style='text-align: left')
+                        dt.td(_fmt(result))
+                with dt.tr(style="font-size: large; border-top: 2px solid black; background-color: white"):
+                    dt.th("Sum", style='text-align: left')
+                    dt.th(_fmt(sum(results.values())))
+
+    with open(filename, "w") as html_file:
+        html_file.write(str(doc))
+
+
+def create_vat_report(filename: str, year: Year, start_date: date=None, end_date: date=None):
+    """VAT summary and BAS group subtotals for a period, from the account range index."""
+    doc = dominate.document(title='ALOP Counting - VAT report')
+
+    if start_date is None:
+        start_date = year.period_start
+    if end_date is None:
+        end_date = year.period_end
+    if start_date.year != year.year or end_date.year != year.year:
+        raise ValueError("Start or end is not in year")
+    if end_date < start_date:
+        raise ValueError("End is before start")
+
+    _add_report_css(doc, filename)
+
+    index = account_range_index(year.verification_list)
+    vat = vat_summary(index, start_date, end_date)
+
+    with doc:
+        with dt.div(id='header'):
+            pass
+
+        with dt.div(style='margin: 50px; font-family: sans-serif; font-size: smaller;'):
+            dt.attr(cls='body')
+            _add_report_heading('VAT report', year, start_date, end_date)
+
+            dt.h2('VAT', style='margin: 40pt 0 0 0')
+            with dt.table(style='text-align: right'):
+                with dt.tr(style="border-bottom: 2px solid black; background-color: white"):
+                    dt.th("")
+                    dt.th("Period")
+                for rate, amount in vat.outgoing.items():
+                    with dt.tr():
+                        dt.td(f"Outgoing VAT {rate}", style='text-align: left')
+                        dt.td(_fmt(amount))
+                with dt.tr():
+                    dt.td("Incoming VAT", style='text-align: left')
+                    dt.td(_fmt(vat.incoming))
+                with dt.tr(style="font-size: large; border-top: 2px solid black; background-color: white"):
+                    dt.th("VAT to pay (negative: refund)", style='text-align: left')
+                    dt.th(_fmt(vat.to_pay))
+
+            for digits in (2, 3):
+                dt.h2(f'Subtotals per {digits}-digit account group', style='margin: 40pt 0 0 0')
+                with dt.table(style='text-align: right'):
+                    with dt.tr(style="border-bottom: 2px solid black; background-color: white"):
+                        dt.th("Group", style='text-align: left')
+                        dt.th("Debit - credit")
+                    for group, amount in index.group_sums(digits, start_date, end_date).items():
+                        with dt.tr():
+                            dt.td(str(group), style='text-align: left')
+                            dt.td(_fmt(amount))
+
+    with open(filename, "w") as html_file:
+        html_file.write(str(doc))
+
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+MONTHLY_REPORT_CSS = REPORT_CSS.replace("width: 500pt;", "width: 100%;").replace("min-width: 80pt", "min-width: 40pt")
+
+
+def create_monthly_result_report(filename: str, year: Year):
+    """Result per income and cost account for each month of the year, from the monthly cube."""
+    doc = dominate.document(title='ALOP Counting - Monthly result report')
+    _add_report_css(doc, filename, MONTHLY_REPORT_CSS)
+
+    cube = monthly_cube(year.verification_list)
+
+    with doc:
+        with dt.div(id='header'):
+            pass
+
+        with dt.div(style='margin: 50px; font-family: sans-serif; font-size: smaller;'):
+            dt.attr(cls='body')
+            _add_report_heading('Monthly result report', year, year.period_start, year.period_end)
+
+            result = [0.0] * 12
+            for title, is_included in (("Incomes", lambda acc: acc.is_income), ("Costs", lambda acc: acc.is_cost)):
+                dt.h2(title, style='margin: 40pt 0 0 0')
+                sums = [0.0] * 12
+                with dt.table(style='text-align: right'):
+                    with dt.tr(style="border-bottom: 2px solid black; background-color: white"):
+                        dt.th("")
+                        [dt.th(month) for month in MONTHS]
+                        dt.th("Total")
+                    for acc_num in cube.accounts():
+                        acc = year.account_list.find_account(acc_num)
+                        if acc is None or not is_included(acc):
+                            continue
+                        months = [account_sign(acc) * movement for movement in cube.monthly_movements(acc_num)]
+                        sums = [s + m for s, m in zip(sums, months)]
+                        with dt.tr():
+                            dt.td(f"{acc.account_number}  {acc.description}", style='text-align: left')
+                            [dt.td(_fmt(amount)) for amount in months]
+                            dt.td(_fmt(sum(months)))
+                    with dt.tr(style='font-size: medium; border-top: 2px solid black; background-color: white'):
+                        dt.th(f"Sum {title.lower()}", style='text-align: left')
+                        [dt.th(_fmt(amount)) for amount in sums]
+                        dt.th(_fmt(sum(sums)))
+                result = [r + s if title == "Incomes" else r - s for r, s in zip(result, sums)]
+
+            with dt.table(style='text-align: right; margin-top: 60pt'):
+                with dt.tr(style='background-color: white'):
+                    dt.th("")
+                    [dt.th(month) for month in MONTHS]
+                    dt.th("Total")
+                with dt.tr(style="font-size: large; border-top: 2px solid black; background-color: white"):
+                    dt.th("Calculated result", style='text-align: left')
+                    [dt.th(_fmt(amount)) for amount in result]
+                    dt.th(_fmt(sum(result)))
+
+    with open(filename, "w") as html_file:
+        html_file.write(str(doc))
+
+
+def create_comparison_result_report(filename: str, year: Year):
+    """Result per account and month of the year compared with the previous year, from the monthly cubes."""
+    doc = dominate.document(title='ALOP Counting - Result comparison report')
+    _add_report_css(doc, filename, MONTHLY_REPORT_CSS)
+
+    prev_year_num = year.year - 1
+    # At the same commit for a past state of the ledger
+    prev_year = year.other_year(prev_year_num)
+    has_prev_year = prev_year is not None
+    cube = monthly_cube(year.verification_list)
+    prev_cube = monthly_cube(prev_year.verification_list) if has_prev_year else None
+
+    def year_totals(cube, acc_list) -> dict[int, list[float]]:
+        totals = {}
+        if cube is None:
+            return totals
+        for acc_num in cube.accounts():
+            acc = acc_list.find_account(acc_num)
+            if acc is not None and (acc.is_income or acc.is_cost):
+                totals[acc_num] = [account_sign(acc) * movement for movement in cube.monthly_movements(acc_num)]
+        return totals
+
+    totals = year_totals(cube, year.account_list)
+    prev_totals = year_totals(prev_cube, prev_year.account_list) if has_prev_year else {}
+
+    with doc:
+        with dt.div(id='header'):
+            pass
+
+        with dt.div(style='margin: 50px; font-family: sans-serif; font-size: smaller;'):
+            dt.attr(cls='body')
+            _add_report_heading(f'Result comparison {year.year} / {prev_year_num}', year, year.period_start, year.period_end)
+
+            dt.h2('Accounts', style='margin: 40pt 0 0 0')
+            with dt.table(style='text-align: right'):
+                with dt.tr(style="border-bottom: 2px solid black; background-color: white"):
+                    dt.th("")
+                    dt.th(str(year.year))
+                    dt.th(str(prev_year_num))
+                    dt.th("Difference")
+                for acc_num in sorted(set(totals) | set(prev_totals)):
+                    acc = year.account_list.find_account(acc_num) or (prev_year.account_list.find_account(acc_num) if has_prev_year else None)
+                    cur = sum(totals.get(acc_num, []))
+                    prev = sum(prev_totals.get(acc_num, []))
+                    with dt.tr():
+                        dt.td(f"{acc.account_number}  {acc.description}", style='text-align: left')
+                        dt.td(_fmt(cur))
+                        dt.td(_fmt(prev))
+                        dt.td(_fmt(cur - prev))
+
+            def monthly_result(year_totals: dict[int, list[float]], acc_list) -> list[float]:
+                result = [0.0] * 12
+                for acc_num, months in year_totals.items():
+                    factor = 1 if acc_list.find_account(acc_num).is_income else -1
+                    result = [r + factor * m for r, m in zip(result, months)]
+                return result
+
+            dt.h2('Calculated result per month', style='margin: 40pt 0 0 0')
+            with dt.table(style='text-align: right'):
+                with dt.tr(style="border-bottom: 2px solid black; background-color: white"):
+                    dt.th("")
+                    [dt.th(month) for month in MONTHS]
+                    dt.th("Total")
+                rows = [(str(year.year), monthly_result(totals, year.account_list))]
+                if has_prev_year:
+                    rows.append((str(prev_year_num), monthly_result(prev_totals, prev_year.account_list)))
+                for label, result in rows:
+                    with dt.tr():
+                        dt.td(label, style='text-align: left')
+                        [dt.td(_fmt(amount)) for amount in result]
+                        dt.td(_fmt(sum(result)))
 
     with open(filename, "w") as html_file:
         html_file.write(str(doc))
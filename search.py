@@ -0,0 +1,118 @@
+import bisect
+import re
+
+from verification import Verification, VerificationList
+
+# Amounts like 125.50 or 125,50 are kept as one token
+_TOKEN_REGEX = re.compile(r"\d+(?:[.,]\d+)?|\w+")
+
+
+def _amount_token(value: float) -> str:
+    return f"{value:.2f}"
+
+
+def _query_tokens(text: str) -> list[str]:
+    return [token.replace(",", ".") for token in _TOKEN_REGEX.findall(text.lower())]
+
+
+def verification_tokens(ver: Verification) -> set[str]:
+    """Words of the notes, account numbers and amounts of a verification."""
+    tokens = set(_query_tokens(ver.notes))
+    for trans in ver.transactions:
+        tokens.update(_query_tokens(trans.notes))
+        tokens.add(str(trans.account_number))
+        tokens.add(_amount_token(trans.debit or trans.credit))
+        if trans.cost_unit:
+            tokens.update(_query_tokens(trans.cost_unit))
+    return tokens
+
+
+class SearchIndex:
+    """
+    Inverted index from tokens to verification ids of one year. Query terms
+    are matched as prefixes of the indexed tokens, and all terms must match.
+    A number also matches the amount with that value.
+    """
+    def __init__(self, verification_list: VerificationList):
+        self.year = verification_list.year
+        self._postings: dict[str, set[int]] = {}
+        self._sorted_tokens: list[str] | None = None
+        for ver in verification_list:
+            self._add(ver)
+
+    def _add(self, ver: Verification):
+        for token in verification_tokens(ver):
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                self._sorted_tokens = None
+            ids.add(ver.id)
+
+    def _remove(self, ver: Verification):
+        for token in verification_tokens(ver):
+            ids = self._postings.get(token)
+            if ids is not None:
+                ids.discard(ver.id)
+                if not ids:
+                    del self._postings[token]
+                    self._sorted_tokens = None
+
+    def update(self, old: Verification | None, new: Verification | None):
+        if old is not None:
+            self._remove(old)
+        if new is not None:
+            self._add(new)
+
+    def _term_ids(self, term: str) -> set[int]:
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._postings)
+        ids: set[int] = set()
+        idx = bisect.bisect_left(self._sorted_tokens, term)
+        while idx < len(self._sorted_tokens) and self._sorted_tokens[idx].startswith(term):
+            ids |= self._postings[self._sorted_tokens[idx]]
+            idx += 1
+        try:
+            ids |= self._postings.get(_amount_token(float(term)), set())
+        except ValueError:
+            pass
+        return ids
+
+    def search(self, query: str) -> list[int]:
+        """Ids of the verifications matching all terms of the query, sorted."""
+        result: set[int] | None = None
+        for term in _query_tokens(query):
+            ids = self._term_ids(term)
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+        return sorted(result) if result else []
+
+
+_search_indexes: dict[int, SearchIndex] = {}
+# The list, and its revision, each cached index follows. Another list of the
+# same year, e.g. the year at an earlier commit, gets its own index.
+_search_index_sources: dict[int, tuple[VerificationList, int]] = {}
+
+
+def _on_verification_changed(verification_list: VerificationList, old: Verification | None, new: Verification | None):
+    source = _search_index_sources.get(verification_list.year)
+    if source is None or source[0] is not verification_list:
+        # The index follows another list of the year, rebuilt when asked for
+        return
+    if old is None and new is None:
+        # The journal was reloaded
+        _search_indexes[verification_list.year] = SearchIndex(verification_list)
+    else:
+        _search_indexes[verification_list.year].update(old, new)
+    _search_index_sources[verification_list.year] = (verification_list, verification_list.revision)
+
+
+def search_index(verification_list: VerificationList) -> SearchIndex:
+    """Search index of the list, built on first use and then kept up to date with the changes."""
+    year = verification_list.year
+    source = _search_index_sources.get(year)
+    if source is None or source[0] is not verification_list or source[1] != verification_list.revision:
+        _search_indexes[year] = SearchIndex(verification_list)
+        _search_index_sources[year] = (verification_list, verification_list.revision)
+        verification_list.add_change_listener(_on_verification_changed)
+    return _search_indexes[year]
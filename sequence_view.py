@@ -0,0 +1,34 @@
+from typing import Iterator, Sequence, TypeVar, overload
+
+T = TypeVar("T")
+
+
+class SequenceView(Sequence[T]):
+    """Read-only view of a list, without copying it. Changes to the list are visible through the view."""
+    __slots__ = ("_items",)
+
+    def __init__(self, items: list[T]):
+        self._items = items
+
+    @overload
+    def __getitem__(self, idx: int) -> T: ...
+    @overload
+    def __getitem__(self, idx: slice) -> list[T]: ...
+
+    def __getitem__(self, idx):
+        return self._items[idx]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
+
+    def __reversed__(self) -> Iterator[T]:
+        return reversed(self._items)
+
+    def __contains__(self, item) -> bool:
+        return item in self._items
+
+    def __repr__(self) -> str:
+        return f"SequenceView({self._items!r})"
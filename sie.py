@@ -0,0 +1,286 @@
+import dataclasses as dc
+import datetime
+import re
+import time
+from pathlib import Path
+from typing import Iterator
+
+from _version import __version__
+from account import Account, account_list, account_lists_years, create_new_account_list
+from balance import account_sign
+from cost_units import cost_unit_index
+from config import config_do_git_commit, config_get_company_name, config_get_company_number
+from posting import PostingBatch, PostingBatchError
+from transaction import Transaction
+from verification import verification_list, verification_lists_years, create_new_verification_list
+from year import get_year_end_movements
+
+# Dimension 1 is "kostnadsställe/resultatenhet", used for the cost unit of a transaction
+SIE_COST_UNIT_DIMENSION = "1"
+# SIE files are by default written in IBM PC 8-bit extended ASCII (#FORMAT PC8)
+SIE_ENCODING = "cp437"
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+_SIE_TOKEN_REGEX = re.compile(r'"((?:[^"\\]|\\.)*)"|(\{[^}]*\})|(\S+)')
+
+
+@dc.dataclass
+class SieFiscalYear:
+    year_index: int
+    start: datetime.date
+    end: datetime.date
+
+
+@dc.dataclass
+class SieAccount:
+    account_number: int
+    description: str
+
+
+@dc.dataclass
+class SieBalance:
+    label: str
+    year_index: int
+    account_number: int
+    amount: float
+
+
+@dc.dataclass
+class SieTransaction:
+    account_number: int
+    amount: float
+    notes: str = ""
+    cost_unit: str = ""
+
+
+@dc.dataclass
+class SieVerification:
+    series: str
+    number: str
+    date: datetime.date
+    notes: str
+    transactions: list[SieTransaction] = dc.field(default_factory=list)
+
+
+SieRecord = SieFiscalYear | SieAccount | SieBalance | SieVerification
+
+
+def _tokenize(line: str) -> list[str]:
+    tokens = []
+    for match in _SIE_TOKEN_REGEX.finditer(line):
+        quoted, obj, plain = match.groups()
+        if quoted is not None:
+            tokens.append(quoted.replace('\\"', '"'))
+        else:
+            tokens.append(obj if obj is not None else plain)
+    return tokens
+
+
+def _parse_cost_unit(objects: str) -> str:
+    # Object list: {dimension object dimension object ...}
+    tokens = _tokenize(objects.strip("{}"))
+    for dim, obj in zip(tokens[0::2], tokens[1::2]):
+        if dim == SIE_COST_UNIT_DIMENSION:
+            return obj
+    return ""
+
+
+def _parse_date(value: str) -> datetime.date:
+    return datetime.date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+
+
+def _field(tokens: list[str], idx: int, default: str = "") -> str:
+    return tokens[idx] if idx < len(tokens) else default
+
+
+def read_sie(filepath: str | Path, encoding: str = SIE_ENCODING) -> Iterator[SieRecord]:
+    """
+    Stream the records of a SIE4 file, line by line. Only the records
+    needed for import are returned: #RAR, #KONTO, #IB, #UB and #VER with
+    its #TRANS rows. Other records are skipped.
+    """
+    ver: SieVerification | None = None
+    with open(filepath, "r", encoding=encoding, errors="replace") as sie_file:
+        for line_num, line in enumerate(sie_file, start=1):
+            tokens = _tokenize(line)
+            if not tokens:
+                continue
+            label = tokens[0].upper()
+            try:
+                if label == "#VER":
+                    ver = SieVerification(_field(tokens, 1), _field(tokens, 2), _parse_date(tokens[3]), _field(tokens, 4))
+                elif label == "#TRANS" and ver is not None:
+                    ver.transactions.append(SieTransaction(int(tokens[1]), float(tokens[3]), _field(tokens, 5), _parse_cost_unit(tokens[2])))
+                elif label == "}" and ver is not None:
+                    yield ver
+                    ver = None
+                elif label == "#KONTO":
+                    yield SieAccount(int(tokens[1]), _field(tokens, 2))
+                elif label in ("#IB", "#UB"):
+                    yield SieBalance(label, int(tokens[1]), int(tokens[2]), float(tokens[3]))
+                elif label == "#RAR":
+                    yield SieFiscalYear(int(tokens[1]), _parse_date(tokens[2]), _parse_date(tokens[3]))
+            except (IndexError, ValueError) as err:
+                raise ValueError(f"{filepath}:{line_num}: bad SIE record '{line.strip()}': {err}") from None
+
+
+def _transaction_from_sie(trans: SieTransaction) -> Transaction:
+    # SIE amounts are positive for debit and negative for credit
+    amount = round(trans.amount, ndigits=2)
+    return Transaction(trans.account_number, amount if amount > 0 else 0.0, -amount if amount < 0 else 0.0, trans.notes, trans.cost_unit)
+
+
+def _ensure_year(year: int):
+    if year not in verification_lists_years():
+        print(f"Creating year {year} for import")
+        create_new_verification_list(year)
+        create_new_account_list(year)
+
+
+def import_sie(filepath: str | Path, encoding: str = SIE_ENCODING) -> int:
+    """
+    Import accounts, incoming balances and verifications of the current
+    fiscal year (#RAR 0) of a SIE4 file. The verifications are validated as
+    one posting batch, with the accounts of the file added to the year, and
+    nothing is imported into a closed year or if any verification is
+    unbalanced or uses an account that is neither in the file nor in the
+    chart of accounts. They get new ids after the ones already in the year.
+    Accounts and the new verifications are saved once, followed by one git
+    commit. Returns the number of imported verifications.
+    """
+    print(f"Importing SIE file: {Path(filepath).absolute()}")
+    start_time = time.perf_counter()
+    last_progress = start_time
+
+    year: int | None = None
+    accounts: dict[int, Account] = {}
+    incoming: dict[int, float] = {}
+    batch: PostingBatch | None = None
+
+    def start_year(new_year: int):
+        nonlocal year, batch
+        year = new_year
+        _ensure_year(year)
+        batch = PostingBatch(year, f"SIE import - {Path(filepath).name}", add_missing_accounts=True)
+
+    for record in read_sie(filepath, encoding):
+        if isinstance(record, SieFiscalYear):
+            if record.year_index == 0:
+                start_year(record.start.year)
+        elif isinstance(record, SieAccount):
+            accounts[record.account_number] = Account(record.account_number, record.description)
+        elif isinstance(record, SieBalance):
+            if record.label == "#IB" and record.year_index == 0:
+                incoming[record.account_number] = record.amount
+        elif isinstance(record, SieVerification):
+            if year is None:
+                # No #RAR, use the year of the first verification
+                start_year(record.date.year)
+            if record.date.year != year:
+                print(f"Verification {record.series}{record.number} dated {record.date} is not in year {year}, ignoring")
+                continue
+            notes = f"{record.series}{record.number} {record.notes}".strip()
+            batch.add(record.date, [_transaction_from_sie(t) for t in record.transactions], notes)
+            now = time.perf_counter()
+            if now - last_progress >= PROGRESS_INTERVAL_SECONDS:
+                last_progress = now
+                print(f"Read {len(batch)} verifications ({len(batch) / (now - start_time):.0f} ver/s)")
+
+    if year is None:
+        print("No fiscal year nor verifications in SIE file, nothing imported")
+        return 0
+
+    # The accounts of the file are known to the batch, removed again if it is invalid
+    acc_list = account_list(year)
+    known_accounts = {acc.account_number: acc for acc in acc_list}
+    added_accounts = [acc for acc_num, acc in accounts.items() if acc_num not in known_accounts]
+    for acc in added_accounts:
+        acc_list.add_account(acc)
+    errors, _ = batch.validate()
+    if errors:
+        for acc in added_accounts:
+            acc_list.remove_account(acc)
+        raise PostingBatchError(errors)
+
+    for acc_num, amount in incoming.items():
+        acc = acc_list.find_account(acc_num)
+        if acc is None:
+            acc = Account(acc_num, "")
+            acc_list.add_account(acc)
+        # Incoming balances are stored with the sign of the account
+        acc.incoming_balance = round(-amount if acc.is_debt or acc.is_income else amount, ndigits=2)
+    acc_list.save_accounts()
+    num_imported = len(batch.commit(git_commit=False))
+    config_do_git_commit(f"SIE import - {num_imported} verifications from {Path(filepath).name}")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Imported {num_imported} verifications into year {year} in {elapsed:.2f} s ({num_imported / max(elapsed, 1e-9):.0f} ver/s)")
+    return num_imported
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('"', '\\"').replace("\n", " ") + '"'
+
+
+def _format_date(value: datetime.date) -> str:
+    return value.strftime("%Y%m%d")
+
+
+def sie_lines(year: int) -> Iterator[str]:
+    """
+    Lines of a SIE4 file for one year. Opening and closing balances come
+    from one pass over the year-end movements, the verifications are
+    streamed from the verification list.
+    """
+    acc_list = account_list(year)
+    movements = get_year_end_movements(year)
+
+    yield "#FLAGGA 0"
+    yield f"#PROGRAM {_quote('ALOPCounting')} {__version__}"
+    yield "#FORMAT PC8"
+    yield f"#GEN {_format_date(datetime.date.today())}"
+    yield "#SIETYP 4"
+    yield f"#ORGNR {config_get_company_number()}"
+    yield f"#FNAMN {_quote(config_get_company_name())}"
+    yield f"#RAR 0 {year}0101 {year}1231"
+    cost_units = cost_unit_index(verification_list(year)).units()
+    if cost_units:
+        yield f"#DIM {SIE_COST_UNIT_DIMENSION} {_quote('Resultatenhet')}"
+        for unit in cost_units:
+            yield f"#OBJEKT {SIE_COST_UNIT_DIMENSION} {_quote(unit)} {_quote(unit)}"
+    for acc in acc_list:
+        yield f"#KONTO {acc.account_number} {_quote(acc.description)}"
+    for acc in acc_list:
+        # SIE amounts are positive for debit, incoming balances are stored with the sign of the account
+        incoming = account_sign(acc) * acc.incoming_balance
+        outgoing = incoming + movements.get(acc.account_number, 0.0)
+        if acc.is_asset or acc.is_debt:
+            yield f"#IB 0 {acc.account_number} {incoming:.2f}"
+            yield f"#UB 0 {acc.account_number} {outgoing:.2f}"
+        elif acc.account_number in movements:
+            yield f"#RES 0 {acc.account_number} {outgoing:.2f}"
+    for ver in verification_list(year):
+        yield f"#VER A {ver.id} {_format_date(ver.date)} {_quote(ver.notes)}"
+        yield "{"
+        for trans in ver.transactions:
+            objects = f"{SIE_COST_UNIT_DIMENSION} {_quote(trans.cost_unit)}" if trans.cost_unit else ""
+            yield f'#TRANS {trans.account_number} {{{objects}}} {trans.debit - trans.credit:.2f} "" {_quote(trans.notes)}'
+        yield "}"
+
+
+def export_sie(out_dir: str | Path, years: list[int] | None = None, encoding: str = SIE_ENCODING) -> list[Path]:
+    """Write one SIE4 file per year, default all years. Returns the written files."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if years is None:
+        years = account_lists_years()
+    written: list[Path] = []
+    for year in years:
+        path = out_dir / f"ledger_{year}.se"
+        print(f"Exporting year {year} to SIE file: {path.absolute()}")
+        with open(path, "w", encoding=encoding, errors="replace", newline="\r\n") as sie_file:
+            for line in sie_lines(year):
+                sie_file.write(line)
+                sie_file.write("\n")
+        written.append(path)
+    return written
@@ -0,0 +1,103 @@
+import datetime
+import shutil
+from pathlib import Path
+
+import pytest
+
+import account
+import balance
+import config
+import cost_units
+import cube
+import file_watch
+import kontoplan
+import range_index
+import search
+import verification
+import year
+import year_archive
+from posting import PostingBatch
+from transaction import Transaction
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+CONFIG = """\
+[userdata]
+userdata_storage_path = "./userdata"
+accounts_filename = "accounts.json"
+base_accounts_filename = "base_accounts.json"
+
+[info]
+company_name = "Test AB"
+company_number = "800000-0000"
+"""
+
+
+def _reset_globals():
+    account._account_lists = None
+    verification._verification_lists = None
+    year._year = None
+    kontoplan._chart_of_accounts = None
+    for indexes in (balance._posting_indexes, cost_units._cost_unit_indexes, range_index._account_range_indexes,
+                    cube._cubes, cube._cube_sources, search._search_indexes, search._search_index_sources):
+        indexes.clear()
+    for archive in year_archive._archives.values():
+        archive.close()
+    year_archive._archives.clear()
+    file_watch._watchers.clear()
+    config._toml_config = config.DEFAULT_TOML_CONFIG
+
+
+@pytest.fixture
+def ledger_dir(tmp_path, monkeypatch) -> Path:
+    """A working directory with a config and a userdata dir, nothing loaded."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GIT_AUTHOR_NAME", "Test")
+    monkeypatch.setenv("GIT_AUTHOR_EMAIL", "test@example.com")
+    monkeypatch.setenv("GIT_COMMITTER_NAME", "Test")
+    monkeypatch.setenv("GIT_COMMITTER_EMAIL", "test@example.com")
+    _reset_globals()
+    (tmp_path / "config.toml").write_text(CONFIG)
+    shutil.copy(REPO_DIR / "kontoplan.txt", tmp_path / "kontoplan.txt")
+    userdata = tmp_path / "userdata"
+    userdata.mkdir()
+    shutil.copy(REPO_DIR / "build-bundles" / "base_accounts.json", userdata / "base_accounts.json")
+    yield tmp_path
+    _reset_globals()
+
+
+def create_years(ledger_dir: Path, *years: int):
+    for new_year in years:
+        (ledger_dir / "userdata" / str(new_year)).mkdir()
+        shutil.copy(ledger_dir / "userdata" / "base_accounts.json", ledger_dir / "userdata" / str(new_year) / "accounts.json")
+
+
+def load_ledger():
+    assert config.config_init()
+    account.account_list_init()
+    verification.verification_list_init()
+    year.year_init()
+
+
+def reload_ledger():
+    """Forget everything loaded and load the ledger from disk again, as on a restart."""
+    _reset_globals()
+    load_ledger()
+
+
+@pytest.fixture
+def ledger(ledger_dir):
+    """Factory loading a ledger with the given, empty, years."""
+    def create(*years: int) -> Path:
+        create_years(ledger_dir, *years)
+        load_ledger()
+        return ledger_dir
+    return create
+
+
+def post(date: datetime.date, rows: list[tuple[int, float]], notes: str = "") -> int:
+    """Post one verification, rows of (account, debit - credit). Returns its id."""
+    batch = PostingBatch(date.year, "Test", add_missing_accounts=True)
+    ver = batch.add(date, [Transaction(acc_num, max(amount, 0.0), max(-amount, 0.0)) for acc_num, amount in rows], notes)
+    batch.commit(git_commit=False)
+    return ver.id
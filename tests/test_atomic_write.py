@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+import atomic_write
+from atomic_write import TEMP_PREFIX, atomic_write_files
+
+
+def test_write_and_skip_unchanged(tmp_path):
+    files = {tmp_path / "a.json": "a", tmp_path / "b.json": b"b"}
+    assert atomic_write_files(files) == 2
+    assert (tmp_path / "a.json").read_text() == "a"
+    assert atomic_write_files(files) == 0
+    assert atomic_write_files({tmp_path / "a.json": "a2"}, remove=[tmp_path / "b.json"]) == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.json"]
+
+
+def test_failed_rename_leaves_no_temp_files(tmp_path, monkeypatch):
+    (tmp_path / "a.json").write_text("old")
+    replace = os.replace
+    calls = []
+
+    def failing_replace(src, dst):
+        calls.append(dst)
+        if len(calls) == 2:
+            raise OSError("disk gone")
+        replace(src, dst)
+    monkeypatch.setattr(os, "replace", failing_replace)
+
+    with pytest.raises(OSError):
+        atomic_write_files({tmp_path / "a.json": "new", tmp_path / "b.json": "b", tmp_path / "c.json": "c"})
+    assert not [path for path in tmp_path.iterdir() if path.name.startswith(TEMP_PREFIX)]
+    # Every file is either old or new
+    assert (tmp_path / "a.json").read_text() in ("old", "new")
+    assert not (tmp_path / "b.json").exists() or (tmp_path / "b.json").read_text() == "b"
+
+
+def test_one_filesystem_sync_for_many_files(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(atomic_write, "_syncfs", lambda fd: synced.append(fd) or 0)
+    monkeypatch.setattr(atomic_write, "_sync_file", lambda path: pytest.fail("synced per file"))
+    (tmp_path / "sub").mkdir()
+    atomic_write_files({tmp_path / f"{idx}.json": str(idx) for idx in range(5)} | {tmp_path / "sub" / "x.json": "x"})
+    assert len(synced) == 1
+
+
+def test_per_file_sync_without_syncfs(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(atomic_write, "_syncfs", None)
+    monkeypatch.setattr(atomic_write, "_sync_file", synced.append)
+    atomic_write_files({tmp_path / f"{idx}.json": str(idx) for idx in range(3)})
+    assert len(synced) == 3
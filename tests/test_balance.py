@@ -0,0 +1,41 @@
+import datetime
+
+from account import account_list
+from balance import get_account_postings, get_balance_for_account, posting_index
+from conftest import post
+from verification import verification_list
+
+
+def test_pages_with_running_balances(ledger):
+    ledger(2023)
+    bank = account_list(2023).find_account(1930)
+    bank.incoming_balance = 1000.0
+    for day in range(1, 6):
+        post(datetime.date(2023, 1, day), [(1930, -100.0 * day), (2440, 100.0 * day)], f"Invoice {day}")
+    vl = verification_list(2023)
+
+    postings = get_account_postings(bank, vl)
+    assert len(postings) == 5
+    rows = postings.page(bank, vl, 2, 2)
+    assert [(ver_idx, ver.notes, trans.credit, balance) for ver_idx, ver, trans, balance in rows] == \
+        [(2, "Invoice 3", 300.0, 400.0), (3, "Invoice 4", 400.0, 0.0)]
+    # The last page is short, pages past the end are empty
+    assert [balance for _, _, _, balance in postings.page(bank, vl, 4, 2)] == [-500.0]
+    assert postings.page(bank, vl, 6, 2) == []
+    assert postings.verification_index(4) == 4
+    assert get_balance_for_account(bank, vl) == -500.0
+
+    # Debt accounts are shown with flipped sign
+    debt = account_list(2023).find_account(2440)
+    assert [balance for _, _, _, balance in get_account_postings(debt, vl).page(debt, vl, 0, 2)] == [-100.0, -300.0]
+
+
+def test_index_follows_changes(ledger):
+    ledger(2023)
+    vl = verification_list(2023)
+    bank = account_list(2023).find_account(1930)
+    assert len(get_account_postings(bank, vl)) == 0
+    index = posting_index(vl)
+    post(datetime.date(2023, 1, 1), [(1930, 50.0), (3001, -50.0)])
+    assert posting_index(vl) is not index
+    assert get_account_postings(bank, vl).movement == 50.0
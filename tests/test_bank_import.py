@@ -0,0 +1,66 @@
+import datetime
+
+import pytest
+
+from bank_import import _parse_amount, import_bank_statement, read_bank_statement
+from conftest import post
+from posting import PostingBatchError
+from verification import verification_list
+from year import close_year
+
+STATEMENT = """\
+Datum;Text;Belopp
+2023-03-01;Hyra;-1 200,00
+2023-03-05;Kund AB;3 500,50
+2024-01-02;Next year;-10,00
+"""
+
+
+@pytest.mark.parametrize("value, amount", [
+    ("1 234,50", 1234.5),
+    ("1.234,50", 1234.5),
+    ("1,234.50", 1234.5),
+    ("-350,00", -350.0),
+    ("1,234", 1234.0),
+    ("12", 12.0),
+])
+def test_parse_amount(value, amount):
+    assert _parse_amount(value) == amount
+
+
+def test_parse_amount_ambiguous():
+    with pytest.raises(ValueError):
+        _parse_amount("1.234.50")
+
+
+def test_unreadable_file_is_value_error(tmp_path):
+    path = tmp_path / "odd.csv"
+    path.write_text("x\n")
+    with pytest.raises(ValueError):
+        read_bank_statement(path)
+
+
+def test_import_skips_posted_lines_and_balances(ledger):
+    ledger_dir = ledger(2023)
+    post(datetime.date(2023, 3, 2), [(5010, 1200.0), (1930, -1200.0)], "Rent")
+    path = ledger_dir / "statement.csv"
+    path.write_text(STATEMENT, encoding="utf-8")
+
+    assert import_bank_statement(path, 2023, 2820) == 1
+    ver = verification_list(2023)[-1]
+    assert ver.date == datetime.date(2023, 3, 5)
+    assert [(trans.account_number, trans.debit, trans.credit) for trans in ver.transactions] == [(1930, 3500.5, 0.0), (2820, 0.0, 3500.5)]
+    # Everything is posted now
+    assert import_bank_statement(path, 2023, 2820) == 0
+
+
+def test_import_refuses_closed_year_and_unknown_account(ledger):
+    ledger_dir = ledger(2023)
+    path = ledger_dir / "statement.csv"
+    path.write_text(STATEMENT, encoding="utf-8")
+    with pytest.raises(PostingBatchError):
+        import_bank_statement(path, 2023, 99)
+    close_year(2023)
+    with pytest.raises(PostingBatchError):
+        import_bank_statement(path, 2023, 2820)
+    assert verification_list(2023).len == 0
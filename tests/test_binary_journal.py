@@ -0,0 +1,57 @@
+import datetime
+
+from account import Account, account_list
+from balance import JournalPostingIndex, posting_index
+from binary_journal import BinaryJournal, write_binary_journal
+from conftest import post, reload_ledger
+from query import Query
+from transaction import Transaction
+from verification import Verification, verification_list
+from year import close_year, get_year_end_movements
+
+VERIFICATIONS = [
+    Verification(0, datetime.date(2023, 1, 5), [Transaction(1930, 500.25, 0.0, "In"), Transaction(70000, 0.0, 500.25, cost_unit="Shop")], "Sale"),
+    Verification(1, datetime.date(2023, 1, 6), [], "Empty"),
+    Verification(2, datetime.date(2023, 2, 1), [Transaction(70000, 20.0, 0.0), Transaction(1930, 0.0, 20.0)], "Return", discarded=True),
+]
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "journal.bin"
+    assert write_binary_journal(path, "0" * 64, VERIFICATIONS)
+    journal = BinaryJournal(path)
+    try:
+        assert list(journal) == VERIFICATIONS
+        assert list(journal.account_numbers) == [1930, 70000]
+        assert journal.movements() == {1930: 480.25, 70000: -480.25}
+        assert [journal.posting_verification_index(post) for post in journal.account_postings(70000)] == [0, 2]
+        assert journal.find_verification_index(2) == 2
+    finally:
+        journal.close()
+
+
+def test_fractions_of_ore_are_not_stored(tmp_path):
+    ver = Verification(0, datetime.date(2023, 1, 5), [Transaction(1930, 0.001, 0.0), Transaction(3001, 0.0, 0.001)])
+    assert not write_binary_journal(tmp_path / "journal.bin", "0" * 64, [ver])
+
+
+def test_closed_year_postings_from_binary_journal(ledger):
+    ledger(2023)
+    account_list(2023).add_account(Account(70000, "Project"))
+    account_list(2023).save_accounts()
+    post(datetime.date(2023, 1, 25), [(70000, 1200.0), (1930, -1200.0)], "First")
+    post(datetime.date(2023, 2, 25), [(70000, 300.0), (1930, -300.0)], "Second")
+    close_year(2023)
+    reload_ledger()
+
+    vl = verification_list(2023)
+    assert vl.binary_journal is not None
+    index = posting_index(vl)
+    assert isinstance(index, JournalPostingIndex)
+    assert index.account_numbers(5000, 99999) == [70000]
+    rows = index.postings(70000).page(account_list(2023).find_account(70000), vl, 0, 10)
+    assert [(ver.notes, trans.debit, balance) for _, ver, trans, balance in rows] == [("First", 1200.0, 1200.0), ("Second", 300.0, 1500.0)]
+    assert [ver.notes for _, ver in Query().accounts(70000, 70000).verifications()] == ["First", "Second"]
+    assert get_year_end_movements(2023)[70000] == 1500.0
+    # Served from the mapped columns, the journal was never loaded
+    assert vl.binary_journal is not None
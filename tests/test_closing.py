@@ -0,0 +1,60 @@
+import datetime
+import os
+
+import closing
+from config import config_get_closing_path, config_get_verifications_dir_path
+from conftest import post, reload_ledger
+from verification import verification_list
+from year import close_year
+
+
+def _closed_year(ledger):
+    ledger(2023)
+    post(datetime.date(2023, 1, 25), [(5010, 1200.0), (1930, -1200.0)])
+    post(datetime.date(2023, 2, 25), [(5010, 1200.0), (1930, -1200.0)])
+    close_year(2023)
+    return config_get_verifications_dir_path(2023)
+
+
+def _no_hashing(monkeypatch):
+    def journal_hash(verifications_dir):
+        raise AssertionError("journal hashed")
+    monkeypatch.setattr(closing, "journal_hash", journal_hash)
+
+
+def test_unchanged_year_is_not_hashed_on_load(ledger, monkeypatch):
+    _closed_year(ledger)
+    _no_hashing(monkeypatch)
+    reload_ledger()
+    vl = verification_list(2023)
+    assert vl.year_closed and vl.closing_snapshot is not None
+
+
+def test_touched_file_is_hashed_once(ledger, monkeypatch):
+    dir = _closed_year(ledger)
+    filepath = next(dir.glob("verification_*"))
+    os.utime(filepath, ns=(0, 0))
+    reload_ledger()
+    assert verification_list(2023).closing_snapshot is not None
+    # The manifest was updated, no hashing on the next load
+    _no_hashing(monkeypatch)
+    reload_ledger()
+    assert verification_list(2023).closing_snapshot is not None
+
+
+def test_changed_file_makes_snapshot_stale(ledger):
+    dir = _closed_year(ledger)
+    filepath = next(dir.glob("verification_*"))
+    filepath.write_text(filepath.read_text().replace("1200", "1300"))
+    reload_ledger()
+    assert verification_list(2023).closing_snapshot is None
+
+
+def test_change_opens_the_year(ledger):
+    _closed_year(ledger)
+    vl = verification_list(2023)
+    vl.mark_changed()
+    assert not vl.year_closed and vl.closing_snapshot is None
+    assert not config_get_closing_path(2023).exists()
+    reload_ledger()
+    assert not verification_list(2023).year_closed
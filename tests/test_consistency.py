@@ -0,0 +1,35 @@
+import datetime
+import multiprocessing
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import consistency
+from conftest import CONFIG, load_ledger, post
+from consistency import verify_ledger
+from year import archive_year, close_year
+
+
+def test_findings(ledger):
+    ledger_dir = ledger(2022, 2023)
+    post(datetime.date(2023, 1, 25), [(5010, 1200.0), (1930, -1200.0)])
+    (ledger_dir / "userdata" / "2023" / "verification_2023-02-01_5.json").write_text("{")
+    findings = [str(finding) for finding in verify_ledger(max_workers=2)]
+    assert any("unreadable verification file verification_2023-02-01_5.json" in finding for finding in findings)
+
+
+def test_spawned_workers_use_the_loaded_config(ledger_dir, monkeypatch):
+    # Not the default accounts filename, spawned workers only know the default config
+    (ledger_dir / "config.toml").write_text(CONFIG.replace('"accounts.json"', '"konton.json"'))
+    for new_year in (2022, 2023):
+        (ledger_dir / "userdata" / str(new_year)).mkdir()
+        shutil.copy(ledger_dir / "userdata" / "base_accounts.json", ledger_dir / "userdata" / str(new_year) / "konton.json")
+    load_ledger()
+    post(datetime.date(2022, 1, 25), [(5010, 1200.0), (1930, -1200.0)])
+    close_year(2022)
+    archive_year(2022)
+    post(datetime.date(2023, 1, 25), [(5010, 300.0), (1930, -300.0)])
+
+    monkeypatch.setattr(consistency, "ProcessPoolExecutor", partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")))
+    findings = verify_ledger(max_workers=2)
+    assert [str(finding) for finding in findings if "accounts file" in finding.message] == []
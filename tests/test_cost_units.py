@@ -0,0 +1,38 @@
+import datetime
+
+from cli import create_parser
+from cost_units import cost_unit_index
+from posting import PostingBatch
+from transaction import Transaction
+from verification import verification_list
+
+
+def _post(date: datetime.date, rows: list[tuple[int, float, float, str]]):
+    batch = PostingBatch(date.year, "Test", add_missing_accounts=True)
+    batch.add(date, [Transaction(acc_num, debit, credit, cost_unit=unit) for acc_num, debit, credit, unit in rows])
+    batch.commit(git_commit=False)
+
+
+def test_totals_per_unit(ledger):
+    ledger(2023)
+    _post(datetime.date(2023, 1, 5), [(1930, 500.0, 0.0, ""), (3001, 0.0, 300.0, "Shop"), (3001, 0.0, 200.0, "Web")])
+    _post(datetime.date(2023, 1, 6), [(5010, 50.0, 0.0, "Shop"), (1930, 0.0, 50.0, "")])
+    vl = verification_list(2023)
+    index = cost_unit_index(vl)
+    assert index.units() == ["Shop", "Web"]
+    assert index.totals("Shop") == {3001: (0.0, 300.0), 5010: (50.0, 0.0)}
+    assert index.movements("Web") == {3001: -200.0}
+    assert index.movements("Nothing") == {}
+
+    _post(datetime.date(2023, 1, 7), [(1930, 25.0, 0.0, ""), (3001, 0.0, 25.0, "Web")])
+    assert cost_unit_index(vl).movements("Web") == {3001: -225.0}
+
+
+def test_report(ledger):
+    ledger_dir = ledger(2023)
+    _post(datetime.date(2023, 1, 5), [(1930, 300.0, 0.0, ""), (3001, 0.0, 300.0, "Shop")])
+    out = ledger_dir / "units.html"
+    args = create_parser().parse_args(["report", "cost-units", str(out), "--year", "2023"])
+    assert args.func(args) == 0
+    html = out.read_text()
+    assert "Shop" in html and "300.00" in html
@@ -0,0 +1,60 @@
+import datetime
+
+from git import Repo
+
+from cli import create_parser
+from config import config_do_git_commit
+from conftest import post
+from cube import monthly_cube
+from history import year_at
+from transaction import Transaction
+from verification import Verification, VerificationList, verification_list
+from year import close_year
+
+
+def test_cube_follows_changes(ledger):
+    ledger(2023)
+    vl = verification_list(2023)
+    post(datetime.date(2023, 1, 25), [(5010, 1200.0), (1930, -1200.0)])
+    assert monthly_cube(vl).movement(1, 5010) == 1200.0
+    post(datetime.date(2023, 3, 25), [(5010, 300.0), (1930, -300.0)])
+    assert monthly_cube(vl).monthly_movements(5010)[:3] == [1200.0, 0.0, 300.0]
+
+
+def test_closed_year_cube_is_persisted(ledger):
+    ledger(2023)
+    post(datetime.date(2023, 1, 25), [(5010, 1200.0), (1930, -1200.0)])
+    close_year(2023)
+    cube = monthly_cube(verification_list(2023))
+    assert cube.journal_hash == verification_list(2023).closing_snapshot.journal_hash
+    assert cube.movement(1, 1930) == -1200.0
+
+
+def test_other_list_of_the_year_gets_its_own_cube(ledger):
+    ledger(2023)
+    post(datetime.date(2023, 1, 25), [(5010, 1200.0), (1930, -1200.0)])
+    live = verification_list(2023)
+    assert monthly_cube(live).movement(1, 5010) == 1200.0
+    other = VerificationList(None, 2023, verifications=[
+        Verification(0, datetime.date(2023, 2, 1), [Transaction(5010, 10.0, 0.0), Transaction(1930, 0.0, 10.0)]),
+    ])
+    assert monthly_cube(other).movement(1, 5010) == 0.0
+    assert monthly_cube(other).movement(2, 5010) == 10.0
+    assert monthly_cube(live).movement(1, 5010) == 1200.0
+
+
+def test_monthly_report_at_earlier_commit(ledger):
+    ledger_dir = ledger(2022, 2023)
+    post(datetime.date(2023, 1, 25), [(5010, 1111.0), (1930, -1111.0)])
+    config_do_git_commit("First")
+    first_commit = Repo(ledger_dir / "userdata").head.commit.hexsha
+    post(datetime.date(2023, 2, 25), [(5010, 2222.0), (1930, -2222.0)])
+    config_do_git_commit("Second")
+
+    assert monthly_cube(year_at(first_commit, 2023).verification_list).monthly_movements(5010)[:2] == [1111.0, 0.0]
+    for report in ("monthly", "comparison"):
+        out = ledger_dir / f"{report}.html"
+        args = create_parser().parse_args(["report", report, str(out), "--year", "2023", "--at", first_commit])
+        assert args.func(args) == 0
+        html = out.read_text()
+        assert "1 111.00" in html and "2 222.00" not in html
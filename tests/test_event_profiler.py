@@ -0,0 +1,34 @@
+import time
+
+from event_profiler import PROFILE_ENV, PROFILE_SLOW_MS_ENV, EventProfiler, EventStats, event_profiler_from_env
+
+
+def test_histogram():
+    stats = EventStats()
+    for duration_ms in (0.5, 1.0, 3.0, 5000.0):
+        stats.add(duration_ms)
+    assert stats.count == 4 and stats.max_ms == 5000.0
+    assert stats.histogram[:3] == [2, 0, 1] and stats.histogram[-1] == 1
+
+
+def test_events_and_slow_profiles(tmp_path):
+    profiler = EventProfiler(slow_ms=5, out_dir=tmp_path)
+    profiler.start_event("Main", "row3_delete")
+    profiler.start_event("Main", "row7_delete")
+    time.sleep(0.01)
+    profiler.end_event()
+    # Ended by the next start, rows are counted together
+    assert profiler._stats[("Main", "rowN_delete")].count == 2
+    assert [path.name for path in tmp_path.glob("*.prof")] == ["0001_Main_rowN_delete.prof"]
+
+    profiler.write_summary()
+    summary = (tmp_path / "events.txt").read_text(encoding="utf-8")
+    assert "rowN_delete" in summary and "1 slow events profiled" in summary
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    assert event_profiler_from_env() is None
+    monkeypatch.setenv(PROFILE_ENV, "1")
+    monkeypatch.setenv(PROFILE_SLOW_MS_ENV, "250")
+    assert event_profiler_from_env()._slow_ms == 250.0
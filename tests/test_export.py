@@ -0,0 +1,40 @@
+import csv
+import datetime
+import json
+
+from conftest import post
+from export import export_csv, export_jsonl
+from sie import export_sie
+
+
+def _two_years(ledger):
+    ledger_dir = ledger(2022, 2023)
+    post(datetime.date(2022, 5, 1), [(1930, 10.0), (3001, -10.0)], "Old")
+    post(datetime.date(2023, 2, 1), [(1930, 111.5), (3001, -111.5)], "Sale")
+    return ledger_dir
+
+
+def test_csv_and_jsonl(ledger):
+    ledger_dir = _two_years(ledger)
+    assert export_csv(ledger_dir / "ledger.csv", [2023]) == 2
+    with open(ledger_dir / "ledger.csv", encoding="utf-8", newline="") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert [(row["year"], row["date"], row["account"], row["debit"], row["credit"], row["verification_notes"]) for row in rows] == \
+        [("2023", "2023-02-01", "1930", "111.5", "0.0", "Sale"), ("2023", "2023-02-01", "3001", "0.0", "111.5", "Sale")]
+    assert rows[0]["account_description"] != ""
+
+    assert export_jsonl(ledger_dir / "ledger.jsonl") == 4
+    lines = [json.loads(line) for line in (ledger_dir / "ledger.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [(line["year"], line["account"], line["debit"]) for line in lines] == [(2022, 1930, 10.0), (2022, 3001, 0.0), (2023, 1930, 111.5), (2023, 3001, 0.0)]
+
+
+def test_sie(ledger):
+    ledger_dir = _two_years(ledger)
+    paths = export_sie(ledger_dir / "export", [2023])
+    assert [path.name for path in paths] == ["ledger_2023.se"]
+    content = paths[0].read_bytes()
+    assert b"\r\n" in content
+    lines = content.decode("cp437").splitlines()
+    assert "#RAR 0 20230101 20231231" in lines
+    assert any(line.startswith("#VER ") and "20230201" in line for line in lines)
+    assert [line.split()[:3] for line in lines if line.startswith("#TRANS")] == [["#TRANS", "1930", "{}"], ["#TRANS", "3001", "{}"]]
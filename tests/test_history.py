@@ -0,0 +1,53 @@
+import datetime
+import subprocess
+
+import pytest
+
+from config import config_do_git_commit
+from conftest import post
+from history import read_blobs, resolve_commit, year_at
+from verification import verification_list
+from year import archive_year, close_year
+
+
+def test_year_at_earlier_commits(ledger):
+    ledger(2023)
+    post(datetime.date(2023, 1, 25), [(1930, 10.0), (3001, -10.0)], "First")
+    config_do_git_commit("First")
+    first = resolve_commit("HEAD")
+    post(datetime.date(2023, 2, 25), [(1930, 20.0), (3001, -20.0)], "Second")
+    close_year(2023)
+    archive_year(2023)
+    config_do_git_commit("Second")
+
+    assert resolve_commit("HEAD~1") == first
+    old = year_at(first, 2023)
+    assert [ver.notes for ver in old.verification_list] == ["First"]
+    assert old.account_list.find_account(3001) is not None
+    # Read from the archive at the last commit
+    assert [ver.notes for ver in year_at("HEAD", 2023).verification_list] == ["First", "Second"]
+    assert year_at(datetime.date.today().isoformat(), 2023).verification_list.len == 2
+    # The loaded year is not touched
+    assert verification_list(2023).len == 2
+    assert old.other_year(2022) is None
+
+
+def test_errors(ledger):
+    ledger(2023)
+    with pytest.raises(ValueError):
+        resolve_commit("no-such-branch")
+    with pytest.raises(ValueError):
+        resolve_commit("1970-01-01")
+    with pytest.raises(ValueError):
+        year_at("HEAD", 2020)
+
+
+def test_read_blobs(ledger):
+    ledger_dir = ledger(2023)
+    # Larger than the pipe buffers, in both directions
+    contents = [b"a" * 1_000_000, b"", b"text\n"] * 20
+    object_ids = [subprocess.run(["git", "-C", str(ledger_dir / "userdata"), "hash-object", "-w", "--stdin"], input=content,
+                                 capture_output=True, check=True).stdout.decode("ascii").strip() for content in contents[:3]] * 20
+    assert read_blobs(object_ids) == contents
+    with pytest.raises(ValueError):
+        read_blobs(["0" * 40])
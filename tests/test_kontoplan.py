@@ -0,0 +1,27 @@
+from account import Account, AccountIndex
+from kontoplan import chart_of_accounts, load_chart_of_accounts
+
+ACCOUNTS = [Account(1930, "Företagskonto"), Account(1910, "Kassa"), Account(19300, "Sub bank"), Account(3001, "Försäljning inom Sverige")]
+
+
+def test_search_prefix_and_description():
+    index = AccountIndex(ACCOUNTS)
+    assert [acc.account_number for acc in index.search("193")] == [1930, 19300]
+    assert [acc.account_number for acc in index.search("19", limit=2)] == [1910, 1930]
+    assert [acc.account_number for acc in index.search("KONTO")] == [1930]
+    assert [acc.account_number for acc in index.search("sverige")] == [3001]
+    assert index.search("sv") == [ACCOUNTS[3]]
+    assert index.find_account(1930).description == "Företagskonto"
+    assert index.find_account(193) is None
+
+
+def test_load_chart_of_accounts(tmp_path):
+    path = tmp_path / "kontoplan.txt"
+    path.write_text('1930, "Företagskonto"\n\nnot an account\n 3001 ,"Försäljning, Sverige" \n', encoding="utf-8")
+    assert load_chart_of_accounts(path) == [Account(1930, "Företagskonto"), Account(3001, "Försäljning, Sverige")]
+
+
+def test_chart_of_accounts(ledger_dir):
+    chart = chart_of_accounts()
+    assert chart.find_account(1930) is not None
+    assert chart_of_accounts() is chart
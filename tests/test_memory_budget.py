@@ -0,0 +1,7 @@
+from memory_report import BYTES_PER_POSTING_BUDGET, synthetic_bytes_per_posting
+
+
+def test_bytes_per_posting_within_budget():
+    bytes_per_posting = synthetic_bytes_per_posting(10000)
+    assert bytes_per_posting <= BYTES_PER_POSTING_BUDGET, \
+        f"{bytes_per_posting:.1f} bytes per posting, budget {BYTES_PER_POSTING_BUDGET}"
@@ -0,0 +1,67 @@
+import os
+import time
+
+import pytest
+
+import config
+from parse_cache import _parse_cache_path, load_files_cached
+
+# Well before the cache is written, outside the racy window
+OLD_NS = time.time_ns() - 3600 * 1_000_000_000
+
+
+@pytest.fixture
+def files(ledger_dir):
+    assert config.config_init()
+    paths = []
+    for name in ("a.txt", "b.txt"):
+        path = ledger_dir / name
+        path.write_text(name)
+        os.utime(path, ns=(OLD_NS, OLD_NS))
+        paths.append(path)
+    return paths
+
+
+def _load(paths) -> tuple[list[str], list[str]]:
+    parsed = []
+
+    def parse(path):
+        parsed.append(path.name)
+        return path.read_text()
+    return load_files_cached("test", paths, parse), parsed
+
+
+def test_unchanged_files_come_from_the_cache(files):
+    assert _load(files) == (["a.txt", "b.txt"], ["a.txt", "b.txt"])
+    assert _load(files) == (["a.txt", "b.txt"], [])
+
+
+def test_changed_files_are_parsed_again(files):
+    _load(files)
+    files[1].write_text("changed")
+    os.utime(files[1], ns=(OLD_NS, OLD_NS + 1))
+    assert _load(files) == (["a.txt", "changed"], ["b.txt"])
+    # Same size, only the mtime tells
+    files[0].write_text("A.txt")
+    os.utime(files[0], ns=(OLD_NS, OLD_NS + 1))
+    assert _load(files) == (["A.txt", "changed"], ["a.txt"])
+
+
+def test_recently_modified_files_are_not_trusted(files):
+    _load(files)
+    # Changed after the cache was written but within the same mtime as cached
+    files[0].write_text("A.txt")
+    os.utime(files[0], ns=(OLD_NS, OLD_NS))
+    assert _load(files)[0] == ["a.txt", "b.txt"]
+    now = time.time_ns()
+    os.utime(files[0], ns=(now, now))
+    _load(files)
+    files[0].write_text("x.txt")
+    os.utime(files[0], ns=(now, now))
+    assert _load(files) == (["x.txt", "b.txt"], ["a.txt"])
+
+
+def test_unreadable_cache_is_ignored(files):
+    _load(files)
+    _parse_cache_path("test").write_bytes(b"not a pickle")
+    assert _load(files) == (["a.txt", "b.txt"], ["a.txt", "b.txt"])
@@ -0,0 +1,74 @@
+import datetime
+import json
+
+import pytest
+from git import Repo
+
+from account import account_list
+from posting import PostingBatch, PostingBatchError
+from search import search_index
+from transaction import Transaction
+from verification import VerificationList, verification_list
+
+DATE = datetime.date(2023, 5, 25)
+SALARY = [Transaction(7210, 30000.0, 0.0), Transaction(1930, 0.0, 30000.0)]
+
+
+def test_with_block_posts_and_commits(ledger):
+    ledger_dir = ledger(2023)
+    repo = Repo(ledger_dir / "userdata")
+    num_commits = len(list(repo.iter_commits()))
+    with PostingBatch(2023, "Payroll", add_missing_accounts=True) as batch:
+        first = batch.add(DATE, SALARY, "Salary 1")
+        batch.add(DATE, SALARY, "Salary 2")
+    assert [ver.id for ver in verification_list(2023)] == [first.id, first.id + 1]
+    assert len(list(repo.iter_commits())) == num_commits + 1
+    assert repo.head.commit.message.startswith("Payroll - 2 verifications")
+    with pytest.raises(ValueError):
+        batch.add(DATE, SALARY)
+
+
+def test_exception_discards_the_batch(ledger):
+    ledger(2023)
+    with pytest.raises(RuntimeError):
+        with PostingBatch(2023, "Payroll", add_missing_accounts=True) as batch:
+            batch.add(DATE, SALARY)
+            raise RuntimeError
+    assert verification_list(2023).len == 0
+
+
+def test_all_errors_are_reported(ledger):
+    ledger(2023)
+    batch = PostingBatch(2023, "Bad")
+    batch.add(DATE, SALARY)
+    batch.add(datetime.date(2022, 1, 1), [Transaction(1930, 10.0, 0.0), Transaction(2440, 0.0, 5.0)])
+    batch.add(DATE, [])
+    with pytest.raises(PostingBatchError) as err:
+        batch.commit(git_commit=False)
+    assert [(error.index, error.message) for error in err.value.errors] == [
+        (0, "unknown account 7210"),
+        (1, "date 2022-01-01 not in year 2023"),
+        (1, "not balanced, debit - credit is 5.0"),
+        (2, "no transactions"),
+    ]
+    assert verification_list(2023).len == 0
+
+
+def test_failed_save_is_rolled_back(ledger, monkeypatch):
+    ledger_dir = ledger(2023)
+    accounts_path = ledger_dir / "userdata" / "2023" / "accounts.json"
+    accounts_before = json.loads(accounts_path.read_text())
+
+    def failing_save(self, verifications):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(VerificationList, "save_new_verifications", failing_save)
+
+    batch = PostingBatch(2023, "Payroll", add_missing_accounts=True)
+    batch.add(DATE, SALARY, "Salary")
+    with pytest.raises(KeyboardInterrupt):
+        batch.commit(git_commit=False)
+    assert verification_list(2023).len == 0
+    assert search_index(verification_list(2023)).search("salary") == []
+    assert account_list(2023).find_account(7210) is None
+    assert json.loads(accounts_path.read_text()) == accounts_before
+    assert not list((ledger_dir / "userdata" / "2023").glob("verification_*"))
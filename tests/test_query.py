@@ -0,0 +1,41 @@
+import csv
+import datetime
+
+from cli import create_parser
+from conftest import post
+from query import Query
+
+
+def _run_cli(*argv: str) -> int:
+    args = create_parser().parse_args(list(argv))
+    return args.func(args)
+
+
+def test_filters_combine(ledger):
+    ledger(2022, 2023)
+    post(datetime.date(2022, 6, 1), [(1930, 100.0), (3001, -100.0)], "Sale")
+    post(datetime.date(2023, 2, 1), [(1930, 250.0), (3001, -250.0)], "Sale")
+    post(datetime.date(2023, 3, 1), [(5010, 500.0), (1930, -500.0)], "Rent")
+
+    assert Query().accounts(1930).count() == 3
+    assert Query().years(2023).accounts(1930).sum() == -250.0
+    assert Query().years(2023).accounts(1000, 1999).dates(datetime.date(2023, 3, 1), None).sum() == -500.0
+    assert [ver.notes for _, ver in Query().text("rent").verifications()] == ["Rent"]
+    assert Query().amount(min_amount=200.0).count() == 4
+
+
+def test_cli_query_keeps_year_filter(ledger):
+    ledger_dir = ledger(2022, 2023)
+    post(datetime.date(2022, 6, 1), [(1930, 100.0), (3001, -100.0)])
+    post(datetime.date(2023, 2, 1), [(1930, 250.0), (3001, -250.0)])
+
+    out = ledger_dir / "postings.csv"
+    assert _run_cli("query", str(out), "--year", "2023", "--account", "1930") == 0
+    with open(out, encoding="utf-8", newline="") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert [(row["year"], row["debit"]) for row in rows] == [("2023", "250.0")]
+
+
+def test_cli_query_needs_output_file(ledger):
+    ledger(2023)
+    assert _run_cli("query", "--year", "2023") == 1
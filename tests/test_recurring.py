@@ -0,0 +1,48 @@
+import datetime
+
+import pytest
+
+from posting import PostingBatchError
+from recurring import RecurringTemplate, add_recurring_template, generate_recurring, load_recurring_templates
+from transaction import Transaction
+from verification import verification_list
+from year import close_year
+
+RENT = [Transaction(5010, 1000.0, 0.0), Transaction(1930, 0.0, 1000.0)]
+
+
+def test_due_dates():
+    template = RecurringTemplate("Rent", datetime.date(2023, 1, 10), RENT, day=31, interval="quarterly",
+                                 end=datetime.date(2023, 12, 1), last_generated=datetime.date(2023, 1, 31))
+    assert template.due_dates(datetime.date(2024, 6, 1)) == [datetime.date(2023, 4, 30), datetime.date(2023, 7, 31), datetime.date(2023, 10, 31)]
+
+
+def test_add_template_checks(ledger):
+    ledger(2023)
+    add_recurring_template(RecurringTemplate("Rent", datetime.date(2023, 1, 1), RENT))
+    for template in (RecurringTemplate("Rent", datetime.date(2023, 1, 1), RENT),
+                     RecurringTemplate("Bad", datetime.date(2023, 1, 1), RENT[:1]),
+                     RecurringTemplate("Weekly", datetime.date(2023, 1, 1), RENT, interval="weekly")):
+        with pytest.raises(ValueError):
+            add_recurring_template(template)
+
+
+def test_generate_is_idempotent(ledger):
+    ledger(2023, 2024)
+    add_recurring_template(RecurringTemplate("Rent", datetime.date(2023, 11, 1), RENT, "Rent"))
+    # Up to 2025, not created yet, its dates are left for later
+    assert generate_recurring(datetime.date(2025, 2, 28)) == 14
+    assert [ver.notes for ver in verification_list(2023)] == ["Rent 2023-11", "Rent 2023-12"]
+    assert verification_list(2024).len == 12
+    assert generate_recurring(datetime.date(2025, 2, 28)) == 0
+    assert load_recurring_templates()[0].last_generated == datetime.date(2024, 12, 25)
+
+
+def test_invalid_year_posts_nothing(ledger):
+    ledger(2023, 2024)
+    add_recurring_template(RecurringTemplate("Rent", datetime.date(2023, 12, 1), RENT))
+    close_year(2024)
+    with pytest.raises(PostingBatchError):
+        generate_recurring(datetime.date(2024, 1, 31))
+    assert verification_list(2023).len == 0
+    assert load_recurring_templates()[0].last_generated is None
@@ -0,0 +1,49 @@
+import subprocess
+import time
+
+from git import Repo
+
+from repo_maintenance import load_maintenance_state, maintenance_due, repo_stats, run_maintenance, squash_automatic_commits
+
+DAY = 24 * 3600
+
+
+def _commit(userdata, message: str, age_days: float, monkeypatch):
+    (userdata / "log.txt").write_text(f"{(userdata / 'log.txt').read_text() if (userdata / 'log.txt').exists() else ''}{message}\n")
+    date = f"{int(time.time() - age_days * DAY)} +0000"
+    monkeypatch.setenv("GIT_AUTHOR_DATE", date)
+    monkeypatch.setenv("GIT_COMMITTER_DATE", date)
+    subprocess.run(["git", "-C", str(userdata), "add", "log.txt"], check=True)
+    subprocess.run(["git", "-C", str(userdata), "commit", "-q", "-m", message], check=True)
+
+
+def test_squash_automatic_commits(ledger, monkeypatch):
+    userdata = ledger(2023) / "userdata"
+    history = [("STARTUP - a", 50), ("EXIT - a", 49), ("STARTUP - b", 48), ("Posted", 47),
+               ("STARTUP - c", 40), ("EXIT - c", 39), ("EXIT - d", 1)]
+    for message, age_days in history:
+        _commit(userdata, message, age_days, monkeypatch)
+    repo = Repo(userdata)
+    trees_before = {commit.message.strip(): commit.tree.hexsha for commit in repo.iter_commits()}
+    commits_before = len(trees_before)
+
+    assert squash_automatic_commits(30) == 3
+    commits = list(repo.iter_commits())
+    assert len(commits) == commits_before - 3
+    assert [commit.message.splitlines()[0] for commit in commits[:4]] == ["EXIT - d", "EXIT - c", "Posted", "STARTUP - b"]
+    assert "Squashed automatic commits since" in commits[1].message
+    # The ledger is the same at every kept commit
+    for commit in commits[:4]:
+        assert commit.tree.hexsha == trees_before[commit.message.splitlines()[0]]
+    assert squash_automatic_commits(30) == 0
+
+
+def test_run_maintenance(ledger):
+    ledger(2023)
+    state = load_maintenance_state()
+    assert maintenance_due(repo_stats(), state)
+    stats = run_maintenance(force=True, squash_days=30)
+    assert stats.loose_objects == 0 and stats.commits >= 1
+    state = load_maintenance_state()
+    assert state.last_run == stats.time and len(state.stats) == 2
+    assert not maintenance_due(repo_stats(), state)
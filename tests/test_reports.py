@@ -0,0 +1,57 @@
+import datetime
+
+from cli import create_parser
+from conftest import post
+from range_index import account_range_index
+from report import _period_balance
+from verification import verification_list
+from year import Year
+
+
+def _report(ledger_dir, *argv: str) -> str:
+    out = ledger_dir / "report.html"
+    args = create_parser().parse_args(["report", argv[0], str(out), *argv[1:]])
+    assert args.func(args) == 0
+    return out.read_text()
+
+
+def _sales(ledger):
+    ledger_dir = ledger(2023)
+    post(datetime.date(2023, 2, 1), [(1930, 111.0), (3001, -111.0)])
+    post(datetime.date(2023, 5, 1), [(1930, 222.0), (3001, -222.0)])
+    return ledger_dir
+
+
+def test_result_report_of_quarter(ledger):
+    ledger_dir = _sales(ledger)
+    quarter = _report(ledger_dir, "result", "--year", "2023", "--quarter", "2")
+    assert "222.00" in quarter and "333.00" not in quarter
+    whole_year = _report(ledger_dir, "result", "--year", "2023")
+    assert "333.00" in whole_year
+
+
+def test_balance_report_of_quarter(ledger):
+    _sales(ledger)
+    report_year = Year(2023)
+    acc = report_year.account_list.find_account(1930)
+    index = account_range_index(verification_list(2023))
+    # Incoming balance at the start of Q2, change in Q2, postings in Q2
+    assert _period_balance(acc, report_year, index, datetime.date(2023, 4, 1), datetime.date(2023, 6, 30)) == (111.0, 222.0, True)
+    assert _period_balance(acc, report_year, index, datetime.date(2023, 7, 1), datetime.date(2023, 9, 30)) == (333.0, 0.0, False)
+    assert _period_balance(acc, report_year, None, report_year.period_start, report_year.period_end) == (0, 333.0, True)
+
+
+def test_account_range_sums(ledger):
+    _sales(ledger)
+    post(datetime.date(2023, 5, 2), [(5010, 50.0), (1930, -50.0)])
+    index = account_range_index(verification_list(2023))
+    assert index.accounts == [1930, 3001, 5010]
+    assert index.sum(3000, 3999) == -333.0
+    assert index.sum(1000, 9999) == 0.0
+    q2 = (datetime.date(2023, 4, 1), datetime.date(2023, 6, 30))
+    assert index.account_sums(1000, 3999, *q2) == {1930: 172.0, 3001: -222.0}
+    assert index.group_sums(1, *q2) == {1: 172.0, 3: -222.0, 5: 50.0}
+    assert index.posting_count(1930, *q2) == 2
+    # Rebuilt after a change
+    post(datetime.date(2023, 6, 1), [(1930, 1.0), (3001, -1.0)])
+    assert account_range_index(verification_list(2023)).sum(3000, 3999, *q2) == -223.0
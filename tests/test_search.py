@@ -0,0 +1,35 @@
+import datetime
+
+from conftest import post
+from query import Query
+from search import search_index
+from transaction import Transaction
+from verification import Verification, VerificationList, verification_list
+
+
+def test_search_follows_changes(ledger):
+    ledger(2023)
+    rent_id = post(datetime.date(2023, 1, 25), [(5010, 1200.0), (1930, -1200.0)], "Rent January")
+    vl = verification_list(2023)
+    assert search_index(vl).search("rent") == [rent_id]
+    assert search_index(vl).search("1200") == [rent_id]
+    assert search_index(vl).search("5010 jan") == [rent_id]
+
+    sale_id = post(datetime.date(2023, 2, 1), [(1930, 99.5), (3001, -99.5)], "Sale to Rentco")
+    assert search_index(vl).search("rent") == [rent_id, sale_id]
+    assert search_index(vl).search("99,50") == [sale_id]
+    assert [ver.id for _, ver in Query().text("sale").verifications()] == [sale_id]
+
+
+def test_other_list_of_the_year_gets_its_own_index(ledger):
+    ledger(2023)
+    rent_id = post(datetime.date(2023, 1, 25), [(5010, 1200.0), (1930, -1200.0)], "Rent")
+    live = verification_list(2023)
+    assert search_index(live).search("rent") == [rent_id]
+
+    # E.g. the year at an earlier commit
+    other = VerificationList(None, 2023, verifications=[
+        Verification(7, datetime.date(2023, 1, 3), [Transaction(1930, 10.0, 0.0), Transaction(3001, 0.0, 10.0)], "Rent deposit"),
+    ])
+    assert search_index(other).search("rent") == [7]
+    assert search_index(live).search("rent") == [rent_id]
@@ -0,0 +1,85 @@
+import datetime
+
+import pytest
+
+from account import account_list
+from conftest import post
+from posting import PostingBatchError
+from sie import export_sie, import_sie
+from verification import verification_list
+from year import close_year
+
+SIE = """\
+#FLAGGA 0
+#SIETYP 4
+#RAR 0 20230101 20231231
+#KONTO 1930 "Bank"
+#KONTO 3001 "Sales"
+#KONTO 7777 "Own account"
+#IB 0 1930 1000.00
+#VER A 1 20230105 "Sale"
+{
+#TRANS 1930 {} 500.00
+#TRANS 3001 {1 "Shop"} -500.00
+}
+#VER A 2 20230110 "Own"
+{
+#TRANS 7777 {} 20.00
+#TRANS 1930 {} -20.00
+}
+"""
+
+
+def _write(ledger_dir, text: str):
+    path = ledger_dir / "import.se"
+    path.write_text(text, encoding="cp437")
+    return path
+
+
+def test_import(ledger):
+    ledger_dir = ledger(2023)
+    assert import_sie(_write(ledger_dir, SIE)) == 2
+    vl = verification_list(2023)
+    assert [ver.notes for ver in vl] == ["A1 Sale", "A2 Own"]
+    assert vl[0].transactions[1].cost_unit == "Shop"
+    assert account_list(2023).find_account(1930).incoming_balance == 1000.0
+    assert account_list(2023).find_account(7777).description == "Own account"
+
+
+@pytest.mark.parametrize("rows", [
+    # Not balanced
+    "#TRANS 1930 {} 500.00\n#TRANS 3001 {} -400.00\n",
+    # Neither in the file nor in the chart of accounts
+    "#TRANS 1930 {} 500.00\n#TRANS 99 {} -500.00\n",
+])
+def test_invalid_verification_imports_nothing(ledger, rows):
+    ledger_dir = ledger(2023)
+    text = f"#RAR 0 20230101 20231231\n#KONTO 7777 \"Own account\"\n#VER A 1 20230105 \"Bad\"\n{{\n{rows}}}\n"
+    with pytest.raises(PostingBatchError):
+        import_sie(_write(ledger_dir, text))
+    assert verification_list(2023).len == 0
+    assert account_list(2023).find_account(7777) is None
+
+
+def test_closed_year_is_refused(ledger):
+    ledger_dir = ledger(2023)
+    close_year(2023)
+    with pytest.raises(PostingBatchError):
+        import_sie(_write(ledger_dir, SIE))
+    assert verification_list(2023).len == 0
+
+
+def test_export_import_round_trip(ledger):
+    ledger_dir = ledger(2023, 2024)
+    post(datetime.date(2023, 2, 1), [(1930, 111.5), (3001, -111.5)], "Sale")
+    post(datetime.date(2023, 3, 1), [(5010, 40.0), (1930, -40.0)], "Rent")
+    export_dir = ledger_dir / "export"
+    export_dir.mkdir()
+    export_sie(export_dir, [2023])
+    exported = next(export_dir.iterdir())
+
+    # Into the empty 2024, as the file's fiscal year is rewritten
+    text = exported.read_text(encoding="cp437").replace("#RAR 0 20230101 20231231", "#RAR 0 20240101 20241231").replace(" 2023", " 2024")
+    assert import_sie(_write(ledger_dir, text)) == 2
+    assert [(trans.account_number, trans.debit, trans.credit) for ver in verification_list(2024) for trans in ver.transactions] == \
+        [(trans.account_number, trans.debit, trans.credit) for ver in verification_list(2023) for trans in ver.transactions]
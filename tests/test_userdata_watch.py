@@ -0,0 +1,41 @@
+import datetime
+import json
+
+from account import account_list
+from conftest import post
+from dataclass_json import dataclass_json_dumps
+from search import search_index
+from transaction import Transaction
+from userdata_watch import UserdataWatcher
+from verification import Verification, verification_list
+
+
+def test_reloads_changes_made_by_others(ledger):
+    ledger_dir = ledger(2023)
+    watcher = UserdataWatcher()
+    try:
+        post(datetime.date(2023, 1, 1), [(1930, 10.0), (3001, -10.0)], "Own")
+        # Our own writes are not reported
+        assert watcher.poll() == []
+
+        vl = verification_list(2023)
+        assert search_index(vl).search("theirs") == []
+        theirs = Verification(1, datetime.date(2023, 1, 2), [Transaction(1930, 5.0, 0.0), Transaction(3001, 0.0, 5.0)], "Theirs")
+        filepath = ledger_dir / "userdata" / "2023" / theirs.filename
+        filepath.write_text(dataclass_json_dumps(theirs, indent=4))
+        assert watcher.poll() == [2023]
+        assert [ver.notes for ver in vl] == ["Own", "Theirs"]
+        assert search_index(vl).search("theirs") == [1]
+
+        filepath.unlink()
+        assert watcher.poll() == [2023]
+        assert [ver.notes for ver in vl] == ["Own"]
+
+        accounts_path = ledger_dir / "userdata" / "2023" / "accounts.json"
+        accounts = json.loads(accounts_path.read_text())
+        accounts[0]["description"] = "Renamed"
+        accounts_path.write_text(json.dumps(accounts, indent=4))
+        assert watcher.poll() == [2023]
+        assert account_list(2023).find_account(accounts[0]["account_number"]).description == "Renamed"
+    finally:
+        watcher.close()
@@ -0,0 +1,39 @@
+import datetime
+
+import pytest
+
+from account import account_list
+from conftest import post
+from sequence_view import SequenceView
+from verification import verification_list
+
+
+def test_sequence_view():
+    items = [1, 2, 3]
+    view = SequenceView(items)
+    assert list(view) == [1, 2, 3] and view[1:] == [2, 3] and 3 in view and list(reversed(view)) == [3, 2, 1]
+    items.append(4)
+    assert len(view) == 4
+    with pytest.raises(TypeError):
+        view[0] = 5
+
+
+def test_nested_iteration(ledger):
+    ledger(2023)
+    for day in (1, 2, 3):
+        post(datetime.date(2023, 1, day), [(1930, 10.0), (3001, -10.0)])
+    vl = verification_list(2023)
+    assert [(outer.id, inner.id) for outer in vl for inner in vl if inner.id <= outer.id] == [(0, 0), (1, 0), (1, 1), (2, 0), (2, 1), (2, 2)]
+    accounts = account_list(2023)
+    assert sum(1 for _ in accounts for _ in accounts) == len(accounts) ** 2
+
+
+def test_views_follow_the_lists(ledger):
+    ledger(2023)
+    vl = verification_list(2023)
+    verifications = vl.verifications
+    accounts = account_list(2023).accounts
+    num_accounts = len(accounts)
+    post(datetime.date(2023, 1, 1), [(1930, 10.0), (3001, -10.0)])
+    assert [ver.id for ver in verifications] == [0]
+    assert len(accounts) == num_accounts + 1
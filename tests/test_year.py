@@ -0,0 +1,25 @@
+import datetime
+
+from account import account_list
+from conftest import post
+from verification import verification_list
+from year import close_year, roll_forward_incoming_balances
+
+
+def test_roll_forward(ledger):
+    ledger(2022, 2023, 2024)
+    post(datetime.date(2022, 3, 1), [(1930, 1000.0), (2440, -1000.0)])
+    post(datetime.date(2022, 4, 1), [(1630, 250.0), (1930, -250.0)])
+    post(datetime.date(2023, 3, 1), [(1930, 10.0), (3001, -10.0)])
+    close_year(2023)
+
+    assert roll_forward_incoming_balances(2022) == [2023, 2024]
+    incoming = {year: {acc.account_number: acc.incoming_balance for acc in account_list(year) if acc.account_number in (1630, 1930, 2440, 3001)}
+                for year in (2023, 2024)}
+    # Missing balance sheet accounts are added, income accounts start at 0
+    assert incoming[2023] == {1630: 250.0, 1930: 750.0, 2440: 1000.0, 3001: 0}
+    assert incoming[2024] == {1630: 250.0, 1930: 760.0, 2440: 1000.0}
+    # The closed year was closed again with its new balances
+    assert verification_list(2023).closing_snapshot.closing_balances[1930] == 760.0
+    # Nothing changed, nothing saved
+    assert roll_forward_incoming_balances(2022) == []
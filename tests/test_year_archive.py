@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+from account import account_list
+from config import config_get_archive_path, config_get_verifications_dir_path
+from conftest import post, reload_ledger
+from verification import verification_list
+from year import archive_year, close_year
+from year_archive import unarchive_year, year_archive
+
+
+def _files(dir) -> dict[str, bytes]:
+    return {path.name: path.read_bytes() for path in dir.iterdir()}
+
+
+def test_archive_and_unarchive(ledger):
+    ledger(2023)
+    for day in (1, 2, 3):
+        post(datetime.date(2023, 1, day), [(1930, 10.0 * day), (3001, -10.0 * day)], f"Sale {day}")
+    with pytest.raises(ValueError):
+        archive_year(2023)
+    close_year(2023)
+    dir = config_get_verifications_dir_path(2023)
+    files = _files(dir)
+
+    archive_year(2023)
+    assert not dir.exists() and config_get_archive_path(2023).exists()
+    with pytest.raises(ValueError):
+        archive_year(2023)
+
+    reload_ledger()
+    vl = verification_list(2023)
+    assert vl.archived and vl.year_closed
+    assert len(year_archive(2023)) == 3
+    assert vl.find_verification(2).notes == "Sale 3"
+    assert account_list(2023).find_account(3001) is not None
+
+    unarchive_year(2023)
+    assert _files(dir) == files and not config_get_archive_path(2023).exists()
+
+
+def test_change_unarchives(ledger):
+    ledger(2023)
+    post(datetime.date(2023, 1, 1), [(1930, 10.0), (3001, -10.0)], "Sale")
+    close_year(2023)
+    archive_year(2023)
+    vl = verification_list(2023)
+    vl.remove_verification(vl[0])
+    vl.save_verifications()
+    assert not vl.archived and not vl.year_closed
+    assert config_get_verifications_dir_path(2023).exists()
+    reload_ledger()
+    assert verification_list(2023).len == 0
+
+
+def test_changed_year_is_not_archived(ledger):
+    ledger(2023)
+    post(datetime.date(2023, 1, 1), [(1930, 10.0), (3001, -10.0)], "Sale")
+    close_year(2023)
+    filepath = next(config_get_verifications_dir_path(2023).glob("verification_*"))
+    filepath.write_text(filepath.read_text().replace("Sale", "Sold"))
+    with pytest.raises(ValueError):
+        archive_year(2023)
+    assert not config_get_archive_path(2023).exists()
@@ -6,3 +6,5 @@ class Transaction:
     debit: float
     credit: float
     notes: str = ""
+    # Cost unit ("resultatenhet"), empty if none
+    cost_unit: str = ""
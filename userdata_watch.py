@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from account import account_list
+from config import config_get_accounts_filename, config_get_userdata_dir
+from file_watch import FileWatcher
+from verification import verification_list
+
+# How often the GUI looks for changes made to the userdata by others
+USERDATA_POLL_INTERVAL_MS = 2000
+
+
+def _is_userdata_file(filename: str) -> bool:
+    return filename.startswith("verification_") or filename == config_get_accounts_filename()
+
+
+class UserdataWatcher:
+    """
+    Picks up verification and accounts files changed in the userdata dir by
+    someone else, e.g. a git pull or a script, and reloads only those into
+    the loaded lists. Indexes follow through the change listeners and the
+    list revisions.
+    """
+    def __init__(self):
+        self._watcher = FileWatcher(config_get_userdata_dir(), _is_userdata_file)
+
+    def close(self):
+        self._watcher.close()
+
+    def poll(self) -> list[int]:
+        """Reload the changed files, returns the years that changed."""
+        changes = self._watcher.poll()
+        if not changes:
+            return []
+
+        # Year -> changed and removed files
+        ver_changes: dict[int, tuple[list[Path], list[Path]]] = {}
+        for filepaths, removed in ((changes.added, False), (changes.modified, False), (changes.removed, True)):
+            for filepath in filepaths:
+                try:
+                    year = int(filepath.parent.name, 10)
+                except ValueError:
+                    continue
+                ver_changes.setdefault(year, ([], []))[1 if removed else 0].append(filepath)
+
+        changed_years = []
+        for year, (changed, removed) in sorted(ver_changes.items()):
+            try:
+                acc_list = account_list(year)
+                ver_list = verification_list(year)
+            except ValueError:
+                print(f"Year {year} was added on disk, restart to load it")
+                continue
+            print(f"Reloading year {year}: {len(changed)} changed and {len(removed)} removed files")
+            if any(filepath.name == config_get_accounts_filename() for filepath in changed):
+                acc_list.reload_accounts()
+            if any(filepath.name == config_get_accounts_filename() for filepath in removed):
+                print(f"Accounts file of year {year} was removed on disk, keeping the loaded accounts")
+            changed_vers = [filepath for filepath in changed if filepath.name != config_get_accounts_filename()]
+            removed_vers = [filepath for filepath in removed if filepath.name != config_get_accounts_filename()]
+            if changed_vers or removed_vers:
+                ver_list.reload_verification_files(changed_vers, removed_vers)
+            changed_years.append(year)
+        return changed_years
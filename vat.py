@@ -0,0 +1,46 @@
+import dataclasses as dc
+import datetime
+
+from range_index import AccountRangeIndex
+
+# BAS accounts for VAT ("moms")
+VAT_OUTGOING_ACCOUNTS = {
+    "25 %": (2610, 2619),
+    "12 %": (2620, 2629),
+    "6 %": (2630, 2639),
+}
+VAT_INCOMING_ACCOUNTS = (2640, 2649)
+
+
+@dc.dataclass
+class VatSummary:
+    start: datetime.date
+    end: datetime.date
+    # Outgoing VAT per rate, positive when owed
+    outgoing: dict[str, float]
+    # Incoming (deductible) VAT, positive when receivable
+    incoming: float
+
+    @property
+    def outgoing_total(self) -> float:
+        return round(sum(self.outgoing.values()), ndigits=2)
+
+    @property
+    def to_pay(self) -> float:
+        """VAT to pay, negative for a refund."""
+        return round(self.outgoing_total - self.incoming, ndigits=2)
+
+
+def vat_summary(index: AccountRangeIndex, start: datetime.date, end: datetime.date) -> VatSummary:
+    # Outgoing VAT is booked as credit, incoming VAT as debit
+    outgoing = {rate: -index.sum(first, last, start, end) for rate, (first, last) in VAT_OUTGOING_ACCOUNTS.items()}
+    incoming = index.sum(*VAT_INCOMING_ACCOUNTS, start, end)
+    return VatSummary(start, end, outgoing, incoming)
+
+
+def quarter_period(year: int, quarter: int) -> tuple[datetime.date, datetime.date]:
+    if not 1 <= quarter <= 4:
+        raise ValueError(f"Bad quarter {quarter}, expected 1 - 4")
+    start = datetime.date(year, 3 * quarter - 2, 1)
+    end = datetime.date(year, 3 * quarter + 1, 1) - datetime.timedelta(days=1) if quarter < 4 else datetime.date(year, 12, 31)
+    return start, end
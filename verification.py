@@ -1,11 +1,21 @@
+import bisect
 import dataclasses as dc
 import datetime
+import itertools
 from pathlib import Path
 import re
 import os
-
-from config import config_get_verifications_dir_iterator, config_get_verifications_dir_path
+from typing import Callable, Iterator
+
+# Imported as modules, binary journals and archives build Verification objects
+import binary_journal as binary_journal_module
+import year_archive as year_archive_module
+from closing import ClosingSnapshot, load_closing_snapshot, remove_closing_snapshot, closing_snapshot_is_stale
+from config import ARCHIVE_SUFFIX, config_get_archive_path, config_get_verifications_dir_iterator, config_get_verifications_dir_path
+from sequence_view import SequenceView
 from dataclass_json import dataclass_json_dumps, dataclass_json_loads
+from atomic_write import atomic_write_files
+from parse_cache import load_files_cached
 from transaction import Transaction
 
 
@@ -26,10 +36,12 @@ class Verification:
     def add_transaction(self, transaction: Transaction):
         self.transactions.append(transaction)
 
+    @property
+    def filename(self) -> str:
+        return f"verification_{self.date}_{self.id}.json"
+
     def save_to_file(self, dir: Path):
-        filename = f"verification_{self.date}_{self.id}.json"
-        with open(dir / filename, "w", encoding="utf-8") as verfile:
-            verfile.write(dataclass_json_dumps(self, indent=4))
+        atomic_write_files({dir / self.filename: dataclass_json_dumps(self, indent=4)})
 
     def __lt__(self, other):
         return self.id < other.id
@@ -38,13 +50,51 @@ class Verification:
         return self.id <= other.id
 
 
+VERIFICATION_FILENAME_REGEX = re.compile(r"verification_(?P<date>\d{4}-\d{2}-\d{2})_(?P<id>\d+)\.json")
+
+
+# Called with the verification list, the verification before the change
+# (None if added) and after the change (None if removed). Both are None when
+# the whole journal was reloaded from disk.
+ChangeListener = Callable[["VerificationList", Verification | None, Verification | None], None]
+
+
+# Revisions are unique over all lists, so an index can not be mistaken for
+# the index of another list of the same year, e.g. a historical one
+_revisions = itertools.count()
+
+
 class VerificationList:
-    def __init__(self, verifications_dir: str | Path | None, year: int):
-        self._index = 0
+    def __init__(self, verifications_dir: str | Path | None, year: int, verifications: list[Verification] | None = None):
         self._year = year
         self._verifications_dir = verifications_dir
-        self._verifications = self._load_verifications()
-        self._year_closed = False
+        self._revision = next(_revisions)
+        self._change_listeners: list[ChangeListener] = []
+        self._loaded_verifications: list[Verification] | None = None
+        self._binary_journal: binary_journal_module.BinaryJournal | None = None
+        if verifications is not None:
+            # Not backed by a directory, e.g. read from the git history
+            self._closing_snapshot = None
+            self._year_closed = False
+            self._loaded_verifications = sorted(verifications)
+            return
+        archive = year_archive_module.year_archive(year)
+        if archive is not None:
+            # The index of the archive holds the hash of the archived journal
+            self._closing_snapshot = archive.load_closing_snapshot()
+            stale = self._closing_snapshot is not None and self._closing_snapshot.journal_hash != archive.index.journal_hash
+        else:
+            self._closing_snapshot = load_closing_snapshot(year)
+            stale = self._closing_snapshot is not None and closing_snapshot_is_stale(self._closing_snapshot, verifications_dir)
+        self._year_closed = self._closing_snapshot is not None
+        if stale:
+            print(f"Closing snapshot for year {year} is stale, ignoring it")
+            self._closing_snapshot = None
+        if self._closing_snapshot is None:
+            self._loaded_verifications = self._load_verifications()
+        else:
+            print(f"Year {year} closed, verifications are loaded on first use")
+            self._binary_journal = binary_journal_module.open_binary_journal(year, self._closing_snapshot.journal_hash)
 
     def __lt__(self, other):
         return self._year < other._year
@@ -52,34 +102,46 @@ class VerificationList:
     def __lte__(self, other):
         return self._year <= other._year
 
-    def __iter__(self):
-        self._index = 0
-        return self
-
-    def __next__(self) -> Verification:
-        try:
-            result = self._verifications[self._index]
-        except IndexError:
-            raise StopIteration
-        self._index += 1
-        return result
+    def __iter__(self) -> Iterator[Verification]:
+        if self._unloaded_journal is not None:
+            return iter(self._unloaded_journal)
+        # A new iterator each time, iterations can be nested
+        return iter(self._verifications)
 
     def __len__(self) -> int:
-        return len(self._verifications)
+        return self.len
 
     def __getitem__(self, idx) -> Verification:
         if type(idx) is not int:
             raise TypeError
-        if idx < 0:
-            idx = -idx - 1
-            vers_copy = self._verifications.copy()
-            vers_copy.reverse()
-            return vers_copy[idx]
-        return self._verifications[idx]
+        return self.get_verification_at(idx)
+
+    @property
+    def _verifications(self) -> list[Verification]:
+        # Closed years with a valid closing snapshot are loaded on first use
+        if self._loaded_verifications is None:
+            self._loaded_verifications = self._load_verifications()
+        return self._loaded_verifications
+
+    @property
+    def _unloaded_journal(self) -> "binary_journal_module.BinaryJournal | year_archive_module.YearArchive | None":
+        # Where the verifications of a closed year are read from until loaded
+        if self._loaded_verifications is not None or self._closing_snapshot is None:
+            return None
+        if self._binary_journal is not None:
+            return self._binary_journal
+        return year_archive_module.year_archive(self._year)
 
     def _load_verifications(self) -> list[Verification]:
         verifications: list[Verification] = []
 
+        archive = year_archive_module.year_archive(self._year)
+        if archive is not None:
+            print(f"Loading verifications from: {archive.path.absolute()}")
+            verifications = list(archive)
+            print(f"Loaded {len(verifications)} verifications")
+            return verifications
+
         dir = Path(self._verifications_dir)
         if not dir.exists():
             print(f"No dir '{dir}', ignore loading verifications")
@@ -87,9 +149,9 @@ class VerificationList:
 
         assert dir.is_dir(), f"{dir}: not a directory"
         print(f"Loading verifications from: {dir.absolute()}")
-        for filepath in dir.iterdir():
-            if "verification" in filepath.name:
-                verifications.append(Verification.load_from_file(filepath))
+        filepaths = [filepath for filepath in dir.iterdir() if "verification" in filepath.name]
+        # Only files changed since the last load are parsed again
+        verifications = load_files_cached(f"verifications_{self._year}", filepaths, Verification.load_from_file)
 
         verifications.sort()
 
@@ -99,46 +161,197 @@ class VerificationList:
     def get_verifications(self) -> list[Verification]:
         return self._verifications.copy()
 
+    @property
+    def verifications(self) -> SequenceView[Verification]:
+        """Read-only view of the verifications, without copying."""
+        return SequenceView(self._verifications)
+
     def get_verification_at(self, index: int) -> Verification:
+        if self._unloaded_journal is not None:
+            # Built from the binary journal or the archive, without loading the year
+            return self._unloaded_journal.verification_at(index)
         return self._verifications[index]
 
+    @property
+    def binary_journal(self) -> "binary_journal_module.BinaryJournal | None":
+        """Memory mapped journal of a closed year, while its verifications are not loaded."""
+        return self._binary_journal if self._loaded_verifications is None else None
+
     @property
     def len(self) -> int:
+        if self._loaded_verifications is None and self._closing_snapshot is not None:
+            return self._closing_snapshot.num_verifications
         return len(self._verifications)
 
     @property
     def year(self) -> int:
         return self._year
 
+    @property
+    def revision(self) -> int:
+        """Changes on every change to the verifications, used to invalidate derived indexes."""
+        return self._revision
+
+    def mark_changed(self):
+        self._revision = next(_revisions)
+        # Any change invalidates the closing snapshot, the year is open again
+        if self._year_closed:
+            print(f"Year {self._year} changed, opening it")
+            self.open_year()
+        self._closing_snapshot = None
+        self._close_binary_journal()
+
+    def _close_binary_journal(self):
+        if self._binary_journal is not None:
+            self._binary_journal.close()
+            self._binary_journal = None
+
+    def add_change_listener(self, listener: ChangeListener):
+        if listener not in self._change_listeners:
+            self._change_listeners.append(listener)
+
+    def verification_changed(self, old: Verification | None, new: Verification | None):
+        """
+        Notify that a verification was edited in place, old being a copy from
+        before the edit. Listeners use this to update their indexes incrementally.
+        """
+        if self._loaded_verifications is None and new is not None:
+            # Edited after being built from the binary journal, take the
+            # edited object into the journal loaded from disk
+            idx = self.find_verification_index(new.id)
+            if idx is not None and self._verifications[idx] is not new:
+                self._verifications[idx] = new
+        self.mark_changed()
+        for listener in self._change_listeners:
+            listener(self, old, new)
+
+    @property
+    def closing_snapshot(self) -> ClosingSnapshot | None:
+        """Closing snapshot matching the journal on disk and in memory, if the year is closed."""
+        return self._closing_snapshot
+
     @property
     def year_closed(self) -> bool:
         return self._year_closed
 
-    def close_year(self):
+    def close_year(self, snapshot: ClosingSnapshot):
         if self._year_closed:
             print(f"Year {self._year} already closed")
         self._year_closed = True
+        self._closing_snapshot = snapshot
+        self._close_binary_journal()
+        self._binary_journal = binary_journal_module.open_binary_journal(self._year, snapshot.journal_hash)
+        if self._binary_journal is not None:
+            # Read from the binary journal from now on, until changed
+            self._loaded_verifications = None
 
     def open_year(self):
         if not self._year_closed:
             print(f"Year {self._year} already open")
+        self._unarchive()
         self._year_closed = False
+        self._closing_snapshot = None
+        self._close_binary_journal()
+        remove_closing_snapshot(self._year)
 
     def find_verification(self, id: int | str) -> Verification | None:
+        idx = self.find_verification_index(id)
+        return None if idx is None else self.get_verification_at(idx)
+
+    def find_verification_index(self, id: int | str) -> int | None:
         if type(id) == str:
             id = int(id)
-        for ver in self:
-            if ver.id == id:
-                return ver
+        if self._unloaded_journal is not None:
+            return self._unloaded_journal.find_verification_index(id)
+        # Verifications are kept sorted on id
+        idx = bisect.bisect_left(self._verifications, id, key=lambda ver: ver.id)
+        if idx < len(self._verifications) and self._verifications[idx].id == id:
+            return idx
         return None
 
     def add_verification(self, verification: Verification):
         self._verifications.append(verification)
+        self.verification_changed(None, verification)
+
+    def add_verifications(self, verifications: list[Verification]):
+        self._verifications.extend(verifications)
+        self.mark_changed()
+        for listener in self._change_listeners:
+            for ver in verifications:
+                listener(self, None, ver)
+
+    def remove_verifications(self, verifications: list[Verification]):
+        """Remove many verifications at once, e.g. a batch that could not be saved."""
+        removed = {id(ver) for ver in verifications}
+        self._verifications[:] = [ver for ver in self._verifications if id(ver) not in removed]
+        self.mark_changed()
+        for listener in self._change_listeners:
+            for ver in verifications:
+                listener(self, ver, None)
+
+    @property
+    def next_id(self) -> int:
+        # Verifications are kept sorted on id
+        return self._verifications[-1].id + 1 if self._verifications else 0
 
     def remove_verification(self, verification: Verification):
         self._verifications.remove(verification)
+        self.verification_changed(verification, None)
+
+    def reload_verifications(self):
+        """Load the whole journal again after it was changed on disk by someone else."""
+        self._loaded_verifications = self._load_verifications()
+        self.mark_changed()
+        for listener in self._change_listeners:
+            listener(self, None, None)
+
+    def reload_verification_files(self, changed: list[Path], removed: list[Path]):
+        """
+        Apply verification files added, modified or removed on disk by someone
+        else, notifying the listeners of each verification that differs.
+        """
+        if self._loaded_verifications is None:
+            # Nothing in memory to update, only the snapshot is no longer valid
+            self.mark_changed()
+            return
+        changed_vers = [Verification.load_from_file(filepath) for filepath in changed]
+        changed_ids = {ver.id for ver in changed_vers}
+        # A date change renames the file, the id is then removed and changed
+        for filepath in removed:
+            match = VERIFICATION_FILENAME_REGEX.match(filepath.name)
+            if match is None or int(match.group("id")) in changed_ids:
+                continue
+            idx = self.find_verification_index(match.group("id"))
+            if idx is not None:
+                old = self._verifications.pop(idx)
+                self.verification_changed(old, None)
+        for ver in changed_vers:
+            idx = self.find_verification_index(ver.id)
+            if idx is None:
+                bisect.insort(self._verifications, ver, key=lambda ver: ver.id)
+                self.verification_changed(None, ver)
+            elif self._verifications[idx] != ver:
+                old = self._verifications[idx]
+                self._verifications[idx] = ver
+                self.verification_changed(old, ver)
+
+    @property
+    def archived(self) -> bool:
+        return year_archive_module.year_archive(self._year) is not None
+
+    def _unarchive(self):
+        # A change to an archived year restores its directory first
+        if self.archived:
+            year_archive_module.unarchive_year(self._year)
 
     def save_verifications(self):
+        if self._loaded_verifications is None:
+            print(f"Verifications for year {self._year} not loaded, nothing to save")
+            return
+        if self.archived and self._closing_snapshot is not None:
+            print(f"Year {self._year} archived and unchanged, nothing to save")
+            return
+        self._unarchive()
         dir = Path(self._verifications_dir)
         if dir.exists():
             assert dir.is_dir(), f"{dir}: not a directory"
@@ -146,11 +359,19 @@ class VerificationList:
             os.mkdir(dir.absolute())
 
         print(f"Using verifications directory: {dir.absolute()}")
-        for filepath in dir.iterdir():
-            if "verification" in filepath.name:
-                filepath.unlink()
-        for ver in self:
-            ver.save_to_file(dir)
+        files = {dir / ver.filename: dataclass_json_dumps(ver, indent=4) for ver in self}
+        # Files of removed verifications, or from before a date change, are
+        # removed only after the new files are in place
+        stale_files = [filepath for filepath in dir.iterdir() if "verification" in filepath.name and filepath not in files]
+        atomic_write_files(files, remove=stale_files)
+
+    def save_new_verifications(self, verifications: list[Verification]):
+        """Save only the given, newly added, verifications without rewriting the rest of the year."""
+        self._unarchive()
+        dir = Path(self._verifications_dir)
+        dir.mkdir(parents=True, exist_ok=True)
+        print(f"Saving {len(verifications)} new verifications in: {dir.absolute()}")
+        atomic_write_files({dir / ver.filename: dataclass_json_dumps(ver, indent=4) for ver in verifications})
 
 
 _verification_lists: list[VerificationList] | None = None
@@ -166,7 +387,8 @@ def verification_list_init():
     for vl_path in config_get_verifications_dir_iterator():
         vl_path = Path(vl_path)
         if not vl_path.is_dir():
-            print(f"{vl_path} is not a directory, ignoring for ver loading")
+            if vl_path.suffix != ARCHIVE_SUFFIX:
+                print(f"{vl_path} is not a directory, ignoring for ver loading")
             continue
 
         year_dir_name = vl_path.name
@@ -175,10 +397,17 @@ def verification_list_init():
         except ValueError as err:
             print(f"Invalid year, ignoring '{vl_path.absolute()}'")
             continue
+        if config_get_archive_path(year).exists():
+            print(f"Year {year} is archived, ignoring the directory '{vl_path.absolute()}'")
+            continue
 
         print(f"Loading verifications for year {year}")
         _verification_lists.append(VerificationList(vl_path, year))
 
+    for year in year_archive_module.archived_years():
+        print(f"Loading archived verifications for year {year}")
+        _verification_lists.append(VerificationList(config_get_verifications_dir_path(year), year))
+
     _verification_lists.sort()
 
 
@@ -1,15 +1,21 @@
 from account import (
+    Account,
     AccountList,
     account_lists_years,
     account_list,
     create_new_account_list
 )
+from config import config_get_verifications_dir_path
 from verification import (
     VerificationList,
     verification_lists_years,
     verification_list,
     create_new_verification_list
 )
+from binary_journal import binary_journal_path, write_binary_journal
+from closing import ClosingSnapshot, journal_hash, journal_manifest, save_closing_snapshot
+from year_archive import unarchive_year, write_year_archive
+from cube import monthly_cube, save_monthly_cube
 from datetime import datetime, date
 import balance
 
@@ -54,22 +60,11 @@ class Year:
         if years.index(self._year) <= 0:
             print("No previous year, nothing to recalculate")
             return
+        roll_forward_incoming_balances(years[years.index(self._year) - 1], self._year)
 
-        # Switch to prev year for easier call of functions
-        cur_year_accounts = self.account_list
-        self.goto_prev_year()
-        prev_year_accounts = self.account_list
-        for cur_year_acc in cur_year_accounts:
-            prev_year_acc = prev_year_accounts.find_account(cur_year_acc.account_number)
-            if prev_year_acc and (prev_year_acc.is_asset or prev_year_acc.is_debt):
-                cur_year_acc.incoming_balance = balance.get_balance_for_account(prev_year_acc)
-            else:
-                cur_year_acc.incoming_balance = 0
-
-        # Switch back to current year
-        self.goto_next_year()
-        # Save accounts with the new balances
-        cur_year_accounts.save_accounts()
+    def other_year(self, year: int) -> "Year | None":
+        """Another year of the same ledger, None if not present."""
+        return Year(year) if year in account_lists_years() else None
 
     @property
     def year(self) -> int:
@@ -121,3 +116,100 @@ def year() -> Year:
     global _year
     assert _year is not None
     return _year
+
+
+def get_year_end_movements(year: int) -> dict[int, float]:
+    """Year-end movement per account, from the closing snapshot when the year is closed."""
+    vl = verification_list(year)
+    if vl.closing_snapshot is not None:
+        return vl.closing_snapshot.movements
+    return balance.posting_index(vl).movements()
+
+
+def close_year(year: int):
+    """Save the verifications and store a closing snapshot for the year."""
+    vl = verification_list(year)
+    if vl.archived:
+        unarchive_year(year)
+    vl.save_verifications()
+    movements = get_year_end_movements(year)
+    verifications_dir = config_get_verifications_dir_path(year)
+    # Before hashing, a file changed in between makes the next load hash again
+    files = journal_manifest(verifications_dir)
+    snapshot = ClosingSnapshot(
+        year=year,
+        journal_hash=journal_hash(verifications_dir),
+        num_verifications=vl.len,
+        movements=movements,
+        closing_balances={acc.account_number: balance.get_balance_from_movement(acc, movements.get(acc.account_number, 0.0)) for acc in account_list(year)},
+        files=files,
+    )
+    save_closing_snapshot(snapshot)
+    write_binary_journal(binary_journal_path(year), snapshot.journal_hash, vl)
+    vl.close_year(snapshot)
+    cube = monthly_cube(vl)
+    cube.journal_hash = snapshot.journal_hash
+    save_monthly_cube(cube)
+
+
+def archive_year(year: int):
+    """
+    Pack a closed year into one compressed file in the userdata dir. The
+    year stays loaded and readable, a change to it unarchives it again.
+    """
+    vl = verification_list(year)
+    if vl.closing_snapshot is None:
+        raise ValueError(f"Year {year} is not closed, close it before archiving")
+    write_year_archive(year, vl.closing_snapshot.journal_hash)
+
+
+def get_closing_balances(year: int) -> dict[int, float]:
+    """Closing balance per asset and debt account of a year, from the cached year-end movements."""
+    movements = get_year_end_movements(year)
+    return {
+        acc.account_number: balance.get_balance_from_movement(acc, movements.get(acc.account_number, 0.0))
+        for acc in account_list(year) if acc.is_asset or acc.is_debt
+    }
+
+
+def roll_forward_incoming_balances(from_year: int, to_year: int | None = None) -> list[int]:
+    """
+    Recompute the incoming balances of every year after from_year (up to and
+    including to_year, default the last year) in one ordered pass. Each year's
+    closing balances are computed from its new incoming balances and its cached
+    year-end movements, so no journal is scanned more than once. Asset and
+    debt accounts with a closing balance that are missing in a later year are
+    added to it. Only years whose balances actually changed are saved.
+    Returns the saved years.
+    """
+    years = account_lists_years()
+    if to_year is None:
+        to_year = years[-1]
+    saved_years: list[int] = []
+    prev_year = from_year
+    closing = get_closing_balances(from_year)
+    for cur_year in years[years.index(from_year) + 1:]:
+        if cur_year > to_year:
+            break
+        accounts = account_list(cur_year)
+        changed = False
+        for acc_num, closing_balance in closing.items():
+            if closing_balance != 0 and accounts.find_account(acc_num) is None:
+                prev_acc = account_list(prev_year).find_account(acc_num)
+                print(f"Adding account {acc_num} '{prev_acc.description}' with closing balance {closing_balance} of {prev_year} to year {cur_year}")
+                accounts.add_account(Account(acc_num, prev_acc.description))
+        for acc in accounts:
+            incoming = closing.get(acc.account_number, 0) if acc.is_asset or acc.is_debt else 0
+            if incoming != acc.incoming_balance:
+                acc.incoming_balance = incoming
+                changed = True
+        if changed:
+            print(f"Incoming balances changed for year {cur_year}")
+            accounts.save_accounts()
+            saved_years.append(cur_year)
+            if verification_list(cur_year).closing_snapshot is not None:
+                # Closing balances of a closed year follow its incoming balances
+                close_year(cur_year)
+        prev_year = cur_year
+        closing = get_closing_balances(cur_year)
+    return saved_years
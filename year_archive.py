@@ -0,0 +1,168 @@
+import bisect
+import dataclasses as dc
+import io
+import time
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+# Imported as modules, the lists read their year from the archive
+import account as account_module
+import verification as verification_module
+from atomic_write import atomic_write_files
+from closing import ClosingSnapshot, journal_hash_of_files
+from config import (
+    CLOSING_FILENAME,
+    config_get_accounts_filename,
+    config_get_archive_path,
+    config_get_archives_iterator,
+    config_get_verifications_dir_path,
+)
+from dataclass_json import dataclass_json_dumps, dataclass_json_loads
+
+ARCHIVE_INDEX_MEMBER = "archive_index.json"
+
+
+@dc.dataclass
+class ArchiveIndex:
+    year: int
+    journal_hash: str
+    # Verification ids and the members holding them, sorted on id
+    verification_ids: list[int]
+    verification_members: list[str]
+    # All files of the year directory, to restore it as it was
+    files: list[str]
+
+
+class YearArchive:
+    """
+    A closed year packed into one zip file, read lazily: opening reads only
+    the zip directory and the index, each verification is read from its own
+    member when asked for.
+    """
+    def __init__(self, path: Path | BinaryIO):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        try:
+            self.index: ArchiveIndex = dataclass_json_loads(self._zip.read(ARCHIVE_INDEX_MEMBER).decode("utf-8"))
+        except KeyError:
+            self._zip.close()
+            raise ValueError(f"{path}: no {ARCHIVE_INDEX_MEMBER}, not a year archive") from None
+
+    def close(self):
+        self._zip.close()
+
+    def read_bytes(self, name: str) -> bytes | None:
+        if name not in self.index.files:
+            return None
+        return self._zip.read(name)
+
+    def read_text(self, name: str) -> str | None:
+        content = self.read_bytes(name)
+        return None if content is None else content.decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self.index.verification_ids)
+
+    def verification_at(self, index: int) -> "verification_module.Verification":
+        return dataclass_json_loads(self.read_text(self.index.verification_members[index]))
+
+    def __iter__(self) -> Iterator["verification_module.Verification"]:
+        # Members are stored in id order, this streams through the file
+        for member in self.index.verification_members:
+            yield dataclass_json_loads(self.read_text(member))
+
+    def find_verification_index(self, id: int) -> int | None:
+        idx = bisect.bisect_left(self.index.verification_ids, id)
+        if idx < len(self.index.verification_ids) and self.index.verification_ids[idx] == id:
+            return idx
+        return None
+
+    def load_accounts(self) -> list["account_module.Account"]:
+        text = self.read_text(config_get_accounts_filename())
+        return [] if text is None else dataclass_json_loads(text)
+
+    def load_closing_snapshot(self) -> ClosingSnapshot | None:
+        text = self.read_text(CLOSING_FILENAME)
+        return None if text is None else dataclass_json_loads(text)
+
+
+# Open archives per year
+_archives: dict[int, YearArchive] = {}
+
+
+def year_archive(year: int) -> YearArchive | None:
+    """The archive of the year, if the year is archived."""
+    if year in _archives:
+        return _archives[year]
+    path = config_get_archive_path(year)
+    if not path.exists():
+        return None
+    _archives[year] = YearArchive(path)
+    return _archives[year]
+
+
+def archived_years() -> list[int]:
+    years = []
+    for path in config_get_archives_iterator():
+        try:
+            years.append(int(Path(path).stem, 10))
+        except ValueError:
+            print(f"Invalid year, ignoring archive '{Path(path).absolute()}'")
+    return sorted(years)
+
+
+def write_year_archive(year: int, journal_hash: str) -> Path:
+    """
+    Pack the year directory into one compressed file and remove the
+    directory. The journal must match the hash, i.e. the closing snapshot.
+    """
+    start = time.perf_counter()
+    dir = config_get_verifications_dir_path(year)
+    if year_archive(year) is not None:
+        raise ValueError(f"Year {year} is already archived")
+    filepaths = sorted(dir.iterdir(), key=lambda p: p.name)
+    if any(not filepath.is_file() for filepath in filepaths):
+        raise ValueError(f"{dir}: only files can be archived")
+
+    members: list[tuple[int, str]] = []
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        ver_contents = []
+        for filepath in filepaths:
+            content = filepath.read_bytes()
+            archive.writestr(filepath.name, content)
+            match = verification_module.VERIFICATION_FILENAME_REGEX.match(filepath.name)
+            if match is not None:
+                members.append((int(match.group("id")), filepath.name))
+            if "verification" in filepath.name:
+                ver_contents.append((filepath.name, content))
+        archived_hash = journal_hash_of_files(ver_contents)
+        if archived_hash != journal_hash:
+            raise ValueError(f"Year {year} changed since it was closed, close it again before archiving")
+        members.sort()
+        index = ArchiveIndex(year, archived_hash, [id for id, _ in members], [name for _, name in members],
+                             [filepath.name for filepath in filepaths])
+        archive.writestr(ARCHIVE_INDEX_MEMBER, dataclass_json_dumps(index, indent=4))
+
+    path = config_get_archive_path(year)
+    atomic_write_files({path: buffer.getvalue()}, remove=filepaths)
+    dir.rmdir()
+    print(f"Archived year {year}: {len(filepaths)} files, {len(buffer.getvalue())} bytes in {path.absolute()} "
+          f"in {time.perf_counter() - start:.2f} s")
+    return path
+
+
+def unarchive_year(year: int):
+    """Restore the year directory from the archive, as it was, and remove the archive."""
+    start = time.perf_counter()
+    archive = year_archive(year)
+    if archive is None:
+        raise ValueError(f"Year {year} is not archived")
+    dir = config_get_verifications_dir_path(year)
+    dir.mkdir(exist_ok=True)
+    files = {dir / name: archive.read_bytes(name) for name in archive.index.files}
+    archive.close()
+    del _archives[year]
+    atomic_write_files(files, remove=[archive.path], skip_unchanged=False)
+    print(f"Unarchived year {year}: {len(files)} files in {dir.absolute()} in {time.perf_counter() - start:.2f} s")